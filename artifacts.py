@@ -0,0 +1,141 @@
+"""
+Prebuilt startup artifacts: the normalized whitelist snapshot, the compact
+memory-mapped whitelist store and the compiled model, so workers skip CSV
+parsing and the xgboost import
+"""
+import os
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = 'URLWL1'
+
+
+def whitelist_snapshot_path(csv_path):
+    """Default location of the snapshot for a whitelist CSV"""
+    return os.path.splitext(csv_path)[0] + '.snapshot'
+
+
+def whitelist_store_path(csv_path):
+    """Default location of the compact store (compact_whitelist.py) for a whitelist CSV"""
+    return os.path.splitext(csv_path)[0] + '.wlstore'
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return f"{stat.st_size} {stat.st_mtime_ns}"
+
+
+def save_whitelist_snapshot(domains, path, source_path=None):
+    """
+    Write normalized domains as a sorted, newline-separated UTF-8 snapshot
+
+    The header records the whitelist version (hash of the sorted body, the
+    same value WhitelistIndex.version computes) and the size/mtime of the
+    source CSV, so a stale snapshot is detected without re-reading the CSV.
+    Returns the whitelist version.
+    """
+    body = '\n'.join(sorted(domains))
+    version = hashlib.sha256(body.encode('utf-8')).hexdigest()[:12]
+    stamp = _source_stamp(source_path) if source_path and os.path.exists(source_path) else '-'
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(f"{SNAPSHOT_MAGIC}\n{version}\n{stamp}\n{body}")
+    os.replace(tmp_path, path)
+    return version
+
+
+def load_whitelist_snapshot(path, source_path=None):
+    """
+    Return (domains, version) from a snapshot, or None if it is missing,
+    malformed or older than its source CSV
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8', newline='\n') as f:
+        data = f.read()
+    header = data.split('\n', 3)
+    if len(header) < 3 or header[0] != SNAPSHOT_MAGIC:
+        logger.warning(f"Ignoring malformed whitelist snapshot {path}")
+        return None
+    version, stamp = header[1], header[2]
+    if source_path and os.path.exists(source_path) and stamp != _source_stamp(source_path):
+        logger.warning(f"Whitelist snapshot {path} is stale, rebuild with --build-artifacts")
+        return None
+    body = header[3] if len(header) == 4 else ''
+    domains = set(body.split('\n')) if body else set()
+    return domains, version
+
+
+def read_prebuilt_whitelist(csv_path, use_store=True):
+    """
+    WhitelistIndex over the compact store (preferred) or the text snapshot
+    built from csv_path, or None when neither is present and fresh
+    """
+    from compact_whitelist import open_store
+    from whitelist_index import WhitelistIndex
+
+    if use_store:
+        stamp = _source_stamp(csv_path) if os.path.exists(csv_path) else None
+        store = open_store(whitelist_store_path(csv_path), stamp)
+        if store is not None:
+            return WhitelistIndex(store, store.version)
+    snapshot = load_whitelist_snapshot(whitelist_snapshot_path(csv_path), csv_path)
+    if snapshot is not None:
+        domains, version = snapshot
+        return WhitelistIndex(domains, version)
+    return None
+
+
+def read_whitelist(csv_path, use_snapshot=True, use_store=True):
+    """WhitelistIndex from a fresh prebuilt artifact, else from the CSV; raises if none can be read"""
+    from feature_extractor import URLFeatureExtractor
+    from whitelist_index import WhitelistIndex
+
+    if use_snapshot:
+        index = read_prebuilt_whitelist(csv_path, use_store)
+        if index is not None:
+            return index
+    return WhitelistIndex(URLFeatureExtractor.read_whitelist(csv_path))
+
+
+def load_whitelist(csv_path, use_snapshot=True, use_store=True):
+    """Install the whitelist from a fresh prebuilt artifact, else parse the CSV"""
+    from feature_extractor import URLFeatureExtractor
+
+    if use_snapshot:
+        index = read_prebuilt_whitelist(csv_path, use_store)
+        if index is not None:
+            URLFeatureExtractor.set_whitelist_index(index)
+            return
+    URLFeatureExtractor.load_whitelist(csv_path)
+
+
+def build_artifacts(model_path, whitelist_csv, lexical_model_path=None):
+    """
+    Build the compiled model (and compiled lexical model, when that file
+    exists), the whitelist snapshot and the compact store; returns their
+    paths, None for each one skipped
+    """
+    from compact_whitelist import build_store
+    from feature_extractor import URLFeatureExtractor
+    from model_runtime import compiled_model_path
+    from tree_compiler import CompiledModel
+
+    model_artifact = compiled_model_path(model_path)
+    CompiledModel.from_json(model_path).save(model_artifact)
+    lexical_artifact = None
+    if lexical_model_path and os.path.exists(lexical_model_path):
+        lexical_artifact = compiled_model_path(lexical_model_path)
+        CompiledModel.from_json(lexical_model_path).save(lexical_artifact)
+
+    if not os.path.exists(whitelist_csv):
+        logger.warning(f"Whitelist {whitelist_csv} not found, skipping snapshot")
+        return model_artifact, lexical_artifact, None, None
+    URLFeatureExtractor.load_whitelist(whitelist_csv)
+    snapshot = whitelist_snapshot_path(whitelist_csv)
+    save_whitelist_snapshot(URLFeatureExtractor.WHITELIST, snapshot, whitelist_csv)
+    store = whitelist_store_path(whitelist_csv)
+    build_store(URLFeatureExtractor.WHITELIST, store, _source_stamp(whitelist_csv))
+    return model_artifact, lexical_artifact, snapshot, store
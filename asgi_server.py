@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Asyncio (ASGI) serving mode for the Gmail URL Scanner backend
+
+Serves the same endpoints and JSON responses as flask_server.py. Before a
+request is scored, the verdict cache, whitelist and cascade lexical stage
+pick out the URLs that still need DNS, and their distinct uncached domains
+are resolved concurrently on the event loop, under a concurrency limit and
+an overall deadline. A /check-urls batch full of cold domains then costs at most one
+deadline instead of one DNS timeout per URL, and no worker thread is held
+while DNS is pending.
+
+Run with any ASGI server, e.g.:
+    pip install uvicorn
+    uvicorn asgi_server:app --port 5000
+or simply `python asgi_server.py`, which uses uvicorn when it is installed.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+import flask_server
+import metrics
+from feature_extractor import URLFeatureExtractor
+
+logger = logging.getLogger(__name__)
+
+# Domains resolved at once per request, and the time budget for all of them
+DNS_CONCURRENCY = int(os.environ.get('URL_SCANNER_DNS_CONCURRENCY', URLFeatureExtractor.DNS_CONCURRENCY))
+BATCH_DEADLINE = float(os.environ.get('URL_SCANNER_BATCH_DEADLINE', 3.0))
+
+# Flask-CORS defaults: any origin, preflight answered for every route
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+PREFLIGHT_HEADERS = CORS_HEADERS + [
+    (b'access-control-allow-methods', b'GET, HEAD, POST, OPTIONS'),
+    (b'access-control-allow-headers', b'content-type'),
+]
+
+
+async def prefetch(urls):
+    """Warm the DNS cache for the URLs of a request that the lexical stage leaves undecided"""
+    urls = await asyncio.to_thread(flask_server.dns_candidates, urls)
+    if urls:
+        await URLFeatureExtractor.prefetch_dns(urls, concurrency=DNS_CONCURRENCY, deadline=BATCH_DEADLINE)
+
+
+async def health(data, scope):
+    return flask_server.health_payload(), 200
+
+
+async def check_url(data, scope):
+    if isinstance(data, dict) and 'url' in data:
+        await prefetch([data['url']])
+    return await asyncio.to_thread(flask_server.check_url_payload, data)
+
+
+async def check_urls(data, scope):
+    if isinstance(data, dict) and isinstance(data.get('urls'), list) and len(data['urls']) <= 100:
+        await prefetch(data['urls'])
+    return await asyncio.to_thread(flask_server.check_urls_payload, data)
+
+
+async def stats(data, scope):
+    return flask_server.stats_payload(), 200
+
+
+async def prometheus_metrics(data, scope):
+    # A str payload is sent as-is rather than JSON-encoded
+    return metrics.render_prometheus(), 200
+
+
+async def admin_reload(data, scope):
+    authorization = dict(scope.get('headers', [])).get(b'authorization', b'').decode('latin-1')
+    return await asyncio.to_thread(flask_server.admin_reload_payload, authorization)
+
+
+# (method, path) -> (handler, whether the handler reads a JSON body)
+ROUTES = {
+    ('GET', '/health'): (health, False),
+    ('POST', '/check-url'): (check_url, True),
+    ('POST', '/check-urls'): (check_urls, True),
+    ('GET', '/stats'): (stats, False),
+    ('GET', '/metrics'): (prometheus_metrics, False),
+    ('POST', '/admin/reload'): (admin_reload, False),
+}
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def send_json(send, payload, status):
+    start = time.perf_counter()
+    body = json.dumps(payload, sort_keys=True).encode('utf-8')
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - start, 'serialization')
+    await send_body(send, body, b'application/json', status)
+
+
+async def send_body(send, body, content_type, status):
+    headers = [(b'content-type', content_type),
+               (b'content-length', str(len(body)).encode('ascii'))] + CORS_HEADERS
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def without_body(send):
+    """send() for a HEAD request: the GET response's status and headers, no body"""
+    async def send_head(message):
+        if message['type'] == 'http.response.body':
+            message = dict(message, body=b'')
+        await send(message)
+    return send_head
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    path = scope['path']
+    if method == 'OPTIONS':
+        await send({'type': 'http.response.start', 'status': 200, 'headers': PREFLIGHT_HEADERS})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    if method == 'HEAD':
+        send = without_body(send)
+    route = ROUTES.get(('GET' if method == 'HEAD' else method, path))
+    if route is None:
+        allowed = any(route_path == path for _, route_path in ROUTES)
+        status = 405 if allowed else 404
+        await send_json(send, {'error': 'Method Not Allowed' if allowed else 'Not Found'}, status)
+        return
+
+    handler, reads_body = route
+    data = None
+    if reads_body:
+        body = await read_body(receive)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            pass  # like Flask's get_json(silent=True): the handler answers 400 for a missing body
+
+    payload, status = await handler(data, scope)
+    if isinstance(payload, str):
+        await send_body(send, payload.encode('utf-8'), metrics.PROMETHEUS_CONTENT_TYPE.encode('ascii'), status)
+    else:
+        await send_json(send, payload, status)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is not installed: pip install uvicorn (or run under any ASGI server)")
+    uvicorn.run(app, host='0.0.0.0', port=5000)
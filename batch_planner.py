@@ -0,0 +1,64 @@
+from feature_extractor import URLFeatureExtractor
+
+
+class BatchPlan:
+    """A /check-urls batch grouped by URL and then by domain.
+
+    URLs are grouped on their exact string: every lexical feature is
+    computed on the raw URL, so that is the strictest normalization that
+    still guarantees an identical verdict. Non-string entries are never
+    merged. ``positions[i]`` is the index into ``urls`` of the i-th
+    requested URL, and ``domains`` holds the normalized domain of each
+    unique URL (None when it cannot be parsed).
+    """
+    __slots__ = ('urls', 'positions', 'domains', 'total')
+
+    def __init__(self, urls, positions, domains, total):
+        self.urls = urls
+        self.positions = positions
+        self.domains = domains
+        self.total = total
+
+    @property
+    def duplicate_urls(self):
+        return self.total - len(self.urls)
+
+    @property
+    def unique_domains(self):
+        return len({domain for domain in self.domains if domain is not None})
+
+    def expand(self, unique_results):
+        """Results per unique URL -> results in the original request order"""
+        return [unique_results[j] for j in self.positions]
+
+    def metadata(self):
+        return {
+            'unique_urls': len(self.urls),
+            'duplicate_urls': self.duplicate_urls,
+            'unique_domains': self.unique_domains
+        }
+
+
+def plan_batch(urls):
+    """Deduplicate a list of URLs and normalize each unique URL's domain once"""
+    unique = []
+    positions = []
+    index_of = {}
+    for url in urls:
+        if isinstance(url, str):
+            j = index_of.get(url)
+            if j is None:
+                j = index_of[url] = len(unique)
+                unique.append(url)
+        else:
+            j = len(unique)
+            unique.append(url)
+        positions.append(j)
+
+    domains = []
+    for url in unique:
+        try:
+            domains.append(URLFeatureExtractor.normalize_domain(url))
+        except Exception:
+            domains.append(None)  # scored individually, which reports the error
+    return BatchPlan(unique, positions, domains, len(urls))
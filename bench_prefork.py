@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Memory and throughput benchmark for the pre-fork launcher (serve.py)
+
+For each worker count, starts serve.py against a synthetic whitelist
+(large enough for its memory to show) and a replayed DNS snapshot (no
+network), then drives /check-url with closed-loop client processes for
+--duration seconds. Reports requests/s, the speed-up over the first worker
+count, and per-worker memory from /proc/<pid>/smaps_rollup once the load
+is over:
+
+- rss:     resident memory, counting pages shared with the parent in full
+- pss:     proportional share (shared pages divided among their users)
+- private: pages only this worker holds, i.e. what one more worker costs
+
+Throughput can only scale up to the number of cores on the machine.
+
+Usage:
+    python bench_prefork.py [--workers 1 2 4] [--duration 10] [--clients 8]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_suite import load_sample, StubResolver
+from bench_startup import write_synthetic_whitelist
+from feature_extractor import URLFeatureExtractor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def write_dns_snapshot(urls, path):
+    """Stub answers for every sample domain, in the format ReplayResolver reads"""
+    domains = sorted({URLFeatureExtractor.normalize_domain(url) for url in urls})
+    stub = StubResolver()
+
+    async def answers():
+        return await asyncio.gather(*(stub.query(domain, rdtype)
+                                      for domain in domains for rdtype in ('A', 'MX', 'NS')))
+
+    results = iter(asyncio.run(answers()))
+    with open(path, 'w', encoding='utf-8') as f:
+        for domain in domains:
+            for rdtype in ('A', 'MX', 'NS'):
+                answer = next(results)
+                count, ttl = (len(answer), answer.rrset.ttl) if answer is not None else (-1, 0)
+                f.write(f"{domain}\t{rdtype}\t{count}\t{ttl}\n")
+
+
+def memory_kb(pid):
+    """Rss, Pss and private kB of a process from smaps_rollup"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+
+def child_pids(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_healthy(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"serve.py did not become healthy on port {port}")
+
+
+def client(port, urls, duration, results):
+    """Closed loop: one request in flight at a time over a keep-alive connection"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    done = errors = 0
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        body = json.dumps({'url': urls[i % len(urls)]})
+        i += 1
+        try:
+            conn.request('POST', '/check-url', body, headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                done += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    results.put((done, errors))
+
+
+def run_load(port, urls, clients, duration):
+    results = multiprocessing.Queue()
+    # Each client starts at a different offset so verdict caches see distinct URLs
+    shards = [urls[i::clients] for i in range(clients)]
+    procs = [multiprocessing.Process(target=client, args=(port, shard, duration, results))
+             for shard in shards]
+    for proc in procs:
+        proc.start()
+    totals = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return sum(done for done, _ in totals), sum(errors for _, errors in totals)
+
+
+def bench_workers(workers, port, env, urls, clients, duration):
+    server = subprocess.Popen([sys.executable, 'serve.py', '--workers', str(workers), '--port', str(port)],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_healthy(port)
+        run_load(port, urls[:200], clients, 1.0)  # warm-up: imports, first requests per worker
+        done, errors = run_load(port, urls, clients, duration)
+        parent = memory_kb(server.pid)
+        per_worker = [memory_kb(pid) for pid in child_pids(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    def mean(key):
+        return sum(m[key] for m in per_worker) / len(per_worker) / 1024.0
+
+    return {
+        'workers': workers,
+        'requests': done,
+        'errors': errors,
+        'requests_per_sec': done / duration,
+        'parent_rss_mb': parent['rss'] / 1024.0,
+        'worker_rss_mb': mean('rss'),
+        'worker_pss_mb': mean('pss'),
+        'worker_private_mb': mean('private'),
+        'total_pss_mb': (parent['pss'] + sum(m['pss'] for m in per_worker)) / 1024.0
+    }
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cores})
+    parser = argparse.ArgumentParser(description='serve.py memory and throughput benchmark')
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load per worker count')
+    parser.add_argument('--clients', type=int, default=2 * max(default_workers))
+    parser.add_argument('--sample-size', type=int, default=20000)
+    parser.add_argument('--synthetic-domains', type=int, default=200000)
+    parser.add_argument('--port', type=int, default=5077)
+    parser.add_argument('--output', help='also write the JSON results here')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_prefork_')
+    try:
+        urls = load_sample(args.sample_size)
+        snapshot = os.path.join(tmpdir, 'corpus.dns')
+        whitelist = os.path.join(tmpdir, 'benign-urls.csv')
+        write_dns_snapshot(urls, snapshot)
+        write_synthetic_whitelist(whitelist, args.synthetic_domains)
+        env = dict(os.environ,
+                   URL_SCANNER_WHITELIST=whitelist,
+                   URL_SCANNER_DNS_MODE='replay',
+                   URL_SCANNER_DNS_SNAPSHOT=snapshot,
+                   URL_SCANNER_CACHE_DB=os.path.join(tmpdir, 'cache.db'),
+                   URL_SCANNER_DECISION_LOG=os.path.join(tmpdir, 'decisions.jsonl'))
+        subprocess.run([sys.executable, 'flask_server.py', '--build-artifacts'], cwd=ROOT,
+                       env=dict(env, URL_SCANNER_DECISION_LOG='', URL_SCANNER_CACHE_DB=''),
+                       capture_output=True, check=True)
+
+        rows = []
+        for workers in args.workers:
+            print(f"⏱️  {workers} worker(s), {args.clients} clients, {args.duration:g}s", file=sys.stderr)
+            rows.append(bench_workers(workers, args.port, env, urls, args.clients, args.duration))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    base = rows[0]['requests_per_sec'] or 1.0
+    for row in rows:
+        row['speedup'] = row['requests_per_sec'] / base
+    results = {'cores': cores, 'clients': args.clients, 'duration': args.duration,
+               'synthetic_domains': args.synthetic_domains, 'runs': rows}
+
+    print(f"{'workers':>8}{'req/s':>10}{'speedup':>9}{'RSS MB':>9}{'PSS MB':>9}"
+          f"{'private MB':>12}{'total PSS MB':>14}", file=sys.stderr)
+    for row in rows:
+        print(f"{row['workers']:>8}{row['requests_per_sec']:>10.0f}{row['speedup']:>8.2f}x"
+              f"{row['worker_rss_mb']:>9.1f}{row['worker_pss_mb']:>9.1f}{row['worker_private_mb']:>12.1f}"
+              f"{row['total_pss_mb']:>14.1f}", file=sys.stderr)
+    if cores < max(args.workers):
+        print(f"⚠️  Only {cores} core(s): throughput cannot scale past that", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Start-up time benchmark for flask_server.py
+
+Spawns fresh interpreters importing flask_server in two modes and reports
+median seconds for the import, model-load and whitelist-load stages:
+
+- legacy:    URL_SCANNER_ARTIFACTS=0 (xgboost JSON model, CSV parsed row by row)
+- artifacts: compiled model + whitelist snapshot from --build-artifacts
+
+Usage:
+    python bench_startup.py [--runs 5] [--synthetic-domains 200000]
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PROBE = "import json, flask_server; print(json.dumps(flask_server.STARTUP_TIMINGS))"
+
+
+def write_synthetic_whitelist(path, count):
+    """Write a benign-urls style CSV (rank, url) with generated domains"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['rank', 'url'])
+        for i in range(count):
+            writer.writerow([i + 1, f"https://www.site{i}.example{i % 97}.com/"])
+
+
+def run_probe(env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    total = time.perf_counter() - start
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings['process_total'] = total
+    return timings
+
+
+def bench_mode(env, runs):
+    samples = [run_probe(env) for _ in range(runs)]
+    return {stage: statistics.median(s[stage] for s in samples) for stage in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='flask_server start-up benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--whitelist', help='whitelist CSV (default: URL_SCANNER_WHITELIST or the server default)')
+    parser.add_argument('--synthetic-domains', type=int, default=0,
+                        help='benchmark against a generated whitelist of this many domains')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    tmpdir = None
+    if args.synthetic_domains:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.whitelist = os.path.join(tmpdir.name, 'benign-urls.csv')
+        write_synthetic_whitelist(args.whitelist, args.synthetic_domains)
+    if args.whitelist:
+        env['URL_SCANNER_WHITELIST'] = os.path.abspath(args.whitelist)
+
+    # Build artifacts in a separate process, exactly as a deploy would
+    subprocess.run([sys.executable, 'flask_server.py', '--build-artifacts'], cwd=ROOT, env=env,
+                   capture_output=True, check=True)
+
+    results = {
+        'runs': args.runs,
+        'whitelist': env.get('URL_SCANNER_WHITELIST', 'default'),
+        'legacy': bench_mode(dict(env, URL_SCANNER_ARTIFACTS='0'), args.runs),
+        'artifacts': bench_mode(dict(env, URL_SCANNER_ARTIFACTS='1'), args.runs)
+    }
+
+    print(f"{'stage':<16}{'legacy (s)':>12}{'artifacts (s)':>15}", file=sys.stderr)
+    for stage in results['legacy']:
+        print(f"{stage:<16}{results['legacy'][stage]:>12.3f}{results['artifacts'][stage]:>15.3f}",
+              file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
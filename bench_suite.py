@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Per-stage performance benchmarks with regression thresholds
+
+Times the scanner's hot-path stages on real URLs sampled from
+raw_datasets/malicious-urls.csv, with DNS answered by an in-process stub so
+runs are offline and repeatable. Results are written as JSON. Each stage is
+compared against bench_baseline.json, and the run exits non-zero when any
+stage is slower than its baseline by more than the tolerance.
+
+Absolute timings drift with the machine's clock speed and load, so a fixed
+reference workload is timed right before and after every stage, and each
+stage's baseline is scaled by how much slower or faster that reference ran
+than the baseline's. Each stage is run until it has been
+timed for at least --min-seconds, so microsecond-scale stages take the best
+of many runs rather than of a handful. Stages that look regressed are rerun
+--confirm-runs times and fail when most of those reruns, each judged on its
+own, are regressed too.
+
+Usage:
+    python bench_suite.py                      # run and compare
+    python bench_suite.py --update-baseline    # store this machine's numbers
+    python bench_suite.py --output results.json --tolerance 0.3 --min-seconds 1
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import zlib
+
+from dns_resolvers import RecordedAnswer
+
+# Score lone requests immediately; the micro-batch window would dominate e2e timings
+os.environ.setdefault('URL_SCANNER_BATCH_WINDOW_MS', '0')
+# Nor should the e2e stages time decision-log writes or share the process with a file watcher
+os.environ.setdefault('URL_SCANNER_DECISION_LOG', '')
+os.environ.setdefault('URL_SCANNER_RELOAD_INTERVAL', '0')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(ROOT, 'raw_datasets', 'malicious-urls.csv')
+BASELINE = os.path.join(ROOT, 'bench_baseline.json')
+# Fixed workload timed in every run; baselines are scaled by its speed (see compare)
+REFERENCE_STAGE = 'reference'
+
+LEXICAL_METHODS = [
+    'url_length', 'count_dots', 'count_hyphens', 'has_ip', 'count_suspicious_words',
+    'subdomain_count', 'tld_length', 'url_entropy'
+]
+
+
+def load_sample(count):
+    """First `count` non-empty URLs of the corpus, in file order"""
+    urls = []
+    with open(CORPUS, newline='', encoding='utf-8', errors='replace') as f:
+        for row in csv.DictReader(f):
+            if row.get('url'):
+                urls.append(row['url'])
+                if len(urls) == count:
+                    break
+    return urls
+
+
+class StubResolver:
+    """Deterministic async DNS: roughly 70% of lookups resolve, with 1-4 records"""
+    offline = False
+
+    async def query(self, domain, rdtype):
+        h = zlib.crc32(f"{domain}/{rdtype}".encode('utf-8', 'replace'))
+        if h % 10 < 3:
+            return None
+        return RecordedAnswer(1 + h % 4, 300)
+
+    def stats(self):
+        return {'mode': 'stub'}
+
+
+def install_stub_whitelist(urls, extractor_cls, synthetic=100000):
+    """Whitelist every 10th sample domain plus synthetic filler domains"""
+    domains = {f"site{i}.example{i % 97}.com" for i in range(synthetic)}
+    for url in urls[::10]:
+        domains.add(extractor_cls.normalize_domain(url))
+    extractor_cls.set_whitelist(domains)
+
+
+def time_stage(fn, calls, repeat, setup=None, min_seconds=0.0):
+    """Best seconds per call over runs of fn(), which makes `calls` calls
+
+    Runs at least `repeat` times, and more (up to 20x) until the timed runs
+    add up to `min_seconds`, so a short stage is not judged on a few samples.
+    """
+    samples = []
+    while len(samples) < repeat or (sum(samples) * calls < min_seconds and len(samples) < repeat * 20):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        fn(state)
+        samples.append((time.perf_counter() - start) / calls)
+    return min(samples)
+
+
+def reference_workload(urls):
+    """Interpreter and NumPy work that no change to the scanner affects"""
+    import numpy as np
+
+    total = 0
+    for url in urls:
+        total += sum(ord(c) for c in url[:32]) + len(url.split('/'))
+    matrix = np.arange(len(urls) * 16, dtype=np.float32).reshape(len(urls), 16)
+    np.sort(matrix[::-1] * 0.5, axis=0)
+    return total
+
+
+def run_benchmarks(sample_size, repeat, min_seconds=0.0):
+    import flask_server
+    from feature_extractor import URLFeatureExtractor
+    from model_runtime import feature_matrix
+    from scoring_snapshot import ScoringSnapshot
+
+    urls = load_sample(sample_size)
+    URLFeatureExtractor.set_resolver(StubResolver())
+    install_stub_whitelist(urls, URLFeatureExtractor)
+    # Requests score against the server's snapshot, so the stub whitelist goes into it too
+    current = flask_server.snapshot
+    flask_server.install_snapshot(ScoringSnapshot(current.model, current.cascade, URLFeatureExtractor.WHITELIST_INDEX))
+    n = len(urls)
+    results = {}
+
+    reference = {}  # stage -> reference workload timed right before and after it
+
+    def timed(stage, fn, setup=None):
+        before = time_stage(lambda _: reference_workload(urls), n, repeat)
+        results[stage] = time_stage(fn, n, repeat, setup, min_seconds)
+        reference[stage] = min(before, time_stage(lambda _: reference_workload(urls), n, repeat))
+
+    timed('normalize_domain', lambda _: [URLFeatureExtractor.normalize_domain(url) for url in urls])
+
+    def fresh_extractors():
+        return [URLFeatureExtractor(url) for url in urls]
+
+    timed('is_whitelisted', lambda exts: [ext.is_whitelisted() for ext in exts], fresh_extractors)
+
+    for method in LEXICAL_METHODS:
+        timed(f'lexical.{method}', lambda exts, m=method: [getattr(ext, m)() for ext in exts], fresh_extractors)
+
+    engine = URLFeatureExtractor.LEXICAL_ENGINE
+    timed('lexical.engine_all', lambda exts: [engine.features(ext.url, ext.domain) for ext in exts], fresh_extractors)
+
+    def cold_extractors():
+        URLFeatureExtractor.dns_cache.clear()
+        return fresh_extractors()
+
+    timed('extract_features', lambda exts: [ext.extract_features() for ext in exts], cold_extractors)
+    timed('extract_batch', lambda _: URLFeatureExtractor.extract_batch(urls),
+          lambda: URLFeatureExtractor.dns_cache.clear())
+
+    features = URLFeatureExtractor.extract_batch(urls)
+    model = flask_server.snapshot.model
+    rows = [features[i:i + 1] for i in range(n)]
+    timed('model.single_row', lambda _: [model.predict_proba(row) for row in rows])
+    timed('model.batch', lambda _: model.predict_proba(features))
+    dicts = [ext.extract_features() for ext in fresh_extractors()]
+    timed('model.feature_matrix', lambda _: [feature_matrix([d]) for d in dicts])
+
+    client = flask_server.app.test_client()
+
+    def cold_server():
+        flask_server.verdict_cache.clear()
+        URLFeatureExtractor.dns_cache.clear()
+
+    timed('e2e.check_url', lambda _: [client.post('/check-url', json={'url': url}) for url in urls], cold_server)
+    timed('e2e.check_urls',
+          lambda _: [client.post('/check-urls', json={'urls': urls[i:i + 100]}) for i in range(0, n, 100)],
+          cold_server)
+    results[REFERENCE_STAGE] = min(reference.values())
+
+    return {
+        'sample_size': n,
+        'repeat': repeat,
+        'model_backend': type(model).__name__,
+        'python': sys.version.split()[0],
+        'per_call_us': {stage: seconds * 1e6 for stage, seconds in results.items()},
+        'reference_us': {stage: seconds * 1e6 for stage, seconds in reference.items()}
+    }
+
+
+def reference_scale(current, baseline, stage=None):
+    """How much slower the reference workload timed next to `stage` was in this run
+    than in the baseline's (falling back to the run-wide best); 1.0 without one"""
+    now_us = current.get('reference_us', {}).get(stage) or current['per_call_us'].get(REFERENCE_STAGE)
+    base_us = baseline.get('reference_us', {}).get(stage) or baseline['per_call_us'].get(REFERENCE_STAGE)
+    return now_us / base_us if now_us and base_us else 1.0
+
+
+def compare(current, baseline, tolerance, min_delta_us):
+    """Stages slower than their scaled baseline * (1 + tolerance) and by at least
+    min_delta_us, as (stage, scaled baseline_us, current_us)"""
+    regressions = []
+    for stage, base_us in baseline['per_call_us'].items():
+        now_us = current['per_call_us'].get(stage)
+        if stage == REFERENCE_STAGE or now_us is None:
+            continue
+        expected_us = base_us * reference_scale(current, baseline, stage)
+        if now_us > expected_us * (1 + tolerance) and now_us - expected_us >= min_delta_us:
+            regressions.append((stage, expected_us, now_us))
+    return regressions
+
+
+def confirm(regressions, reruns, baseline, tolerance, min_delta_us):
+    """The regressions that most of the reruns reproduce, as reported by the last one.
+
+    Each rerun is compared on its own rather than merged into a best-of, so
+    more reruns never let a single fast sample pass a regressed stage.
+    """
+    suspects = {stage for stage, _, _ in regressions}
+    reproduced = {}  # stage -> its regressions in the reruns
+    for rerun in reruns:
+        for regression in compare(rerun, baseline, tolerance, min_delta_us):
+            if regression[0] in suspects:
+                reproduced.setdefault(regression[0], []).append(regression)
+    return [found[-1] for found in reproduced.values() if len(found) * 2 > len(reruns)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-stage benchmark suite')
+    parser.add_argument('--sample-size', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='allowed slowdown over baseline before failing (0.3 = 30%%)')
+    parser.add_argument('--min-delta-us', type=float, default=2.0,
+                        help='ignore slowdowns smaller than this many microseconds per call')
+    parser.add_argument('--min-seconds', type=float, default=0.5,
+                        help='repeat each stage until its timed runs add up to this many seconds')
+    parser.add_argument('--confirm-runs', type=int, default=1,
+                        help='rerun the suite this many times when stages look regressed; '
+                             'they fail if most reruns are regressed too')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--output', help='write results JSON here as well as to stdout')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    import logging
+    logging.disable(logging.WARNING)
+    results = run_benchmarks(args.sample_size, args.repeat, args.min_seconds)
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_us) if baseline else []
+    if regressions and args.confirm_runs > 0:
+        # A slow moment of a shared machine is not a regression: only what stays slow fails
+        print(f"⏳ {len(regressions)} stage(s) look regressed, running {args.confirm_runs} more time(s) to confirm",
+              file=sys.stderr)
+        reruns = [run_benchmarks(args.sample_size, args.repeat, args.min_seconds) for _ in range(args.confirm_runs)]
+        regressions = confirm(regressions, reruns, baseline, args.tolerance, args.min_delta_us)
+        results['confirm_runs'] = [{k: rerun[k] for k in ('per_call_us', 'reference_us')} for rerun in reruns]
+    logging.disable(logging.NOTSET)
+    results['regressions'] = [
+        {'stage': stage, 'baseline_us': base_us, 'current_us': now_us}
+        for stage, base_us, now_us in regressions
+    ]
+
+    print(f"{'stage':<36}{'us/call':>12}{'baseline':>12}", file=sys.stderr)
+    for stage, us in results['per_call_us'].items():
+        base = baseline['per_call_us'].get(stage) if baseline else None
+        if base is not None and stage != REFERENCE_STAGE:
+            base *= reference_scale(results, baseline, stage)
+        flag = '  ❌' if any(r[0] == stage for r in regressions) else ''
+        base_text = f"{base:>12.2f}" if base is not None else f"{'-':>12}"
+        print(f"{stage:<36}{us:>12.2f}{base_text}{flag}", file=sys.stderr)
+    if baseline:
+        print(f"Baselines are scaled by the {REFERENCE_STAGE} workload timed next to each stage", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            keys = ('sample_size', 'repeat', 'model_backend', 'python', 'per_call_us', 'reference_us')
+            json.dump({k: results[k] for k in keys}, f, indent=2)
+            f.write('\n')
+        print(f"✅ Baseline written to {args.baseline}", file=sys.stderr)
+    elif regressions:
+        print(f"❌ {len(regressions)} stage(s) regressed more than {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
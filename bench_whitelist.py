@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Memory and lookup benchmark: in-memory whitelist set vs the compact store
+
+Builds a text snapshot and a compact store (compact_whitelist.py) for the
+same synthetic domain list, then loads each in a fresh interpreter and
+reports:
+
+- load time
+- resident memory added by the whitelist, split into anonymous memory
+  (private heap, paid again by every worker) and file-backed pages (the
+  store's mapping, shared through the page cache by every worker)
+- WhitelistIndex.match time per domain for whitelisted domains, trusted
+  subdomains of them, and non-whitelisted corpus domains
+
+Usage:
+    python bench_whitelist.py [--domains 1000000] [--queries 20000]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(ROOT, 'raw_datasets', 'malicious-urls.csv')
+
+
+def memory_kb():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields.get('Rss', 0), fields.get('Anonymous', 0)
+
+
+def time_lookups(index, domains, repeat=3):
+    """Best microseconds per WhitelistIndex.match over `repeat` passes"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for domain in domains:
+            index.match(domain)
+        best = min(best, time.perf_counter() - start)
+    return best / len(domains) * 1e6
+
+
+def probe(kind, directory):
+    """Runs in a fresh interpreter: load one whitelist form and measure it"""
+    import artifacts
+    from compact_whitelist import CompactWhitelist
+    from whitelist_index import WhitelistIndex
+
+    with open(os.path.join(directory, 'queries.json')) as f:
+        queries = json.load(f)
+    rss_before, anon_before = memory_kb()
+    start = time.perf_counter()
+    if kind == 'set':
+        domains, version = artifacts.load_whitelist_snapshot(os.path.join(directory, 'whitelist.snapshot'))
+        index = WhitelistIndex(domains, version)
+    else:
+        store = CompactWhitelist(os.path.join(directory, 'whitelist.wlstore'))
+        index = WhitelistIndex(store, store.version)
+    load_seconds = time.perf_counter() - start
+
+    lookups = {name: time_lookups(index, domains) for name, domains in queries.items()}
+    for name, domains in queries.items():
+        expected = name != 'miss'
+        if any((index.match(domain) is not None) != expected for domain in domains):
+            raise SystemExit(f"❌ {kind}: wrong answer for a {name} query")
+    rss_after, anon_after = memory_kb()
+    return {
+        'load_seconds': load_seconds,
+        'rss_mb': (rss_after - rss_before) / 1024.0,
+        'anonymous_mb': (anon_after - anon_before) / 1024.0,
+        'file_backed_mb': ((rss_after - anon_after) - (rss_before - anon_before)) / 1024.0,
+        'lookup_us': lookups
+    }
+
+
+def corpus_domains(count):
+    from feature_extractor import URLFeatureExtractor
+
+    csv.field_size_limit(sys.maxsize)
+    domains = []
+    with open(CORPUS, newline='', encoding='utf-8', errors='replace') as f:
+        for row in csv.DictReader(f):
+            try:
+                domains.append(URLFeatureExtractor.normalize_domain(row['url']))
+            except Exception:
+                continue
+            if len(domains) == count:
+                break
+    return domains
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Whitelist set vs compact store benchmark')
+    parser.add_argument('--domains', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--output', help='also write the JSON results here')
+    parser.add_argument('--probe', choices=['set', 'store'], help=argparse.SUPPRESS)
+    parser.add_argument('--dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.dir)))
+        return
+
+    import artifacts
+    from compact_whitelist import build_store
+
+    with tempfile.TemporaryDirectory(prefix='bench_whitelist_') as directory:
+        domains = [f"site{i}.example{i % 97}.com" for i in range(args.domains)]
+        rng = random.Random(0)
+        hits = rng.sample(domains, min(args.queries, len(domains)))
+        whitelisted = set(domains)
+        queries = {
+            'hit': hits,
+            'trusted_subdomain': ['www.' + domain for domain in hits],
+            'miss': [domain for domain in corpus_domains(args.queries) if domain not in whitelisted]
+        }
+        with open(os.path.join(directory, 'queries.json'), 'w') as f:
+            json.dump(queries, f)
+
+        start = time.perf_counter()
+        artifacts.save_whitelist_snapshot(domains, os.path.join(directory, 'whitelist.snapshot'))
+        snapshot_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        build_store(domains, os.path.join(directory, 'whitelist.wlstore'))
+        store_seconds = time.perf_counter() - start
+
+        results = {'domains': args.domains, 'queries': {name: len(q) for name, q in queries.items()}}
+        for kind, artifact, build_seconds in (('set', 'whitelist.snapshot', snapshot_seconds),
+                                              ('store', 'whitelist.wlstore', store_seconds)):
+            proc = subprocess.run([sys.executable, __file__, '--probe', kind, '--dir', directory],
+                                  cwd=ROOT, capture_output=True, text=True, check=True)
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result['build_seconds'] = build_seconds
+            result['file_mb'] = os.path.getsize(os.path.join(directory, artifact)) / 1e6
+            results[kind] = result
+
+    print(f"{'':<8}{'file MB':>9}{'load s':>8}{'RSS MB':>9}{'anon MB':>9}{'mapped MB':>11}"
+          f"{'hit us':>8}{'sub us':>8}{'miss us':>9}", file=sys.stderr)
+    for kind in ('set', 'store'):
+        r = results[kind]
+        print(f"{kind:<8}{r['file_mb']:>9.1f}{r['load_seconds']:>8.2f}{r['rss_mb']:>9.1f}{r['anonymous_mb']:>9.1f}"
+              f"{r['file_backed_mb']:>11.1f}{r['lookup_us']['hit']:>8.2f}"
+              f"{r['lookup_us']['trusted_subdomain']:>8.2f}{r['lookup_us']['miss']:>9.2f}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
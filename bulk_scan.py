@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Bulk-scan a URL corpus (CSV or JSONL) and write one JSONL verdict per row
+
+Rows stream through normalize -> whitelist -> features -> predict in chunks
+on a process pool, with a bounded number of chunks in flight, so memory
+stays flat regardless of corpus size. Output is written in input order, and
+a scan can resume where a previous run stopped.
+
+Usage:
+    python bulk_scan.py raw_datasets/malicious-urls.csv -o scan.jsonl
+    python bulk_scan.py mail-log.jsonl -o scan.jsonl --resume
+
+Record DNS once, then rescore offline at CPU speed with identical features:
+    python bulk_scan.py corpus.csv -o scan.jsonl --dns-mode record --dns-snapshot corpus.dns
+    python bulk_scan.py corpus.csv -o rescan.jsonl --dns-mode replay --dns-snapshot corpus.dns
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import artifacts
+from dns_resolvers import make_resolver, RESOLVER_MODES
+from feature_extractor import URLFeatureExtractor
+from model_runtime import load_model, invalid_rows
+
+# Set once per worker process by init_worker
+_model = None
+
+
+def parse_jsonl(line):
+    """One JSONL record; a malformed line or a non-object becomes an empty record (scored as an error)"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return {}
+    return record if isinstance(record, dict) else {}
+
+
+def read_rows(path, column='url', label_column='label', start_row=0):
+    """Yield (row, url, label) from a CSV with a header row, or from JSONL objects"""
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        if path.endswith(('.jsonl', '.json')):
+            records = (parse_jsonl(line) for line in f if line.strip())
+        else:
+            csv.field_size_limit(sys.maxsize)
+            records = csv.DictReader(f)
+        for row, record in enumerate(records):
+            if row < start_row:
+                continue
+            yield row, record.get(column), record.get(label_column)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def init_worker(model_path, whitelist_path, model_backend, dns_mode='live', dns_snapshot=None):
+    global _model
+    artifacts.load_whitelist(whitelist_path)
+    _model = load_model(model_path, backend=model_backend)
+    if dns_mode != 'live':
+        URLFeatureExtractor.set_resolver(make_resolver(dns_mode, dns_snapshot, URLFeatureExtractor.DNS_LIFETIME))
+
+
+def verdict(row, url, label, status, confidence=0.0, threshold=0.4):
+    record = {
+        'row': row,
+        'url': url,
+        'status': status,
+        'confidence': confidence,
+        'is_malicious': status == 'success' and confidence >= threshold
+    }
+    if label is not None:
+        record['label'] = label
+    return record
+
+
+def score_chunk(chunk, threshold):
+    """Score one chunk of (row, url, label) in a worker process"""
+    records = [None] * len(chunk)
+    pending = []
+    for i, (row, url, label) in enumerate(chunk):
+        if not isinstance(url, str):
+            records[i] = verdict(row, url, label, 'error')
+            continue
+        try:
+            extractor = URLFeatureExtractor(url)  # normalize
+        except Exception:
+            records[i] = verdict(row, url, label, 'error')
+            continue
+        if extractor.is_whitelisted():
+            records[i] = verdict(row, url, label, 'whitelisted')
+        else:
+            pending.append(i)
+
+    if pending:
+        score_pending(chunk, pending, records, threshold)
+    return records
+
+
+def score_pending(chunk, pending, records, threshold):
+    """Score the non-whitelisted rows in one batch; a failed batch is retried row by row"""
+    try:
+        features = URLFeatureExtractor.extract_batch([chunk[i][1] for i in pending])
+        invalid = invalid_rows(features)
+        probas = _model.predict_proba(features)
+    except Exception:
+        if len(pending) > 1:
+            # One bad row must not fail the rest of the chunk
+            for i in pending:
+                score_pending(chunk, [i], records, threshold)
+        else:
+            row, url, label = chunk[pending[0]]
+            records[pending[0]] = verdict(row, url, label, 'error')
+        return
+    for i, proba, bad in zip(pending, probas, invalid):
+        row, url, label = chunk[i]
+        if bad:
+            records[i] = verdict(row, url, label, 'error')
+        else:
+            records[i] = verdict(row, url, label, 'success', float(proba), threshold)
+
+
+def resume_offset(output_path):
+    """Row to restart from: one past the last row written to the output"""
+    if not os.path.exists(output_path):
+        return 0
+    last = None
+    with open(output_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                last = line
+    if last is None:
+        return 0
+    try:
+        return json.loads(last)['row'] + 1
+    except ValueError:
+        raise SystemExit(f"Cannot resume: last line of {output_path} is incomplete, truncate it first")
+
+
+def scan(rows, output, workers, chunk_size, threshold, init_args, report_every=1.0):
+    """Score rows on a process pool and write JSONL in input order; returns rows written"""
+    written = 0
+    started = last_report = time.perf_counter()
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=init_args) as pool:
+        in_flight = []
+        chunks = chunked(rows, chunk_size)
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    in_flight.append(pool.submit(score_chunk, chunk, threshold))
+            if not in_flight:
+                break
+            records = in_flight.pop(0).result()
+            for record in records:
+                output.write(json.dumps(record) + '\n')
+            written += len(records)
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                output.flush()
+                print(f"\r{written:,} rows  {written / (now - started):,.0f} rows/s",
+                      end='', file=sys.stderr, flush=True)
+                last_report = now
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-scan URLs from a CSV or JSONL corpus')
+    parser.add_argument('input', help='CSV with a header row, or JSONL with one object per line')
+    parser.add_argument('-o', '--output', required=True, help='JSONL file for verdicts')
+    parser.add_argument('--column', default='url', help='URL column / field (default: url)')
+    parser.add_argument('--label-column', default='label', help='copied to the output when present')
+    parser.add_argument('--threshold', type=float, default=0.4)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--start-row', type=int, default=0, help='skip rows before this offset')
+    parser.add_argument('--resume', action='store_true', help='continue after the last row in --output')
+    parser.add_argument('--model', default='url_xgb_model.json')
+    parser.add_argument('--model-backend', default='auto', choices=['auto', 'compiled', 'xgboost'])
+    parser.add_argument('--whitelist', default=os.environ.get('URL_SCANNER_WHITELIST', 'raw_datasets/benign-urls.csv'))
+    parser.add_argument('--dns-mode', default='live', choices=RESOLVER_MODES,
+                        help='record appends DNS answers to --dns-snapshot; replay answers only from it')
+    parser.add_argument('--dns-snapshot', help='DNS snapshot file for record/replay')
+    args = parser.parse_args()
+    if args.dns_mode != 'live' and not args.dns_snapshot:
+        parser.error('--dns-mode record/replay needs --dns-snapshot')
+    if args.dns_mode == 'record' and args.dns_snapshot.endswith('.gz') and args.workers > 1:
+        parser.error('record to a plain (not .gz) snapshot when using several workers')
+
+    start_row = resume_offset(args.output) if args.resume else args.start_row
+    mode = 'a' if args.resume else 'w'
+    rows = read_rows(args.input, args.column, args.label_column, start_row)
+
+    started = time.perf_counter()
+    with open(args.output, mode, encoding='utf-8') as output:
+        scan(rows, output, args.workers, args.chunk_size, args.threshold,
+             (args.model, args.whitelist, args.model_backend, args.dns_mode, args.dns_snapshot))
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Scan finished from row {start_row:,} in {elapsed:.1f}s -> {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
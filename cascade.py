@@ -0,0 +1,62 @@
+import os
+import logging
+import numpy as np
+from feature_extractor import FEATURE_ORDER
+from model_runtime import load_model
+
+logger = logging.getLogger(__name__)
+
+# Features the lexical-only model sees: everything except the DNS lookups
+DNS_FEATURES = ('has_a', 'has_mx', 'has_ns', 'ip_count')
+LEXICAL_FEATURES = [name for name in FEATURE_ORDER if name not in DNS_FEATURES]
+LEXICAL_COLUMNS = np.array([FEATURE_ORDER.index(name) for name in LEXICAL_FEATURES], dtype=np.intp)
+
+DEFAULT_LEXICAL_MODEL = 'url_xgb_lexical_model.json'
+DEFAULT_BAND = (0.1, 0.9)
+
+
+def parse_band(text):
+    """'low,high' -> (low, high) with 0 <= low <= high <= 1"""
+    low, high = (float(part) for part in text.split(','))
+    if not 0.0 <= low <= high <= 1.0:
+        raise ValueError(f"Uncertainty band must satisfy 0 <= low <= high <= 1, got {text!r}")
+    return low, high
+
+
+class Cascade:
+    """Lexical-only first stage in front of the full (DNS) model.
+
+    A URL whose lexical probability falls outside the uncertainty band
+    [low, high] is decided by the lexical model alone; only URLs inside the
+    band need DNS lookups and the full model.
+    """
+
+    def __init__(self, lexical_model, low=DEFAULT_BAND[0], high=DEFAULT_BAND[1]):
+        self.model = lexical_model
+        self.low = low
+        self.high = high
+        self.version = getattr(lexical_model, 'version', None)
+
+    @classmethod
+    def load(cls, path=DEFAULT_LEXICAL_MODEL, band=DEFAULT_BAND, backend='auto'):
+        """Load the lexical model, or return None when it has not been trained"""
+        if not os.path.exists(path):
+            return None
+        return cls(load_model(path, backend=backend), *band)
+
+    def lexical_proba(self, matrix):
+        """Lexical-model probabilities for rows of a FEATURE_ORDER matrix"""
+        return self.model.predict_proba(np.ascontiguousarray(matrix[:, LEXICAL_COLUMNS]))
+
+    def lexical_row(self, features):
+        """One-row FEATURE_ORDER matrix from a dict holding at least LEXICAL_FEATURES"""
+        row = np.zeros((1, len(FEATURE_ORDER)), dtype=np.float32)
+        row[0, LEXICAL_COLUMNS] = [features[name] for name in LEXICAL_FEATURES]
+        return row
+
+    def decided(self, proba):
+        """True where the lexical probability is confident enough to skip DNS"""
+        return (proba < self.low) | (proba > self.high)
+
+    def describe(self):
+        return {'lexical_model': self.version, 'band': [self.low, self.high]}
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Report DNS lookups skipped by the cascade and its effect on verdicts
+
+Scores a labelled URL corpus once with the full model (lexical + DNS
+features) and once with the lexical-only model. It then reports, for each
+uncertainty band:
+- the URLs and distinct domains that would have skipped DNS
+- how often the cascade verdict agrees with the full model
+- the recall of both on each class present, and their accuracy when both are
+
+raw_datasets/malicious-urls.csv holds malicious URLs only, so on its own it
+measures malicious-class recall; add a benign corpus with --benign for the
+false-positive side and an accuracy figure. It must not be the whitelist,
+whose URLs never reach the cascade.
+
+Use a recorded DNS snapshot (see dns_resolvers.py) so repeated runs see
+the same answers without network access.
+
+Usage:
+    python cascade_report.py --dns-mode replay --dns-snapshot corpus.dns --benign benign-sample.csv
+    python cascade_report.py --bands 0.05,0.95 0.1,0.9 0.2,0.8 --limit 20000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+import artifacts
+from cascade import Cascade, parse_band, DEFAULT_LEXICAL_MODEL
+from dns_resolvers import make_resolver, RESOLVER_MODES
+from feature_extractor import URLFeatureExtractor
+from model_runtime import load_model, invalid_rows
+
+
+def read_labelled(path, column='url', label_column='label', limit=None):
+    csv.field_size_limit(sys.maxsize)
+    urls, labels = [], []
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        for row in csv.DictReader(f):
+            if row.get(column):
+                urls.append(row[column])
+                labels.append(int(row.get(label_column) or 0))
+                if limit and len(urls) == limit:
+                    break
+    return urls, np.array(labels)
+
+
+def class_scores(verdict, labels, scored):
+    """Recall on each class among the scored rows, and accuracy when both
+    classes are there; None for a class with no scored rows"""
+    def correct_pct(rows):
+        return 100.0 * (verdict == labels)[rows].mean() if rows.any() else None
+
+    malicious, benign = scored & (labels == 1), scored & (labels == 0)
+    return {
+        'malicious_recall_pct': correct_pct(malicious),
+        'benign_recall_pct': correct_pct(benign),
+        'accuracy_pct': correct_pct(scored) if malicious.any() and benign.any() else None
+    }
+
+
+def band_report(band, lexical_proba, full_proba, labels, domains, needs_model, threshold):
+    """Skipped lookups and verdict quality for one uncertainty band"""
+    low, high = band
+    decided = needs_model & ((lexical_proba < low) | (lexical_proba > high))
+    cascade_proba = np.where(decided, lexical_proba, full_proba)
+
+    # A domain's lookup is skipped only if none of its URLs reached the DNS stage
+    looked_up = {domain for domain, needed, done in zip(domains, needs_model, decided) if needed and not done}
+    model_domains = {domain for domain, needed in zip(domains, needs_model) if needed}
+
+    full_verdict = full_proba >= threshold
+    cascade_verdict = cascade_proba >= threshold
+    scored = needs_model.sum()
+    return {
+        'band': [low, high],
+        'urls_scored': int(scored),
+        'urls_skipping_dns': int(decided.sum()),
+        'urls_skipping_dns_pct': 100.0 * decided.sum() / scored if scored else 0.0,
+        'domains': len(model_domains),
+        'domain_lookups_skipped': len(model_domains) - len(looked_up),
+        'domain_lookups_skipped_pct': 100.0 * (len(model_domains) - len(looked_up)) / len(model_domains)
+        if model_domains else 0.0,
+        'agreement_with_full_model_pct': 100.0 * (full_verdict == cascade_verdict)[needs_model].mean()
+        if scored else 0.0,
+        'changed_verdicts': int((full_verdict != cascade_verdict)[needs_model].sum()),
+        'full_model': class_scores(full_verdict, labels, needs_model),
+        'cascade': class_scores(cascade_verdict, labels, needs_model)
+    }
+
+
+def percent(value, width):
+    return f"{value:>{width - 1}.2f}%" if value is not None else f"{'-':>{width}}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cascade skipped-lookup and accuracy report')
+    parser.add_argument('--data', default='raw_datasets/malicious-urls.csv')
+    parser.add_argument('--benign', help='CSV of benign URLs (url column), all labelled 0')
+    parser.add_argument('--limit', type=int, help='only the first N rows')
+    parser.add_argument('--model', default='url_xgb_model.json')
+    parser.add_argument('--lexical-model', default=DEFAULT_LEXICAL_MODEL)
+    parser.add_argument('--bands', nargs='+', default=['0.05,0.95', '0.1,0.9', '0.2,0.8', '0.3,0.7'])
+    parser.add_argument('--threshold', type=float, default=0.4)
+    parser.add_argument('--whitelist', default=os.environ.get('URL_SCANNER_WHITELIST', 'raw_datasets/benign-urls.csv'))
+    parser.add_argument('--dns-mode', default='live', choices=RESOLVER_MODES)
+    parser.add_argument('--dns-snapshot')
+    parser.add_argument('--output', help='also write the JSON report here')
+    args = parser.parse_args()
+    if args.benign and os.path.realpath(args.benign) == os.path.realpath(args.whitelist):
+        parser.error('--benign is the whitelist; none of its URLs would reach the cascade')
+
+    cascade = Cascade.load(args.lexical_model)
+    if cascade is None:
+        raise SystemExit(f"❌ Lexical model {args.lexical_model} not found, train it with train_lexical_model.py")
+    model = load_model(args.model)
+    if args.dns_mode != 'live':
+        URLFeatureExtractor.set_resolver(make_resolver(args.dns_mode, args.dns_snapshot))
+    artifacts.load_whitelist(args.whitelist)
+
+    urls, labels = read_labelled(args.data, limit=args.limit)
+    if args.benign:
+        benign, _ = read_labelled(args.benign, limit=args.limit)
+        urls += benign
+        labels = np.concatenate([labels, np.zeros(len(benign), dtype=labels.dtype)])
+    print(f"📊 Scoring {len(urls):,} URLs ({int(labels.sum()):,} malicious, {int((labels == 0).sum()):,} benign)",
+          file=sys.stderr)
+    if labels.all() or not labels.any():
+        print("⚠️  Only one class is labelled: the report gives that class's recall, not accuracy", file=sys.stderr)
+    domains = [URLFeatureExtractor.normalize_domain(url) for url in urls]
+    whitelisted = np.array([URLFeatureExtractor(url).is_whitelisted() for url in urls], dtype=bool)
+
+    features = URLFeatureExtractor.extract_batch(urls)
+    needs_model = ~whitelisted & ~invalid_rows(features)
+    full_proba = model.predict_proba(features)
+    lexical_proba = cascade.lexical_proba(features)
+
+    report = {
+        'data': args.data,
+        'benign': args.benign,
+        'malicious_urls': int(labels.sum()),
+        'benign_urls': int((labels == 0).sum()),
+        'urls': len(urls),
+        'whitelisted': int(whitelisted.sum()),
+        'threshold': args.threshold,
+        'dns_mode': args.dns_mode,
+        'lexical_model': cascade.version,
+        'bands': [band_report(parse_band(band), lexical_proba, full_proba, labels, domains,
+                              needs_model, args.threshold) for band in args.bands]
+    }
+
+    # Recall per class (mal/ben) and accuracy, for the full model and the cascade
+    print(f"{'band':<12}{'DNS skipped':>14}{'domains skipped':>17}{'agreement':>11}"
+          f"{'full mal':>10}{'casc mal':>10}{'full ben':>10}{'casc ben':>10}{'full acc':>10}{'casc acc':>10}",
+          file=sys.stderr)
+    for row in report['bands']:
+        band = f"{row['band'][0]:g}-{row['band'][1]:g}"
+        full, cascaded = row['full_model'], row['cascade']
+        print(f"{band:<12}{row['urls_skipping_dns_pct']:>13.1f}%"
+              f"{row['domain_lookups_skipped_pct']:>16.1f}%{row['agreement_with_full_model_pct']:>10.2f}%"
+              + ''.join(percent(scores[key], 10)
+                        for key in ('malicious_recall_pct', 'benign_recall_pct', 'accuracy_pct')
+                        for scores in (full, cascaded)), file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
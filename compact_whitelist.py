@@ -0,0 +1,171 @@
+import os
+import mmap
+import math
+import struct
+import hashlib
+import logging
+import zlib
+from bisect import bisect_right
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORE_MAGIC = b'URLWLS1\0'
+# magic, version, source stamp, domain count, bloom words, fence stride, blob bytes
+HEADER = struct.Struct('<8s16s48sQQQQ')
+# Blocked Bloom filter: the 5 bits of a domain all fall in one 64-bit word, so a
+# check reads one word; 12 bits per domain give about 1% false positives
+BLOOM_BITS_PER_DOMAIN = 12
+# Domains per block of the blob; the first domain of every block is kept in memory
+FENCE_STRIDE = 64
+
+
+def _encode(domain):
+    return domain.encode('utf-8', 'surrogatepass')
+
+
+def _bloom_mask(key):
+    """The 5 bits a domain sets in its Bloom word, from a hash independent of the word choice"""
+    h = zlib.crc32(key[::-1])
+    return (1 << (h & 63)) | (1 << ((h >> 6) & 63)) | (1 << ((h >> 12) & 63)) | \
+        (1 << ((h >> 18) & 63)) | (1 << ((h >> 24) & 63))
+
+
+def _align(offset, alignment=8):
+    return -offset % alignment
+
+
+def build_store(domains, path, source_stamp='-', bloom_bits_per_domain=BLOOM_BITS_PER_DOMAIN):
+    """
+    Write normalized domains as a compact store; returns the whitelist version
+
+    The version is the same hash WhitelistIndex.version and the text snapshot
+    use (sha256 of the sorted, newline-joined domains), so every whitelist
+    form of one domain set shares a version.
+    """
+    keys = sorted(_encode(domain) for domain in domains)
+    count = len(keys)
+    version = hashlib.sha256(b'\n'.join(keys)).hexdigest()[:12]
+
+    words = max(1, math.ceil(count * bloom_bits_per_domain / 64))
+    bloom = np.zeros(words, dtype='<u8')
+    if count:
+        positions = np.fromiter((zlib.crc32(key) % words for key in keys), dtype=np.int64, count=count)
+        masks = np.fromiter(map(_bloom_mask, keys), dtype=np.uint64, count=count)
+        np.bitwise_or.at(bloom, positions, masks)
+    bloom_bytes = bloom.tobytes()
+
+    # '\n' + domains joined by '\n' + '\n': every domain sits between two separators
+    if any(b'\n' in key for key in keys):
+        raise ValueError("Whitelist domains must not contain newlines")
+    blob = b'\n' + b'\n'.join(keys) + b'\n' if keys else b'\n'
+    # Offset of the separator in front of the first domain of each block, then the final one
+    lengths = np.fromiter(map(len, keys), dtype=np.uint64, count=count) + np.uint64(1)
+    starts = np.zeros(count + 1, dtype=np.uint64)
+    np.cumsum(lengths, out=starts[1:])
+    fence = np.append(starts[:-1][::FENCE_STRIDE], np.uint64(len(blob) - 1)).astype('<u8')
+
+    header = HEADER.pack(STORE_MAGIC, version.encode('ascii'), source_stamp.encode('ascii'),
+                         count, words, FENCE_STRIDE, len(blob))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for section in (header, bloom_bytes, fence.tobytes()):
+            f.write(section)
+            f.write(b'\0' * _align(len(section)))
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return version
+
+
+class CompactWhitelist:
+    """Read-only, memory-mapped whitelist domain set.
+
+    The file holds a Bloom filter, then the sorted domains as one
+    newline-separated UTF-8 blob cut into blocks of FENCE_STRIDE domains,
+    with the offset of each block. Membership checks the Bloom filter first,
+    so most misses never touch the domain data. A possible hit bisects an
+    in-memory list of each block's first domain, then searches that one
+    block of the mapped blob. Pages load on demand and are shared through
+    the page cache by every process mapping the file, so the whitelist costs
+    each worker little private memory. Supports ``in``, ``len`` and
+    iteration, which is all WhitelistIndex needs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, stamp, count, words, stride, blob_bytes = HEADER.unpack_from(self._map)
+        if magic != STORE_MAGIC:
+            raise ValueError(f"{path} is not a whitelist store")
+        self.version = version.rstrip(b'\0').decode('ascii')
+        self.source_stamp = stamp.rstrip(b'\0').decode('ascii')
+        self.count = count
+        self.bloom_words = words
+
+        view = memoryview(self._map)
+        start = HEADER.size + _align(HEADER.size)
+        bloom_size = words * 8
+        self._bloom = view[start:start + bloom_size].cast('Q')
+        start += bloom_size + _align(bloom_size)
+        blocks = -(-count // stride)
+        fence_size = (blocks + 1) * 8
+        self._blob_start = start + fence_size + _align(fence_size)
+        if self._blob_start + blob_bytes > len(self._map):
+            raise ValueError(f"Whitelist store {path} is truncated")
+        # Absolute file offsets of each block's leading separator, and the first domain of each block
+        self._blocks = [self._blob_start + offset for offset in view[start:start + fence_size].cast('Q')]
+        self._fence = [self._map[offset + 1:self._map.find(b'\n', offset + 1)] for offset in self._blocks[:-1]]
+
+        self.lookups = 0
+        self.bloom_rejections = 0
+        self.false_positives = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, domain):
+        self.lookups += 1
+        key = _encode(domain)
+        mask = _bloom_mask(key)
+        if self._bloom[zlib.crc32(key) % self.bloom_words] & mask != mask:
+            self.bloom_rejections += 1
+            return False
+
+        block = bisect_right(self._fence, key) - 1
+        if block < 0 or self._map.find(b'\n' + key + b'\n', self._blocks[block], self._blocks[block + 1] + 1) < 0:
+            self.false_positives += 1
+            return False
+        return True
+
+    def __iter__(self):
+        for start, end in zip(self._blocks, self._blocks[1:]):
+            for key in self._map[start + 1:end].split(b'\n'):
+                yield key.decode('utf-8', 'surrogatepass')
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'domains': self.count,
+            'file_bytes': len(self._map),
+            'bloom_bytes': self.bloom_words * 8,
+            'lookups': self.lookups,
+            'bloom_rejections': self.bloom_rejections,
+            'false_positives': self.false_positives
+        }
+
+
+def open_store(path, source_stamp=None):
+    """Map a store, or return None if it is missing, malformed or built from another source"""
+    if not os.path.exists(path):
+        return None
+    try:
+        store = CompactWhitelist(path)
+    except (ValueError, struct.error, OSError) as e:
+        logger.warning(f"Ignoring whitelist store {path}: {e}")
+        return None
+    if source_stamp is not None and store.source_stamp != source_stamp:
+        logger.warning(f"Whitelist store {path} is stale, rebuild with --build-artifacts")
+        return None
+    return store
@@ -0,0 +1,4 @@
+import os
+
+# Tests import flask_server in-process: no file watcher thread polling the model files
+os.environ.setdefault('URL_SCANNER_RELOAD_INTERVAL', '0')
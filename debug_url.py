@@ -1,24 +1,19 @@
 #!/usr/bin/env python3
 
-import pandas as pd
-import xgboost as xgb
-from feature_extractor import URLFeatureExtractor
+from feature_extractor import URLFeatureExtractor, FEATURE_ORDER
+from model_runtime import URLModel, feature_matrix, invalid_rows
 import traceback
+import logging
+
+# Show every whitelist decision while debugging
+logging.basicConfig(level=logging.DEBUG, format='%(message)s')
 
 # Load model
-model = xgb.XGBClassifier()
-model.load_model("url_xgb_model.json")
+model = URLModel("url_xgb_model.json")
 
 # Load whitelist
 URLFeatureExtractor.load_whitelist("raw_datasets/benign-urls.csv")
 
-# Feature order
-FEATURE_ORDER = [
-    'url_len', 'dot_count', 'hyphen_count', 'has_ip',
-    'suspicious_total', 'subdomain_count', 'tld_length',
-    'url_entropy', 'has_a', 'has_mx', 'has_ns', 'ip_count'
-]
-
 def debug_url(url):
     print(f"\n🔍 Debugging URL: {url}")
     
@@ -50,21 +45,22 @@ def debug_url(url):
         for key, value in feat_dict.items():
             print(f"      {key}: {value}")
         
-        # Step 4: Create DataFrame
-        print("  Step 4: Creating DataFrame...")
-        df = pd.DataFrame([[feat_dict[f] for f in FEATURE_ORDER]], columns=FEATURE_ORDER)
-        print(f"    DataFrame shape: {df.shape}")
-        print(f"    Has NaN values: {df.isnull().any().any()}")
+        # Step 4: Build feature row
+        print("  Step 4: Building feature row...")
+        features = feature_matrix([feat_dict])
+        has_nan = invalid_rows(features)[0]
+        print(f"    Feature matrix shape: {features.shape}")
+        print(f"    Has NaN values: {has_nan}")
         
-        if df.isnull().any().any():
+        if has_nan:
             print("    NaN values found:")
-            for col in df.columns:
-                if df[col].isnull().any():
+            for col, value in zip(FEATURE_ORDER, features[0]):
+                if value != value:
                     print(f"      {col}: NaN")
         
         # Step 5: Make prediction
         print("  Step 5: Making prediction...")
-        proba = model.predict_proba(df)[0][1]
+        proba = model.predict_proba(features)[0]
         print(f"    Probability: {proba}")
         print(f"    Is malicious (>0.4): {proba >= 0.4}")
         
@@ -0,0 +1,142 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DecisionLog:
+    """Non-blocking JSONL log of scoring decisions with size-based rotation.
+
+    ``record`` only appends to an in-memory queue; a background thread
+    serializes entries and writes them every ``flush_interval`` seconds.
+    The request path never waits on the disk: once the queue is half full
+    only every ``sample_every``-th entry is kept (tagged with its sampling
+    weight), and entries arriving at a full queue are dropped. Both are
+    counted in ``stats()``. Files rotate at ``max_bytes`` into
+    ``path.1 .. path.<backup_count>``.
+    """
+
+    def __init__(self, path, feature_names, max_queue=10000, sample_every=10,
+                 max_bytes=50 * 1024 * 1024, backup_count=5, flush_interval=0.5):
+        self.path = path
+        self.feature_names = list(feature_names)
+        self.max_queue = max_queue
+        self.high_water = max_queue // 2
+        self.sample_every = sample_every
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self._queue = deque()
+        self._seen_busy = 0
+        self._closed = threading.Event()
+        self.recorded = 0
+        self.written = 0
+        self.sampled_out = 0
+        self.dropped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='decision-log', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, url, status, probability=None, features=None, latency=None,
+               model_version=None, whitelist_version=None, **extra):
+        """Queue one decision; never blocks. `features` may be a dict or a FEATURE_ORDER row."""
+        queued = len(self._queue)
+        weight = 1
+        if queued >= self.high_water:
+            if queued >= self.max_queue:
+                self.dropped += 1
+                return
+            self._seen_busy += 1
+            if self._seen_busy % self.sample_every:
+                self.sampled_out += 1
+                return
+            weight = self.sample_every
+        self.recorded += 1
+        self._queue.append((time.time(), url, status, probability, features, latency,
+                            model_version, whitelist_version, weight, extra))
+
+    def _encode(self, entry):
+        ts, url, status, probability, features, latency, model_version, whitelist_version, weight, extra = entry
+        if isinstance(features, np.ndarray):
+            features = dict(zip(self.feature_names, features.tolist()))
+        elif isinstance(features, dict):
+            features = {name: features[name] for name in self.feature_names if name in features}
+        record = {
+            'ts': round(ts, 6),
+            'url': url if isinstance(url, str) else repr(url),
+            'status': status,
+            'probability': probability,
+            'latency_ms': round(latency * 1000.0, 3) if latency is not None else None,
+            'model_version': model_version,
+            'whitelist_version': whitelist_version,
+            'features': features
+        }
+        if weight != 1:
+            record['sample_weight'] = weight
+        record.update(extra)
+        return json.dumps(record, default=float) + '\n'
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        lines = []
+        while self._queue:
+            try:
+                lines.append(self._encode(self._queue.popleft()))
+            except Exception as e:
+                logger.error(f"Dropping unserializable decision: {e}")
+        if not lines or self._file.closed:
+            return
+        try:
+            self._file.write(''.join(lines))
+            self._file.flush()
+            self.written += len(lines)
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            logger.error(f"Decision log write failed: {e}")
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        """Write whatever is queued and stop the writer thread"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join(timeout=5)
+        self._file.close()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'queued': len(self._queue),
+            'recorded': self.recorded,
+            'written': self.written,
+            'sampled_out': self.sampled_out,
+            'dropped': self.dropped
+        }
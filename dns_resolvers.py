@@ -0,0 +1,170 @@
+"""
+Pluggable DNS resolvers for URLFeatureExtractor
+
+- LiveResolver:      queries DNS with dnspython (the default)
+- RecordingResolver: queries through another resolver and appends every
+                     A/MX/NS outcome to a snapshot file
+- ReplayResolver:    answers only from a snapshot held in memory, with no
+                     network access and no event loop
+
+Snapshot files are tab-separated, one line per (domain, record type):
+
+    domain<TAB>rdtype<TAB>answer_count<TAB>ttl
+
+with an answer count of -1 for lookups that failed. Later lines override
+earlier ones, so a snapshot can be extended by recording into it again.
+Paths ending in .gz are gzip-compressed; record to a plain file when
+several worker processes share one snapshot.
+"""
+import atexit
+import gzip
+import os
+import threading
+
+from metrics import DNS_TIMEOUTS
+
+RESOLVER_MODES = ('live', 'record', 'replay')
+
+
+class RecordedAnswer:
+    """The parts of a dnspython Answer the extractor uses: len() and rrset.ttl"""
+    __slots__ = ('count', 'rrset')
+
+    class _RRset:
+        __slots__ = ('ttl',)
+
+        def __init__(self, ttl):
+            self.ttl = ttl
+
+    def __init__(self, count, ttl):
+        self.count = count
+        self.rrset = self._RRset(ttl)
+
+    def __len__(self):
+        return self.count
+
+
+class LiveResolver:
+    """Resolve with dnspython's async resolver; failures return None"""
+    offline = False
+
+    def __init__(self, lifetime=1):
+        self.lifetime = lifetime
+
+    async def query(self, domain, rdtype):
+        # Imported on first lookup to keep worker start-up light
+        import dns.asyncresolver
+        import dns.exception
+
+        try:
+            return await dns.asyncresolver.resolve(domain, rdtype, lifetime=self.lifetime)
+        except dns.exception.Timeout:
+            DNS_TIMEOUTS.inc(rdtype)
+            return None
+        except dns.exception.DNSException:
+            return None
+
+    def stats(self):
+        return {'mode': 'live', 'lifetime': self.lifetime}
+
+
+class RecordingResolver:
+    """Resolve through `inner` and append each outcome to a snapshot file"""
+    offline = False
+
+    def __init__(self, path, inner=None):
+        self.path = path
+        self.inner = inner or LiveResolver()
+        self.recorded = 0
+        self._lock = threading.Lock()
+        # Each record is one append-mode write, so worker processes can share a file
+        if path.endswith('.gz'):
+            self._file = gzip.open(path, 'at', encoding='utf-8')
+        else:
+            self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        atexit.register(self.close)
+
+    async def query(self, domain, rdtype):
+        answer = await self.inner.query(domain, rdtype)
+        self.record(domain, rdtype, answer)
+        return answer
+
+    def record(self, domain, rdtype, answer):
+        if answer is None:
+            count, ttl = -1, 0
+        else:
+            count = len(answer)
+            ttl = answer.rrset.ttl if answer.rrset is not None else 0
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(f"{domain}\t{rdtype}\t{count}\t{ttl}\n")
+                self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def stats(self):
+        return {'mode': 'record', 'path': self.path, 'recorded': self.recorded}
+
+
+class ReplayResolver:
+    """Answer from a snapshot in memory; domains not in the snapshot resolve to nothing"""
+    offline = True
+
+    def __init__(self, path):
+        self.path = path
+        self.answers = load_snapshot(path)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, domain, rdtype):
+        key = (domain, rdtype)
+        if key not in self.answers:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.answers[key]
+
+    async def query(self, domain, rdtype):
+        return self.lookup(domain, rdtype)
+
+    def stats(self):
+        return {
+            'mode': 'replay',
+            'path': self.path,
+            'records': len(self.answers),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+def load_snapshot(path):
+    """Read a snapshot into {(domain, rdtype): RecordedAnswer or None}"""
+    answers = {}
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) != 4:
+                continue  # e.g. a line cut short by an interrupted recording
+            domain, rdtype, count, ttl = fields
+            count = int(count)
+            answers[(domain, rdtype)] = RecordedAnswer(count, int(ttl)) if count >= 0 else None
+    return answers
+
+
+def make_resolver(mode='live', snapshot=None, lifetime=1):
+    """Build the resolver for a mode name (live, record or replay)"""
+    if mode == 'live':
+        return LiveResolver(lifetime)
+    if mode not in RESOLVER_MODES:
+        raise ValueError(f"Unknown DNS mode {mode!r}, expected one of {', '.join(RESOLVER_MODES)}")
+    if not snapshot:
+        raise ValueError(f"DNS mode {mode!r} needs a snapshot path")
+    if mode == 'record':
+        return RecordingResolver(snapshot, LiveResolver(lifetime))
+    if not os.path.exists(snapshot):
+        raise FileNotFoundError(f"DNS snapshot not found: {snapshot}")
+    return ReplayResolver(snapshot)
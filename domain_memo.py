@@ -0,0 +1,129 @@
+import time
+import threading
+
+
+class DomainFeatures:
+    """Features of one normalized domain under one whitelist version.
+
+    The whitelist match, subdomain count and TLD length never change for a
+    given key. ``dns`` is (dns cache generation, expires_at, (has_a, has_mx,
+    has_ns, ip_count)) or None, replaced as one tuple so readers never see
+    half an update. ``referenced`` is the memo's eviction bit.
+    """
+    __slots__ = ('whitelist_match', 'subdomain_count', 'tld_length', 'dns', 'referenced')
+
+    def __init__(self, domain, whitelist):
+        self.whitelist_match = whitelist.match(domain)
+        # Same values as splitting the domain into labels, without the list
+        self.subdomain_count = max(domain.count('.') - 1, 0)
+        last_dot = domain.rfind('.')
+        self.tld_length = len(domain) - last_dot - 1 if last_dot >= 0 else 0
+        self.dns = None
+        self.referenced = False
+
+
+class DomainMemo:
+    """
+    Bounded memo of DomainFeatures keyed by (whitelist version, normalized domain)
+
+    Everything URLFeatureExtractor derives from the domain alone is computed
+    once per domain instead of once per URL. A hit is one dict lookup and no
+    lock: a hit only sets the record's reference bit, and when the memo is
+    full an insert evicts the first record on the CLOCK ring whose bit is
+    clear (second-chance LRU). Hit counters are updated without the lock, so
+    they can drift slightly under concurrent requests.
+
+    The DNS features are a copy of the DNS cache entry: they expire with it,
+    and clearing that cache (as set_resolver does) voids every copy through
+    its generation counter.
+    """
+
+    def __init__(self, dns_cache, maxsize=100000, clock=time.monotonic):
+        self.dns_cache = dns_cache
+        self.maxsize = maxsize
+        self._clock = clock
+        self._records = {}
+        self._ring = []  # keys in CLOCK order
+        self._hand = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def get(self, domain, whitelist):
+        """The record for a domain, computing it on first use"""
+        key = (whitelist.version, domain)
+        record = self._records.get(key)
+        if record is not None:
+            record.referenced = True
+            self.hits += 1
+            return record
+
+        record = DomainFeatures(domain, whitelist)
+        if self.maxsize <= 0:
+            self.misses += 1
+            return record
+        with self._lock:
+            self.misses += 1
+            if key in self._records:
+                return self._records[key]
+            if len(self._ring) < self.maxsize:
+                self._ring.append(key)
+            else:
+                self._evict_one()
+                self._ring[self._hand] = key
+                self._hand = (self._hand + 1) % len(self._ring)
+            self._records[key] = record
+        return record
+
+    def _evict_one(self):
+        """Advance the hand past referenced records, clearing their bit, and drop the first unreferenced one"""
+        while True:
+            victim = self._records[self._ring[self._hand]]
+            if not victim.referenced:
+                break
+            victim.referenced = False
+            self._hand = (self._hand + 1) % len(self._ring)
+        del self._records[self._ring[self._hand]]
+        self.evictions += 1
+
+    def dns(self, record):
+        """The record's DNS features while they are live, else None"""
+        entry = record.dns
+        if entry is not None and entry[0] == self.dns_cache.generation and entry[1] > self._clock():
+            self.dns_hits += 1
+            return entry[2]
+        self.dns_misses += 1
+        return None
+
+    def remember_dns(self, record, dns_info, ttl=None):
+        if ttl is None:
+            ttl = self.dns_cache.ttl
+        record.dns = (self.dns_cache.generation, self._clock() + ttl, dns_info)
+
+    def __len__(self):
+        return len(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._ring.clear()
+            self._hand = 0
+
+    def stats(self):
+        """Counters for /stats: record hit ratio (whitelist, subdomain/TLD) and DNS copy hit ratio"""
+        lookups = self.hits + self.misses
+        dns_lookups = self.dns_hits + self.dns_misses
+        return {
+            'size': len(self._records),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'dns_hits': self.dns_hits,
+            'dns_misses': self.dns_misses,
+            'dns_hit_rate': self.dns_hits / dns_lookups if dns_lookups else 0.0
+        }
@@ -1,19 +1,106 @@
 import re
 import math
 import csv
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
-import dns.resolver
-import dns.exception
+import numpy as np
+from ttl_cache import TTLCache
+from domain_memo import DomainMemo
+from whitelist_index import WhitelistIndex
+from metrics import STAGE_SECONDS, DNS_QUERY_SECONDS, DNS_TIMEOUTS, CACHE_HITS
+from dns_resolvers import LiveResolver
+from lexical_engine import LexicalEngine
+
+# -----------------------------
+# Feature order must match training
+# -----------------------------
+FEATURE_ORDER = [
+    'url_len', 'dot_count', 'hyphen_count', 'has_ip',
+    'suspicious_total', 'subdomain_count', 'tld_length',
+    'url_entropy', 'has_a', 'has_mx', 'has_ns', 'ip_count'
+]
+
+IP_PATTERN = re.compile(r'(\d{1,3}\.){3}\d{1,3}')
+
+logger = logging.getLogger(__name__)
+
+
+# Event loop of each thread that resolves from synchronous code, and the helper
+# threads used by callers already inside a running loop; both are per process
+_thread_state = threading.local()
+_helper = None  # (pid, ThreadPoolExecutor)
+_helper_lock = threading.Lock()
+
+
+def _thread_loop():
+    """This thread's event loop, created on first use (and again after a fork)"""
+    pid, loop = getattr(_thread_state, 'loop', (None, None))
+    if pid != os.getpid() or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_state.loop = (os.getpid(), loop)
+    return loop
+
+
+def _helper_pool():
+    global _helper
+    with _helper_lock:
+        if _helper is None or _helper[0] != os.getpid():
+            _helper = (os.getpid(), ThreadPoolExecutor(max_workers=4, thread_name_prefix='run-blocking'))
+        return _helper[1]
+
+
+def run_blocking(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Each calling thread keeps one event loop for all its lookups rather than
+    creating one per call. A caller that is itself inside a running loop
+    hands the coroutine to a shared pool of helper threads, which keep
+    their own loops the same way.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _thread_loop().run_until_complete(coro)
+    return _helper_pool().submit(run_blocking, coro).result()
+
 
 class URLFeatureExtractor:
-    dns_cache = {}
+    # Bounded LRU; positive entries follow the record TTLs, failed lookups
+    # are kept only for DNS_NEGATIVE_TTL so NXDOMAIN results do not go stale,
+    # and lookups cut off by a prefetch deadline (no answer at all) only for
+    # DNS_TIMEOUT_TTL: long enough for the batch that follows, then retried
+    DNS_MIN_TTL = 30
+    DNS_MAX_TTL = 3600
+    DNS_NEGATIVE_TTL = 60
+    DNS_TIMEOUT_TTL = 5
+    dns_cache = TTLCache(maxsize=50000, ttl=300)
+    # Optional PersistentCache shared across restarts and worker processes
+    dns_store = None
+    # Whitelist match, subdomain/TLD length and DNS answers per (whitelist version, domain)
+    domain_memo = DomainMemo(dns_cache, maxsize=100000)
     WHITELIST = set()
+    WHITELIST_INDEX = WhitelistIndex(WHITELIST)
+
+    # Record types queried for the DNS features, all resolved concurrently
+    DNS_RECORD_TYPES = ('A', 'MX', 'NS')
+    DNS_LIFETIME = 1
+    # Live, recording or replaying resolver (see dns_resolvers.py)
+    resolver = LiveResolver(DNS_LIFETIME)
+    # Upper bound on domains resolved at once by batch extraction
+    DNS_CONCURRENCY = 64
 
     SUSPICIOUS_KEYWORDS = [
         'login', 'secure', 'update', 'free', 'verify', 'account', 'gift', 'bank',
         'confirm', 'password', 'signin', 'click', 'bonus', 'reward', 'offer', 'urgent',
         'win', 'prize', 'limited', 'billing', 'invoice', 'checkout', 'money', 'cash'
     ]
+    # All lexical features in one pass; the per-feature methods below are the reference
+    LEXICAL_ENGINE = LexicalEngine(SUSPICIOUS_KEYWORDS, IP_PATTERN)
 
     @staticmethod
     def normalize_domain(domain_or_url):
@@ -40,89 +127,125 @@ class URLFeatureExtractor:
             return '.'.join(parts[-2:])
         return domain
 
+    @staticmethod
+    def read_whitelist(csv_path):
+        """Parse a whitelist CSV into a set of normalized domains; raises if it cannot be read"""
+        whitelist = set()
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            # Try to detect if there's a header
+            first_row = next(reader, None)
+            if first_row and not first_row[0].isdigit():
+                # Likely a header, skip it
+                pass
+            else:
+                # Process the first row
+                if first_row and len(first_row) >= 2:
+                    url = first_row[1].strip()
+                    if url:
+                        domain = URLFeatureExtractor.normalize_domain(url)
+                        whitelist.add(domain)
+                        logger.debug("Added to whitelist: %s", domain)
+            
+            # Process remaining rows
+            for row_num, row in enumerate(reader, start=2):
+                if len(row) < 2:
+                    continue
+                
+                url = row[1].strip()
+                if url:
+                    try:
+                        domain = URLFeatureExtractor.normalize_domain(url)
+                        whitelist.add(domain)
+                        if 'google.com' in domain and logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Row %d: Added Google domain: %s", row_num, domain)
+                    except Exception as e:
+                        logger.warning("Error processing row %d: %s -> %s", row_num, url, e)
+                        continue
+        return whitelist
+
     @staticmethod
     def load_whitelist(csv_path):
         """Load whitelist from CSV file"""
         whitelist = set()
         try:
-            with open(csv_path, newline='', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                # Try to detect if there's a header
-                first_row = next(reader, None)
-                if first_row and not first_row[0].isdigit():
-                    # Likely a header, skip it
-                    pass
-                else:
-                    # Process the first row
-                    if first_row and len(first_row) >= 2:
-                        url = first_row[1].strip()
-                        if url:
-                            domain = URLFeatureExtractor.normalize_domain(url)
-                            whitelist.add(domain)
-                            print(f"Added to whitelist: {domain}")
-                
-                # Process remaining rows
-                for row_num, row in enumerate(reader, start=2):
-                    if len(row) < 2:
-                        continue
-                    
-                    url = row[1].strip()
-                    if url:
-                        try:
-                            domain = URLFeatureExtractor.normalize_domain(url)
-                            whitelist.add(domain)
-                            if 'google.com' in domain:  # Debug Google domains
-                                print(f"Row {row_num}: Added Google domain: {domain}")
-                        except Exception as e:
-                            print(f"Error processing row {row_num}: {url} -> {e}")
-                            continue
-        
+            whitelist = URLFeatureExtractor.read_whitelist(csv_path)
         except Exception as e:
-            print(f"Error loading whitelist: {e}")
+            logger.error("Error loading whitelist: %s", e)
             
-        URLFeatureExtractor.WHITELIST = whitelist
-        print(f"Whitelist loaded with {len(whitelist)} domains")
+        URLFeatureExtractor.set_whitelist(whitelist)
+        logger.info("Whitelist loaded with %d domains", len(whitelist))
         
         # Debug: Print some Google domains if found
-        google_domains = [d for d in whitelist if 'google.com' in d]
-        if google_domains:
-            print(f"Google domains in whitelist: {google_domains[:5]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            google_domains = [d for d in whitelist if 'google.com' in d]
+            if google_domains:
+                logger.debug("Google domains in whitelist: %s...", google_domains[:5])
+
+    @classmethod
+    def set_whitelist(cls, domains, version=None):
+        """Install a set of normalized domains and build its lookup index once"""
+        cls.set_whitelist_index(WhitelistIndex(domains, version))
+
+    @classmethod
+    def set_whitelist_index(cls, index):
+        """Install a prebuilt WhitelistIndex; extractors already created keep the one they bound"""
+        cls.WHITELIST = index.domains
+        cls.WHITELIST_INDEX = index
 
-    def __init__(self, url):
+    @classmethod
+    def set_resolver(cls, resolver):
+        """Switch DNS resolution (live/record/replay); cached answers are dropped"""
+        cls.resolver = resolver
+        cls.dns_cache.clear()
+
+    @classmethod
+    def attach_dns_store(cls, store):
+        """Back the DNS cache with a PersistentCache and warm-load its live entries"""
+        cls.dns_store = store
+        rows = store.load(limit=cls.dns_cache.maxsize)
+        # Rows come newest expiry first; insert oldest first so LRU order matches
+        for domain, result, ttl in reversed(rows):
+            cls.dns_cache.set(domain, tuple(result), ttl)
+        logger.info("DNS cache warm-loaded with %d domains from %s", len(rows), store.path)
+
+    _UNCHECKED = object()
+
+    def __init__(self, url, whitelist=None):
         self.url = url
         self.domain = self.normalize_domain(url)
         self.main_domain = self.get_main_domain(self.domain)
+        # Bound once, so a whitelist swapped in mid-request does not mix versions
+        self.whitelist_index = whitelist if whitelist is not None else URLFeatureExtractor.WHITELIST_INDEX
+        self._whitelist_match = self._UNCHECKED
+        self._domain_features = None
+
+    def domain_features(self):
+        """Memoized DomainFeatures of this domain under the bound whitelist"""
+        if self._domain_features is None:
+            self._domain_features = URLFeatureExtractor.domain_memo.get(self.domain, self.whitelist_index)
+        return self._domain_features
+
+    def whitelist_match(self):
+        """Return how the domain is whitelisted (exact/main/trusted_subdomain) or None"""
+        if self._whitelist_match is self._UNCHECKED:
+            match = self.domain_features().whitelist_match
+            if match is not None and logger.isEnabledFor(logging.DEBUG):
+                if match == WhitelistIndex.EXACT:
+                    logger.debug("✅ Direct whitelist match: %s", self.domain)
+                elif match == WhitelistIndex.MAIN:
+                    logger.debug("✅ Main domain whitelist match: %s", self.main_domain)
+                elif match == WhitelistIndex.TRUSTED_SUBDOMAIN:
+                    logger.debug("✅ Trusted subdomain match: %s", self.domain)
+            self._whitelist_match = match
+        return self._whitelist_match
 
     def is_whitelisted(self):
-        """Check if domain is whitelisted with improved logic"""
-        # Direct exact match
-        if self.domain in URLFeatureExtractor.WHITELIST:
-            print(f"✅ Direct whitelist match: {self.domain}")
-            return True
-        
-        # Check main domain
-        if self.main_domain in URLFeatureExtractor.WHITELIST:
-            print(f"✅ Main domain whitelist match: {self.main_domain}")
-            return True
-        
-        # Check if this is a subdomain of a whitelisted domain
-        domain_parts = self.domain.split('.')
-        for i in range(len(domain_parts)):
-            potential_parent = '.'.join(domain_parts[i:])
-            if potential_parent in URLFeatureExtractor.WHITELIST:
-                # Allow common subdomains of trusted domains
-                subdomain_part = '.'.join(domain_parts[:i]) if i > 0 else ''
-                trusted_subdomains = ['www', 'mail', 'docs', 'drive', 'accounts', 'support', 
-                                    'help', 'admin', 'api', 'cdn', 'm', 'mobile', 'app']
-                
-                if not subdomain_part or subdomain_part in trusted_subdomains:
-                    print(f"✅ Trusted subdomain match: {self.domain} -> {potential_parent}")
-                    return True
-        
-        return False
+        """Check if domain is whitelisted (checked once per extractor)"""
+        return self.whitelist_match() is not None
 
     def has_ip(self):
-        return int(bool(re.search(r'(\d{1,3}\.){3}\d{1,3}', self.url)))
+        return int(bool(IP_PATTERN.search(self.url)))
 
     def count_dots(self):
         return self.url.count('.')
@@ -153,59 +276,261 @@ class URLFeatureExtractor:
         parts = self.domain.split('.')
         return len(parts[-1]) if len(parts) > 1 else 0
 
-    def get_dns_info(self):
+    @classmethod
+    async def _query(cls, domain, rdtype):
+        """Query one record type through the installed resolver, timing it"""
+        start = time.perf_counter()
+        try:
+            return await cls.resolver.query(domain, rdtype)
+        finally:
+            DNS_QUERY_SECONDS.observe(time.perf_counter() - start, rdtype)
+
+    def _cached_dns_info(self):
+        """Return DNS features without touching the network, or None if unknown"""
         if self.is_whitelisted():
             # Skip DNS queries for whitelisted domains
             return (1, 0, 0, 1)
+        return self._cached_domain_dns(self.domain, self.domain_features())
 
-        if self.domain in URLFeatureExtractor.dns_cache:
-            return URLFeatureExtractor.dns_cache[self.domain]
+    @staticmethod
+    def _cached_domain_dns(domain, record):
+        """DNS features from the domain memo, the DNS cache or the shared store, or None"""
+        memo = URLFeatureExtractor.domain_memo
+        result = memo.dns(record)
+        if result is not None:
+            CACHE_HITS.inc('dns')
+            return result
+        entry = URLFeatureExtractor.dns_cache.get_entry(domain)
+        if entry is not None:
+            CACHE_HITS.inc('dns')
+            ttl, result = entry
+            memo.remember_dns(record, result, ttl)
+        elif URLFeatureExtractor.dns_store is not None:
+            # Another worker may already have resolved this domain
+            stored = URLFeatureExtractor.dns_store.get(domain)
+            if stored is not None:
+                CACHE_HITS.inc('dns_store')
+                result = tuple(stored[0])
+                URLFeatureExtractor.dns_cache.set(domain, result, stored[1])
+                memo.remember_dns(record, result, stored[1])
+        return result
 
-        has_a = has_mx = has_ns = False
-        ip_count = 0
+    @classmethod
+    def dns_ttl(cls, domain):
+        """Seconds the cached DNS features of a domain stay valid; the negative TTL when none are cached"""
+        ttl = URLFeatureExtractor.dns_cache.remaining_ttl(domain)
+        return cls.DNS_NEGATIVE_TTL if ttl is None else ttl
 
-        try:
-            answers = dns.resolver.resolve(self.domain, 'A', lifetime=1)
-            ip_count = len(answers)
-            has_a = True
-        except dns.exception.DNSException:
-            pass
+    async def _resolve_dns_info(self):
+        # A, MX and NS are independent, so the worst case is one lifetime, not three
+        answers = await asyncio.gather(
+            *(self._query(self.domain, rdtype) for rdtype in self.DNS_RECORD_TYPES)
+        )
+        return self._store_dns_info(answers)
 
-        try:
-            dns.resolver.resolve(self.domain, 'MX', lifetime=1)
-            has_mx = True
-        except dns.exception.DNSException:
-            pass
+    def _replay_dns_info(self):
+        """Resolve from an offline resolver directly, without an event loop"""
+        resolver = URLFeatureExtractor.resolver
+        return self._store_dns_info([resolver.lookup(self.domain, rdtype) for rdtype in self.DNS_RECORD_TYPES])
 
-        try:
-            dns.resolver.resolve(self.domain, 'NS', lifetime=1)
-            has_ns = True
-        except dns.exception.DNSException:
-            pass
+    def _store_dns_info(self, answers):
+        a_answer, mx_answer, ns_answer = answers
+        has_a = a_answer is not None
+        has_mx = mx_answer is not None
+        has_ns = ns_answer is not None
+        ip_count = len(a_answer) if has_a else 0
 
         result = (int(has_a), int(has_mx), int(has_ns), ip_count)
-        URLFeatureExtractor.dns_cache[self.domain] = result
+        ttl = self._cache_ttl(answers)
+        URLFeatureExtractor.dns_cache.set(self.domain, result, ttl)
+        URLFeatureExtractor.domain_memo.remember_dns(self.domain_features(), result, ttl)
+        if URLFeatureExtractor.dns_store is not None:
+            URLFeatureExtractor.dns_store.put(self.domain, result, ttl)
         return result
 
+    @classmethod
+    def _cache_ttl(cls, answers):
+        """Shortest record TTL among the answers, or the negative TTL if none resolved"""
+        ttls = [answer.rrset.ttl for answer in answers
+                if answer is not None and answer.rrset is not None]
+        if not ttls:
+            return cls.DNS_NEGATIVE_TTL
+        return min(max(min(ttls), cls.DNS_MIN_TTL), cls.DNS_MAX_TTL)
+
+    async def get_dns_info_async(self):
+        cached = self._cached_dns_info()
+        if cached is not None:
+            return cached
+        return await self._resolve_dns_info()
+
+    def get_dns_info(self):
+        cached = self._cached_dns_info()
+        if cached is not None:
+            return cached
+        if URLFeatureExtractor.resolver.offline:
+            return self._replay_dns_info()
+        return run_blocking(self._resolve_dns_info())
+
+    def _build_features(self, dns_info):
+        has_a, has_mx, has_ns, ip_count = dns_info
+        whitelisted = self.is_whitelisted()
+
+        features = self.LEXICAL_ENGINE.features(self.url, self.domain, whitelisted)
+        features['has_a'] = has_a
+        features['has_mx'] = has_mx
+        features['has_ns'] = has_ns
+        features['ip_count'] = ip_count
+        features['is_whitelisted'] = int(whitelisted)
+        return features
+
     def extract_features(self):
         try:
-            has_a, has_mx, has_ns, ip_count = self.get_dns_info()
-
-            return {
-                'url_len': self.url_length(),
-                'dot_count': self.count_dots(),
-                'hyphen_count': self.count_hyphens(),
-                'has_ip': self.has_ip(),
-                'suspicious_total': self.count_suspicious_words(),
-                'subdomain_count': self.subdomain_count(),
-                'tld_length': self.tld_length(),
-                'url_entropy': self.url_entropy(),
-                'has_a': has_a,
-                'has_mx': has_mx,
-                'has_ns': has_ns,
-                'ip_count': ip_count,
-                'is_whitelisted': int(self.is_whitelisted())
-            }
+            start = time.perf_counter()
+            dns_info = self.get_dns_info()
+            lexical_start = time.perf_counter()
+            STAGE_SECONDS.observe(lexical_start - start, 'dns')
+            features = self._build_features(dns_info)
+            STAGE_SECONDS.observe(time.perf_counter() - lexical_start, 'lexical')
+            return features
         except Exception as e:
-            print(f"[Feature Extraction Error] URL: {self.url} → {e}")
+            logger.warning("[Feature Extraction Error] URL: %s → %s", self.url, e)
             return None
+
+    async def extract_features_async(self):
+        try:
+            return self._build_features(await self.get_dns_info_async())
+        except Exception as e:
+            logger.warning("[Feature Extraction Error] URL: %s → %s", self.url, e)
+            return None
+
+    @classmethod
+    def extract_batch(cls, urls, resolve_dns=True, domains=None, whitelist=None):
+        """Extract features for many URLs into a float32 matrix in FEATURE_ORDER.
+
+        Lexical features are computed with array operations over the whole
+        batch. Domain features (whitelist, subdomain/TLD length, DNS) come
+        from the domain memo once per distinct domain, and uncached domains
+        are resolved concurrently. With resolve_dns=False the DNS columns are left at 0.
+        ``domains`` may pass in the already normalized domain of each URL,
+        and ``whitelist`` a WhitelistIndex other than the installed one.
+        With DNS, the dns (domain features) and lexical stages are recorded
+        per URL, as extract_features does.
+        """
+        n = len(urls)
+        matrix = np.zeros((n, len(FEATURE_ORDER)), dtype=np.float32)
+        if n == 0:
+            return matrix
+        start = time.perf_counter()
+        col = {name: i for i, name in enumerate(FEATURE_ORDER)}
+
+        # One code point per element, with the owning row alongside it
+        lengths = np.fromiter(map(len, urls), dtype=np.int64, count=n)
+        codes = np.frombuffer(''.join(urls).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        rows = np.repeat(np.arange(n), lengths)
+
+        matrix[:, col['url_len']] = lengths
+        matrix[:, col['dot_count']] = np.bincount(rows, weights=codes == ord('.'), minlength=n)
+        matrix[:, col['hyphen_count']] = np.bincount(rows, weights=codes == ord('-'), minlength=n)
+        matrix[:, col['has_ip']] = [1 if IP_PATTERN.search(url) else 0 for url in urls]
+
+        # Shannon entropy from per-row character histograms
+        keys = rows * 0x110000 + codes
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        key_rows = unique_keys // 0x110000
+        prob = counts / lengths[key_rows]
+        matrix[:, col['url_entropy']] = -np.bincount(key_rows, weights=prob * np.log2(prob), minlength=n)
+
+        # Domain-level features, looked up once per distinct domain in the domain memo
+        domain_start = time.perf_counter()
+        if domains is None:
+            domains = [cls.normalize_domain(url) for url in urls]
+        if whitelist is None:
+            whitelist = URLFeatureExtractor.WHITELIST_INDEX
+        domain_rows = {}
+        unresolved = []
+        for url, domain in zip(urls, domains):
+            if domain in domain_rows:
+                continue
+            record = URLFeatureExtractor.domain_memo.get(domain, whitelist)
+            whitelisted = record.whitelist_match is not None
+            if not resolve_dns:
+                dns_info = (0, 0, 0, 0)
+            elif whitelisted:
+                dns_info = (1, 0, 0, 1)
+            else:
+                dns_info = cls._cached_domain_dns(domain, record)
+            if dns_info is None:
+                # Only domains that need a lookup get an extractor
+                unresolved.append(cls(url, whitelist))
+            domain_rows[domain] = [whitelisted, record.subdomain_count, record.tld_length, dns_info]
+        if unresolved:
+            if cls.resolver.offline:
+                resolved = [extractor._replay_dns_info() for extractor in unresolved]
+            else:
+                resolved = run_blocking(cls._resolve_all(unresolved))
+            for extractor, dns_info in zip(unresolved, resolved):
+                domain_rows[extractor.domain][3] = dns_info
+        domain_seconds = time.perf_counter() - domain_start
+
+        for i, (url, domain) in enumerate(zip(urls, domains)):
+            whitelisted, subdomains, tld_len, dns_info = domain_rows[domain]
+            row = matrix[i]
+            if not whitelisted:
+                row[col['suspicious_total']] = cls.LEXICAL_ENGINE.suspicious_total(url)
+            row[col['subdomain_count']] = subdomains
+            row[col['tld_length']] = tld_len
+            row[col['has_a']], row[col['has_mx']], row[col['has_ns']], row[col['ip_count']] = dns_info
+
+        if resolve_dns:
+            STAGE_SECONDS.observe(domain_seconds / n, 'dns', n)
+            STAGE_SECONDS.observe((time.perf_counter() - start - domain_seconds) / n, 'lexical', n)
+        return matrix
+
+    @classmethod
+    async def prefetch_dns(cls, urls, concurrency=None, deadline=None):
+        """
+        Resolve the distinct uncached, non-whitelisted domains of urls concurrently
+
+        At most ``concurrency`` domains are in flight at once. Domains still
+        unresolved after ``deadline`` seconds are cached as failed lookups
+        for DNS_TIMEOUT_TTL, so the batch that follows never blocks on DNS and
+        a later request resolves them again.
+        URLs that cannot be parsed are skipped. Returns the number of domains
+        that finished resolving.
+        """
+        representatives = {}
+        for url in urls:
+            try:
+                extractor = cls(url)
+            except Exception:
+                continue
+            if extractor.domain not in representatives:
+                representatives[extractor.domain] = extractor
+        unresolved = [extractor for extractor in representatives.values()
+                      if extractor._cached_dns_info() is None]
+        if not unresolved:
+            return 0
+
+        task = asyncio.ensure_future(cls._resolve_all(unresolved, concurrency))
+        done, _ = await asyncio.wait([task], timeout=deadline)
+        if task in done:
+            return len(unresolved)
+
+        task.cancel()
+        timed_out = [extractor.domain for extractor in unresolved
+                     if extractor.domain not in URLFeatureExtractor.dns_cache]
+        for domain in timed_out:
+            URLFeatureExtractor.dns_cache.set(domain, (0, 0, 0, 0), cls.DNS_TIMEOUT_TTL)
+        if timed_out:
+            DNS_TIMEOUTS.inc('deadline', len(timed_out))
+        return len(unresolved) - len(timed_out)
+
+    @classmethod
+    async def _resolve_all(cls, extractors, concurrency=None):
+        limit = asyncio.Semaphore(concurrency or cls.DNS_CONCURRENCY)
+
+        async def resolve(extractor):
+            async with limit:
+                return await extractor._resolve_dns_info()
+
+        return await asyncio.gather(*(resolve(extractor) for extractor in extractors))
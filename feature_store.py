@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Materialized per-URL feature store for retraining
+
+Runs URLFeatureExtractor.extract_batch over labeled URL corpora on a
+process pool and keeps the feature rows on disk, keyed by URL and feature
+version, so a retrain does not repeat the extraction (and its DNS lookups).
+The store is a directory of parts, each written once:
+
+    part-00000.npy    float32 matrix, one row per URL, in FEATURE_ORDER
+    part-00000.json   index: feature version, feature order and the URL of each row
+
+The .json is written after its .npy, so a part without an index is an
+interrupted write and is ignored. A rerun only extracts URLs that have no
+row for the current feature version (new URLs, or all of them after the
+extractor, the whitelist or the DNS setting changed) and adds them as new
+parts; nothing is rewritten.
+
+The feature version hashes the extractor source and FEATURE_ORDER, then
+appends the whitelist version (whitelisted URLs have no keyword count;
+features are extracted with an empty whitelist unless --whitelist is given,
+and never with the benign corpus itself)
+and ':nodns' when DNS was not resolved. Record DNS answers with
+--dns-mode record to rebuild the same features offline later.
+
+Usage:
+    python feature_store.py --benign raw_datasets/benign-urls.csv \\
+        --malicious raw_datasets/malicious-urls.csv --store features
+    python train_model.py --store features -o url_xgb_model.json
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import artifacts
+from dns_resolvers import make_resolver, RESOLVER_MODES
+from feature_extractor import URLFeatureExtractor, FEATURE_ORDER
+from whitelist_index import WhitelistIndex
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE = 'features'
+# Source files whose code decides the feature values: the extractor, its lexical
+# engine, the per-domain memo (subdomain count, TLD length) and the whitelist match
+EXTRACTOR_SOURCES = ('feature_extractor.py', 'lexical_engine.py', 'domain_memo.py', 'whitelist_index.py')
+
+# Set once per worker process by init_worker
+_whitelist = None
+
+
+def extractor_version():
+    """Hash of the extractor source and the feature order"""
+    digest = hashlib.sha256(json.dumps(FEATURE_ORDER).encode('utf-8'))
+    for name in EXTRACTOR_SOURCES:
+        with open(os.path.join(ROOT, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def feature_version(whitelist, resolve_dns=True):
+    version = f"{extractor_version()}:{whitelist.version}"
+    return version if resolve_dns else version + ':nodns'
+
+
+def read_whitelist(path):
+    """WhitelistIndex for the corpus; no path or an unreadable CSV means an empty whitelist"""
+    if not path:
+        return WhitelistIndex(set())
+    try:
+        return artifacts.read_whitelist(path)
+    except Exception as e:
+        logger.warning(f"⚠️  No whitelist from {path} ({e}); extracting with an empty whitelist")
+        return WhitelistIndex(set())
+
+
+class FeatureStore:
+    """Directory of feature parts with an in-memory (url, version) -> (part, row) index"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.parts = []
+        self._rows = {}
+        for name in sorted(os.listdir(path)):
+            if name.startswith('part-') and name.endswith('.json'):
+                self._add_part(name[:-len('.json')])
+
+    def _add_part(self, part):
+        with open(os.path.join(self.path, part + '.json'), encoding='utf-8') as f:
+            index = json.load(f)
+        if index['feature_order'] != FEATURE_ORDER:
+            logger.warning(f"Skipping feature part {part}: written for another feature order")
+            return
+        version = index['version']
+        for row, url in enumerate(index['urls']):
+            self._rows[(url, version)] = (part, row)
+        self.parts.append(part)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def missing(self, urls, version):
+        """URLs (deduplicated, in order) without a row for this feature version"""
+        return [url for url in dict.fromkeys(urls) if (url, version) not in self._rows]
+
+    def add(self, urls, matrix, version):
+        """Write one part; the index goes last so a crash never leaves a half-indexed part"""
+        part = f"part-{len(self.parts):05d}"
+        while os.path.exists(os.path.join(self.path, part + '.npy')):
+            part = f"part-{int(part[5:]) + 1:05d}"
+        np.save(os.path.join(self.path, part + '.npy'), np.asarray(matrix, dtype=np.float32))
+        index = {'version': version, 'feature_order': FEATURE_ORDER, 'created': time.time(), 'urls': list(urls)}
+        tmp_path = os.path.join(self.path, part + '.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.path, part + '.json'))
+        self._add_part(part)
+        return part
+
+    def matrix(self, urls, version):
+        """Feature rows for `urls` in order; raises KeyError for a URL that was never materialized"""
+        locations = [self._rows[(url, version)] for url in urls]
+        matrix = np.empty((len(urls), len(FEATURE_ORDER)), dtype=np.float32)
+        by_part = {}
+        for i, (part, row) in enumerate(locations):
+            by_part.setdefault(part, ([], []))
+            by_part[part][0].append(i)
+            by_part[part][1].append(row)
+        for part, (targets, rows) in by_part.items():
+            data = np.load(os.path.join(self.path, part + '.npy'), mmap_mode='r')
+            matrix[targets] = data[rows]
+        return matrix
+
+    def stats(self):
+        versions = {}
+        for _, version in self._rows:
+            versions[version] = versions.get(version, 0) + 1
+        return {'path': self.path, 'parts': len(self.parts), 'rows': len(self._rows), 'versions': versions}
+
+
+# -----------------------------------------------------------------------------
+# Materialization
+# -----------------------------------------------------------------------------
+
+def init_worker(whitelist_path, dns_mode='live', dns_snapshot=None):
+    global _whitelist
+    _whitelist = read_whitelist(whitelist_path)
+    if dns_mode != 'live':
+        URLFeatureExtractor.set_resolver(make_resolver(dns_mode, dns_snapshot, URLFeatureExtractor.DNS_LIFETIME))
+
+
+def extract_chunk(urls, resolve_dns):
+    return URLFeatureExtractor.extract_batch(urls, resolve_dns=resolve_dns, whitelist=_whitelist)
+
+
+def chunked(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def materialize(store, urls, whitelist_path, resolve_dns=True, workers=1, chunk_size=2000,
+                part_rows=100000, dns_mode='live', dns_snapshot=None):
+    """Extract every URL missing from the store; returns (feature version, rows extracted)"""
+    version = feature_version(read_whitelist(whitelist_path), resolve_dns)
+    pending = store.missing(urls, version)
+    if not pending:
+        return version, 0
+
+    started = time.perf_counter()
+    done = 0
+    init_args = (whitelist_path, dns_mode, dns_snapshot)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=init_args) \
+        if workers > 1 else None
+    if pool is None:
+        init_worker(*init_args)
+    try:
+        # Each part is extracted and written before the next one starts, so an interrupted
+        # run keeps every finished part
+        for part_urls in chunked(pending, part_rows):
+            chunks = list(chunked(part_urls, chunk_size))
+            if pool is not None:
+                matrices = list(pool.map(extract_chunk, chunks, itertools.repeat(resolve_dns)))
+            else:
+                matrices = [extract_chunk(chunk, resolve_dns) for chunk in chunks]
+            store.add(part_urls, np.concatenate(matrices), version)
+            done += len(part_urls)
+            elapsed = time.perf_counter() - started
+            print(f"\r{done:,}/{len(pending):,} URLs  {done / elapsed:,.0f} URLs/s",
+                  end='', file=sys.stderr, flush=True)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print(file=sys.stderr)
+    return version, done
+
+
+def add_arguments(parser):
+    """Store, whitelist and extraction options shared with train_model.py"""
+    parser.add_argument('--store', default=DEFAULT_STORE, help='feature store directory')
+    # The server never scores a whitelisted URL, so by default none are in the training rows
+    parser.add_argument('--whitelist', default='', help='whitelist CSV to extract with (default: none)')
+    parser.add_argument('--no-dns', action='store_true', help='leave the DNS features at 0')
+    parser.add_argument('--dns-mode', default='live', choices=RESOLVER_MODES,
+                        help='record appends DNS answers to --dns-snapshot; replay answers only from it')
+    parser.add_argument('--dns-snapshot', help='DNS snapshot file for record/replay')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--part-rows', type=int, default=100000, help='URLs per part file')
+
+
+def check_arguments(parser, args):
+    benign = getattr(args, 'benign', None)
+    if args.whitelist and benign and os.path.realpath(args.whitelist) == os.path.realpath(benign):
+        # Every benign row would be extracted as whitelisted: no keyword count, fixed DNS features
+        parser.error('--whitelist is the benign corpus; its URLs would all be labelled by the whitelist')
+    if args.dns_mode != 'live' and not args.dns_snapshot:
+        parser.error('--dns-mode record/replay needs --dns-snapshot')
+    if args.dns_mode == 'record' and args.dns_snapshot.endswith('.gz') and args.workers > 1:
+        parser.error('record to a plain (not .gz) snapshot when using several workers')
+
+
+def materialize_from_args(store, urls, args):
+    """Bring the store up to date for `urls`; returns the feature version"""
+    started = time.perf_counter()
+    version, extracted = materialize(store, urls, args.whitelist, not args.no_dns, args.workers,
+                                     args.chunk_size, args.part_rows, args.dns_mode, args.dns_snapshot)
+    print(f"✅ {extracted:,} of {len(set(urls)):,} URLs extracted in {time.perf_counter() - started:.1f}s "
+          f"(feature version {version}); {store.path} holds {len(store):,} rows", file=sys.stderr)
+    return version
+
+
+def main():
+    from train_lexical_model import read_urls
+
+    parser = argparse.ArgumentParser(description='Materialize URL features for retraining')
+    parser.add_argument('--benign', default='raw_datasets/benign-urls.csv')
+    parser.add_argument('--malicious', default='raw_datasets/malicious-urls.csv')
+    add_arguments(parser)
+    args = parser.parse_args()
+    check_arguments(parser, args)
+
+    urls = []
+    for path in (args.benign, args.malicious):
+        if os.path.exists(path):
+            urls.extend(read_urls(path))
+        else:
+            print(f"⚠️  {path} not found, skipping", file=sys.stderr)
+    materialize_from_args(FeatureStore(args.store), urls, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,28 @@
-from flask import Flask, request, jsonify
+import time
+_startup_clock = time.perf_counter()
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import pandas as pd
-import xgboost as xgb
-from feature_extractor import URLFeatureExtractor
+from feature_extractor import URLFeatureExtractor, FEATURE_ORDER
+from model_runtime import feature_matrix, invalid_rows
+from persistent_cache import PersistentCache
+from dns_resolvers import make_resolver
+from ttl_cache import TTLCache
+from domain_memo import DomainMemo
+from micro_batcher import MicroBatcher
+from decision_log import DecisionLog
+from batch_planner import plan_batch
+from cascade import Cascade, parse_band, DEFAULT_LEXICAL_MODEL, LEXICAL_FEATURES, LEXICAL_COLUMNS
+from scoring_snapshot import ScoringSnapshot, Reloader, load_snapshot, load_scoring_model
+from compact_whitelist import CompactWhitelist
+import metrics
+from metrics import STAGE_SECONDS, WHITELIST_HITS, CACHE_HITS, VERDICTS, REQUEST_ERRORS, CASCADE_DECISIONS
+import artifacts
+import argparse
+import hmac
 import logging
+import os
+import signal
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -12,34 +31,216 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Chrome extension
 
+MODEL_PATH = "url_xgb_model.json"
+WHITELIST_PATH = os.environ.get('URL_SCANNER_WHITELIST', "raw_datasets/benign-urls.csv")
+# Prebuilt artifacts (compiled model, whitelist snapshot) are used when fresh;
+# set URL_SCANNER_ARTIFACTS=0 to always load the JSON model and parse the CSV
+USE_ARTIFACTS = os.environ.get('URL_SCANNER_ARTIFACTS', '1') != '0'
+# The whitelist is looked up in the memory-mapped store (compact_whitelist.py) when
+# one was built; URL_SCANNER_WHITELIST_STORE=0 keeps it as an in-memory set instead
+USE_WHITELIST_STORE = os.environ.get('URL_SCANNER_WHITELIST_STORE', '1') != '0'
+# Concurrent /check-url requests are scored together: a request waits up to
+# BATCH_WINDOW_MS for others, and a batch closes at BATCH_MAX_ITEMS (0 disables)
+BATCH_WINDOW_MS = float(os.environ.get('URL_SCANNER_BATCH_WINDOW_MS', 2))
+BATCH_MAX_ITEMS = int(os.environ.get('URL_SCANNER_BATCH_MAX_ITEMS', 64))
+# Set URL_SCANNER_CACHE_DB to a file path to keep DNS results and verdicts across restarts
+CACHE_DB_PATH = os.environ.get('URL_SCANNER_CACHE_DB')
+VERDICT_CACHE_SIZE = int(os.environ.get('URL_SCANNER_VERDICT_CACHE_SIZE', 100000))
+VERDICT_CACHE_TTL = int(os.environ.get('URL_SCANNER_VERDICT_CACHE_TTL', 3600))
+# Domains whose whitelist match, subdomain/TLD length and DNS features are memoized
+DOMAIN_MEMO_SIZE = int(os.environ.get('URL_SCANNER_DOMAIN_MEMO_SIZE', 100000))
+# JSONL log of every verdict with its features, written off the request path
+# (opt-in: set a path such as logs/decisions.jsonl; importing the module writes no file)
+DECISION_LOG_PATH = os.environ.get('URL_SCANNER_DECISION_LOG', '')
+DECISION_LOG_MAX_MB = float(os.environ.get('URL_SCANNER_DECISION_LOG_MAX_MB', 50))
+# DNS source: live, record (append answers to DNS_SNAPSHOT) or replay (answer from it, offline)
+DNS_MODE = os.environ.get('URL_SCANNER_DNS_MODE', 'live')
+DNS_SNAPSHOT = os.environ.get('URL_SCANNER_DNS_SNAPSHOT')
+
+# Cascade: a lexical-only model answers first and DNS runs only when its probability
+# is inside the band; active when the lexical model file exists (URL_SCANNER_CASCADE=0 disables)
+USE_CASCADE = os.environ.get('URL_SCANNER_CASCADE', '1') != '0'
+LEXICAL_MODEL_PATH = os.environ.get('URL_SCANNER_LEXICAL_MODEL', DEFAULT_LEXICAL_MODEL)
+CASCADE_BAND = os.environ.get('URL_SCANNER_CASCADE_BAND', '0.1,0.9')
+# Hot reload of the model files and whitelist: polled every RELOAD_INTERVAL seconds
+# (0 disables), on SIGHUP, and on POST /admin/reload, which needs ADMIN_TOKEN as a
+# bearer token and is refused when no token is set
+RELOAD_INTERVAL = float(os.environ.get('URL_SCANNER_RELOAD_INTERVAL', 5))
+ADMIN_TOKEN = os.environ.get('URL_SCANNER_ADMIN_TOKEN')
+# Set by serve.py: models and whitelist load at import, per-process resources
+# only in each worker after fork (see open_process_resources)
+PREFORK = os.environ.get('URL_SCANNER_PREFORK') == '1'
+WORKER_ID = None
+
+# Seconds spent in each start-up stage, reported by /stats and bench_startup.py
+STARTUP_TIMINGS = {'import': time.perf_counter() - _startup_clock}
+
 # -----------------------------
 # Load Trained Model
 # -----------------------------
+# Same loader as a hot reload (build_snapshot), so both serve the same backend
+_stage_clock = time.perf_counter()
 try:
-    model = xgb.XGBClassifier()
-    model.load_model("url_xgb_model.json")
-    logger.info("✅ XGBoost model loaded successfully")
+    _model = load_scoring_model(MODEL_PATH, USE_ARTIFACTS)
+    logger.info(f"✅ Model loaded successfully ({type(_model).__name__})")
 except Exception as e:
     logger.error(f"❌ Failed to load model: {e}")
-    model = None
+    _model = None
+
+_cascade = None
+if USE_CASCADE and _model is not None and os.path.exists(LEXICAL_MODEL_PATH):
+    try:
+        _cascade = Cascade(load_scoring_model(LEXICAL_MODEL_PATH, USE_ARTIFACTS), *parse_band(CASCADE_BAND))
+        logger.info(f"✅ Cascade enabled with band {CASCADE_BAND}")
+    except Exception as e:
+        logger.error(f"❌ Failed to load lexical model, cascade disabled: {e}")
+        _cascade = None
+STARTUP_TIMINGS['model_load'] = time.perf_counter() - _stage_clock
 
 # -----------------------------
 # Load Whitelist
 # -----------------------------
+_stage_clock = time.perf_counter()
 try:
-    URLFeatureExtractor.load_whitelist("raw_datasets/benign-urls.csv")
-    logger.info(f"✅ Whitelist loaded with {len(URLFeatureExtractor.WHITELIST)} domains")
+    artifacts.load_whitelist(WHITELIST_PATH, use_snapshot=USE_ARTIFACTS, use_store=USE_WHITELIST_STORE)
+    logger.info(f"✅ Whitelist loaded with {len(URLFeatureExtractor.WHITELIST)} domains "
+                f"(version {URLFeatureExtractor.WHITELIST_INDEX.version})")
 except Exception as e:
     logger.error(f"❌ Failed to load whitelist: {e}")
+STARTUP_TIMINGS['whitelist_load'] = time.perf_counter() - _stage_clock
+
+# -----------------------------
+# Scoring Snapshot
+# -----------------------------
+# Model, cascade and whitelist in use, replaced as one object by a hot reload;
+# request code reads `snapshot` once and passes it along (see scoring_snapshot.py)
+snapshot = ScoringSnapshot(_model, _cascade, URLFeatureExtractor.WHITELIST_INDEX)
+del _model, _cascade
+
+def build_snapshot():
+    """Load the model files and whitelist from disk again; any failure raises"""
+    return load_snapshot(MODEL_PATH, WHITELIST_PATH, USE_ARTIFACTS,
+                         LEXICAL_MODEL_PATH if USE_CASCADE else None, parse_band(CASCADE_BAND),
+                         use_store=USE_WHITELIST_STORE)
+
+def install_snapshot(new):
+    global snapshot
+    URLFeatureExtractor.set_whitelist_index(new.whitelist)
+    snapshot = new
+
+reloader = Reloader(build_snapshot, lambda: snapshot, install_snapshot, paths=[
+    MODEL_PATH, LEXICAL_MODEL_PATH if USE_CASCADE else None,
+    WHITELIST_PATH, artifacts.whitelist_snapshot_path(WHITELIST_PATH),
+    artifacts.whitelist_store_path(WHITELIST_PATH) if USE_WHITELIST_STORE else None
+])
+
+# -----------------------------
+# DNS Resolver
+# -----------------------------
+if DNS_MODE != 'live':
+    try:
+        URLFeatureExtractor.set_resolver(
+            make_resolver(DNS_MODE, DNS_SNAPSHOT, URLFeatureExtractor.DNS_LIFETIME))
+        logger.info(f"✅ DNS {DNS_MODE} mode using {DNS_SNAPSHOT}")
+    except Exception as e:
+        logger.error(f"❌ Failed to set up DNS {DNS_MODE} mode, using live DNS: {e}")
+
+# -----------------------------
+# Domain Memo
+# -----------------------------
+# Records of older whitelist versions are never read after a reload and age out of the LRU
+URLFeatureExtractor.domain_memo = DomainMemo(URLFeatureExtractor.dns_cache, maxsize=DOMAIN_MEMO_SIZE)
 
 # -----------------------------
-# Feature order must match training
+# Verdict Cache
 # -----------------------------
-FEATURE_ORDER = [
-    'url_len', 'dot_count', 'hyphen_count', 'has_ip',
-    'suspicious_total', 'subdomain_count', 'tld_length',
-    'url_entropy', 'has_a', 'has_mx', 'has_ns', 'ip_count'
-]
+# Holds (status, probability) so requests with any threshold can reuse an entry
+verdict_cache = TTLCache(maxsize=VERDICT_CACHE_SIZE, ttl=VERDICT_CACHE_TTL)
+# The persistent store, decision log and micro-batcher hold SQLite connections
+# and threads, which must not cross a fork: open_process_resources() opens them
+verdict_store = None
+
+# -----------------------------
+# Decision Log
+# -----------------------------
+decision_log = None
+
+def log_decision(snap, result, features, latency, **extra):
+    """Queue a verdict scored under snapshot `snap` for the decision log (never blocks)"""
+    if decision_log is None:
+        return
+    probability = result['confidence'] if result['status'] == 'success' else None
+    decision_log.record(result['url'], result['status'], probability, features, latency,
+                        snap.model_version, snap.whitelist.version, **extra)
+
+def status_result(url, status, message):
+    """Build a non-scored response (whitelisted or error)"""
+    return {
+        'url': url,
+        'is_malicious': False,
+        'confidence': 0.0,
+        'status': status,
+        'message': message
+    }
+
+def model_result(url, proba, threshold):
+    """Build the response for a model probability at the given threshold"""
+    is_malicious = proba >= threshold
+    return {
+        'url': url,
+        'is_malicious': bool(is_malicious),  # Convert numpy.bool_ to Python bool
+        'confidence': float(proba),
+        'status': 'success',
+        'message': f'{"Malicious" if is_malicious else "Benign"} ({proba * 100:.2f}% confidence)'
+    }
+
+def verdict_key(url, snap):
+    """
+    Cache key for a URL under a snapshot's model and whitelist versions
+    
+    The URL is used verbatim: every lexical feature is computed on the raw
+    string, so any rewriting (case, trailing slash, fragment) could change
+    the verdict. Returns None for non-string input, which is never cached.
+    """
+    if not isinstance(url, str):
+        return None
+    return f"{snap.version}:{url}"
+
+def cached_result(key, url, threshold):
+    """Return a response from the verdict cache or persistent store, or None"""
+    if key is None:
+        return None
+    verdict = verdict_cache.get(key)
+    if verdict is not None:
+        CACHE_HITS.inc('verdict')
+    elif verdict_store is not None:
+        stored = verdict_store.get(key)
+        if stored is not None:
+            CACHE_HITS.inc('verdict_store')
+            verdict = tuple(stored[0])
+            verdict_cache.set(key, verdict, stored[1])
+    if verdict is None:
+        return None
+    status, proba = verdict
+    if status == 'whitelisted':
+        return status_result(url, 'whitelisted', 'Domain is whitelisted')
+    return model_result(url, proba, threshold)
+
+def remember_verdict(key, status, proba=0.0, ttl=None):
+    """
+    Record a whitelisted or successful verdict
+    
+    A verdict that used DNS features passes the TTL of those answers: it is
+    kept no longer than them, so one scored from a failed lookup lasts
+    DNS_NEGATIVE_TTL, and one from a deadline-expired lookup DNS_TIMEOUT_TTL,
+    rather than VERDICT_CACHE_TTL.
+    """
+    if key is None:
+        return
+    ttl = VERDICT_CACHE_TTL if ttl is None else min(ttl, VERDICT_CACHE_TTL)
+    verdict_cache.set(key, (status, proba), ttl)
+    if verdict_store is not None:
+        verdict_store.put(key, (status, proba), ttl=ttl)
 
 def predict_url(url, threshold=0.4):
     """
@@ -52,104 +253,344 @@ def predict_url(url, threshold=0.4):
     Returns:
         dict: Prediction result
     """
+    start = time.perf_counter()
+    snap = snapshot
+    result, features = score_url(url, threshold, snap)
+    log_decision(snap, result, features, time.perf_counter() - start)
+    return result
+
+def score_url(url, threshold, snap):
+    """predict_url under snapshot `snap`, without logging; returns (result, feature dict or None)"""
+    model, cascade = snap.model, snap.cascade
     try:
-        extractor = URLFeatureExtractor(url)
+        # Reuse a verdict from an earlier request, run or worker
+        key = verdict_key(url, snap) if model is not None else None
+        cached = cached_result(key, url, threshold)
+        if cached is not None:
+            return cached, None
+        
+        start = time.perf_counter()
+        extractor = URLFeatureExtractor(url, snap.whitelist)
+        parsed = time.perf_counter()
+        STAGE_SECONDS.observe(parsed - start, 'parse')
         
         # If whitelisted, immediately return as benign
-        if extractor.is_whitelisted():
-            return {
-                'url': url,
-                'is_malicious': False,
-                'confidence': 0.0,
-                'status': 'whitelisted',
-                'message': 'Domain is whitelisted'
-            }
+        whitelisted = extractor.is_whitelisted()
+        STAGE_SECONDS.observe(time.perf_counter() - parsed, 'whitelist')
+        if whitelisted:
+            WHITELIST_HITS.inc()
+            remember_verdict(key, 'whitelisted')
+            return status_result(url, 'whitelisted', 'Domain is whitelisted'), None
         
-        # Extract features
+        # A confident lexical-only verdict skips DNS entirely
+        if cascade is not None:
+            start = time.perf_counter()
+            lexical = URLFeatureExtractor.LEXICAL_ENGINE.features(url, extractor.domain)
+            lexical_proba = float(cascade.lexical_proba(cascade.lexical_row(lexical))[0])
+            STAGE_SECONDS.observe(time.perf_counter() - start, 'cascade')
+            if cascade.decided(lexical_proba):
+                CASCADE_DECISIONS.inc('lexical')
+                remember_verdict(key, 'success', lexical_proba)
+                return model_result(url, lexical_proba, threshold), lexical
+            CASCADE_DECISIONS.inc('dns')
+        
+        # Extract features (records the dns and lexical stages)
         feat_dict = extractor.extract_features()
         if feat_dict is None:
-            return {
-                'url': url,
-                'is_malicious': False,
-                'confidence': 0.0,
-                'status': 'error',
-                'message': 'Feature extraction failed'
-            }
+            return status_result(url, 'error', 'Feature extraction failed'), None
         
         # Check for missing model
         if model is None:
-            return {
-                'url': url,
-                'is_malicious': False,
-                'confidence': 0.0,
-                'status': 'error',
-                'message': 'Model not loaded'
-            }
+            return status_result(url, 'error', 'Model not loaded'), feat_dict
         
-        # Prepare DataFrame
-        df = pd.DataFrame([[feat_dict[f] for f in FEATURE_ORDER]], columns=FEATURE_ORDER)
+        # Prepare feature row
+        start = time.perf_counter()
+        features = feature_matrix([feat_dict])
         
         # Check for NaN values
-        if df.isnull().any().any():
-            return {
-                'url': url,
-                'is_malicious': False,
-                'confidence': 0.0,
-                'status': 'error',
-                'message': 'Invalid features detected'
-            }
+        if invalid_rows(features)[0]:
+            return status_result(url, 'error', 'Invalid features detected'), feat_dict
         
         # Make prediction
-        proba = model.predict_proba(df)[0][1]  # Get probability of malicious class
-        is_malicious = proba >= threshold
-        
-        return {
-            'url': url,
-            'is_malicious': bool(is_malicious),  # Convert numpy.bool_ to Python bool
-            'confidence': float(proba),
-            'status': 'success',
-            'message': f'{"Malicious" if is_malicious else "Benign"} ({proba * 100:.2f}% confidence)'
-        }
+        proba = float(model.predict_proba(features)[0])  # Probability of malicious class
+        STAGE_SECONDS.observe(time.perf_counter() - start, 'model')
+        remember_verdict(key, 'success', proba, URLFeatureExtractor.dns_ttl(extractor.domain))
+        
+        return model_result(url, proba, threshold), feat_dict
         
     except Exception as e:
         logger.error(f"Error predicting URL {url}: {str(e)}")
-        return {
-            'url': url,
-            'is_malicious': False,
-            'confidence': 0.0,
-            'status': 'error',
-            'message': f'Prediction failed: {str(e)}'
-        }
+        return status_result(url, 'error', f'Prediction failed: {str(e)}'), None
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'model_loaded': model is not None,
-        'whitelist_size': len(URLFeatureExtractor.WHITELIST)
-    })
+def predict_urls(urls, threshold=0.4, plan=None):
+    """
+    Predict a batch of URLs with one feature-extraction pass and one model call
+    
+    Repeated URLs are scored once, and whitelist/DNS work is done once per
+    domain (see batch_planner.py).
+    
+    Args:
+        urls (list): URLs to check
+        threshold (float): Confidence threshold for malicious classification
+        plan (BatchPlan): plan_batch(urls), if the caller already built it
+        
+    Returns:
+        list: Prediction results, in the same order as urls
+    """
+    start = time.perf_counter()
+    if plan is None:
+        plan = plan_batch(urls)
+    snap = snapshot
+    results, feature_rows = score_urls(plan.urls, threshold, snap, plan.domains)
+    if decision_log is not None:
+        # Latency is the whole batch's, shared by its URLs
+        latency = time.perf_counter() - start
+        for i, result in enumerate(results):
+            log_decision(snap, result, feature_rows.get(i), latency, batch_size=len(urls))
+    return plan.expand(results)
 
-@app.route('/check-url', methods=['POST'])
-def check_url():
+def score_urls(urls, threshold, snap, domains=None):
+    """predict_urls for distinct URLs under `snap`, without logging; returns (results, {index: feature row})"""
+    model, cascade = snap.model, snap.cascade
+    results = [None] * len(urls)
+    feature_rows = {}
+    pending = []  # (index, url, cache key, domain) still to be scored by the model
+    whitelisted_domains = {}  # domain -> whitelist decision, checked once per domain
+    
+    for i, url in enumerate(urls):
+        try:
+            key = verdict_key(url, snap) if model is not None else None
+            cached = cached_result(key, url, threshold)
+            if cached is not None:
+                results[i] = cached
+                continue
+            
+            domain = domains[i] if domains is not None else None
+            whitelisted = whitelisted_domains.get(domain) if domain is not None else None
+            if whitelisted is None:
+                start = time.perf_counter()
+                extractor = URLFeatureExtractor(url, snap.whitelist)
+                parsed = time.perf_counter()
+                STAGE_SECONDS.observe(parsed - start, 'parse')
+                domain = extractor.domain
+                whitelisted = whitelisted_domains[domain] = extractor.is_whitelisted()
+                STAGE_SECONDS.observe(time.perf_counter() - parsed, 'whitelist')
+            
+            if whitelisted:
+                WHITELIST_HITS.inc()
+                remember_verdict(key, 'whitelisted')
+                results[i] = status_result(url, 'whitelisted', 'Domain is whitelisted')
+            elif model is None:
+                results[i] = status_result(url, 'error', 'Model not loaded')
+            else:
+                pending.append((i, url, key, domain))
+        except Exception as e:
+            logger.error(f"Error predicting URL {url}: {str(e)}")
+            results[i] = status_result(url, 'error', f'Prediction failed: {str(e)}')
+    
+    if pending and cascade is not None:
+        pending = cascade_batch(cascade, pending, results, feature_rows, threshold, snap.whitelist)
+    
+    if pending:
+        model_batch(model, pending, results, feature_rows, threshold, snap.whitelist)
+    return results, feature_rows
+
+def model_batch(model, pending, results, feature_rows, threshold, whitelist):
+    """Score pending URLs with the full model in one call; a failed batch is retried URL by URL"""
+    try:
+        # Extraction records the dns and lexical stages
+        features = URLFeatureExtractor.extract_batch([url for _, url, _, _ in pending],
+                                                     domains=[domain for _, _, _, domain in pending],
+                                                     whitelist=whitelist)
+        start = time.perf_counter()
+        invalid = invalid_rows(features)
+        probas = model.predict_proba(features)
+        STAGE_SECONDS.observe((time.perf_counter() - start) / len(pending), 'model', len(pending))
+    except Exception as e:
+        if len(pending) > 1:
+            # One bad URL must not fail the others (or other clients' requests in a micro-batch)
+            logger.warning(f"Batch of {len(pending)} URLs failed, scoring them one by one: {e}")
+            for entry in pending:
+                model_batch(model, [entry], results, feature_rows, threshold, whitelist)
+            return
+        i, url, _, _ = pending[0]
+        logger.error(f"Error predicting URL {url}: {str(e)}")
+        results[i] = status_result(url, 'error', f'Prediction failed: {str(e)}')
+        return
+    
+    for (i, url, key, domain), row, proba, bad in zip(pending, features, probas, invalid):
+        feature_rows[i] = row
+        if bad:
+            results[i] = status_result(url, 'error', 'Invalid features detected')
+            continue
+        proba = float(proba)
+        remember_verdict(key, 'success', proba, URLFeatureExtractor.dns_ttl(domain))
+        results[i] = model_result(url, proba, threshold)
+
+def cascade_batch(cascade, pending, results, feature_rows, threshold, whitelist):
+    """Decide confident URLs from lexical features; returns those that still need DNS"""
+    try:
+        start = time.perf_counter()
+        lexical = URLFeatureExtractor.extract_batch([url for _, url, _, _ in pending], resolve_dns=False,
+                                                    domains=[domain for _, _, _, domain in pending],
+                                                    whitelist=whitelist)
+        probas = cascade.lexical_proba(lexical)
+        STAGE_SECONDS.observe((time.perf_counter() - start) / len(pending), 'cascade', len(pending))
+    except Exception as e:
+        logger.error(f"Cascade failed for batch of {len(pending)} URLs, using the full model: {e}")
+        return pending
+    
+    undecided = []
+    for entry, row, proba, decided in zip(pending, lexical, probas, cascade.decided(probas)):
+        if not decided:
+            undecided.append(entry)
+            continue
+        i, url, key, _ = entry
+        proba = float(proba)
+        remember_verdict(key, 'success', proba)
+        results[i] = model_result(url, proba, threshold)
+        if decision_log is not None:
+            feature_rows[i] = {name: float(row[column]) for name, column in zip(LEXICAL_FEATURES, LEXICAL_COLUMNS)}
+    CASCADE_DECISIONS.inc('lexical', len(pending) - len(undecided))
+    CASCADE_DECISIONS.inc('dns', len(undecided))
+    return undecided
+
+def dns_candidates(urls):
     """
-    Check if URL is malicious
+    URLs whose verdict will need DNS: not cached, not whitelisted, and not
+    decided by the cascade's lexical stage
     
-    Expected JSON payload:
-    {
-        "url": "http://example.com",
-        "threshold": 0.4  # optional, defaults to 0.4
-    }
+    Lexical verdicts are remembered here, so scoring the same URLs right
+    after is a verdict cache hit. Used by asgi_server.py to prefetch DNS for
+    only the URLs the full model will see.
     """
+    snap = snapshot
+    if snap.model is None:
+        return []
+    pending = []
+    for url in dict.fromkeys(url for url in urls if isinstance(url, str)):
+        try:
+            key = verdict_key(url, snap)
+            if cached_result(key, url, 0.5) is not None:
+                continue
+            extractor = URLFeatureExtractor(url, snap.whitelist)
+            if not extractor.is_whitelisted():
+                pending.append((url, key, extractor.domain))
+        except Exception:
+            continue  # scoring reports it
+    if not pending or snap.cascade is None:
+        return [url for url, _, _ in pending]
+    
+    try:
+        lexical = URLFeatureExtractor.extract_batch([url for url, _, _ in pending], resolve_dns=False,
+                                                    domains=[domain for _, _, domain in pending],
+                                                    whitelist=snap.whitelist)
+        probas = snap.cascade.lexical_proba(lexical)
+    except Exception:
+        return [url for url, _, _ in pending]
+    undecided = []
+    for (url, key, _), proba, decided in zip(pending, probas, snap.cascade.decided(probas)):
+        if decided:
+            remember_verdict(key, 'success', float(proba))
+        else:
+            undecided.append(url)
+    CASCADE_DECISIONS.inc('lexical', len(pending) - len(undecided))
+    return undecided
+
+def predict_requests(requests):
+    """Score (url, threshold) pairs from concurrent requests, one batch per threshold"""
+    if len(requests) == 1:
+        # A lone request skips the array set-up of the batch path
+        url, threshold = requests[0]
+        return [predict_url(url, threshold)]
+    
+    results = [None] * len(requests)
+    by_threshold = {}
+    for i, (url, threshold) in enumerate(requests):
+        by_threshold.setdefault(threshold, []).append(i)
+    for threshold, indices in by_threshold.items():
+        batch = predict_urls([requests[i][0] for i in indices], threshold)
+        for i, result in zip(indices, batch):
+            results[i] = result
+    return results
+
+batcher = None
+
+# -----------------------------
+# Per-process resources
+# -----------------------------
+def decision_log_path(worker=None):
+    """Pre-forked workers each append to their own file: decisions.jsonl -> decisions.<worker>.jsonl"""
+    if worker is None:
+        return DECISION_LOG_PATH
+    root, ext = os.path.splitext(DECISION_LOG_PATH)
+    return f"{root}.{worker}{ext}"
+
+def open_process_resources(worker=None):
+    """
+    Open the persistent cache, decision log, micro-batcher threads and
+    the reload triggers (SIGHUP handler, file watcher)
+    
+    Runs at import, or once in each serve.py worker after fork when
+    URL_SCANNER_PREFORK=1, so no connection or thread is inherited.
+    """
+    global verdict_store, decision_log, batcher, WORKER_ID
+    WORKER_ID = worker
+    if CACHE_DB_PATH:
+        try:
+            if not URLFeatureExtractor.resolver.offline:
+                # Replayed answers must not mix with live ones shared through the store
+                URLFeatureExtractor.attach_dns_store(PersistentCache(CACHE_DB_PATH, 'dns'))
+            verdict_store = PersistentCache(CACHE_DB_PATH, 'verdict')
+            logger.info(f"✅ Persistent cache enabled at {CACHE_DB_PATH}")
+        except Exception as e:
+            logger.error(f"❌ Failed to open persistent cache: {e}")
+
+    if DECISION_LOG_PATH:
+        path = decision_log_path(worker)
+        try:
+            decision_log = DecisionLog(path, FEATURE_ORDER, max_bytes=int(DECISION_LOG_MAX_MB * 1024 * 1024))
+            logger.info(f"✅ Decision log at {path}")
+        except Exception as e:
+            logger.error(f"❌ Failed to open decision log: {e}")
+
+    batcher = MicroBatcher(predict_requests, window_ms=BATCH_WINDOW_MS, max_items=BATCH_MAX_ITEMS)
+
+    reloader.handle_signal()
+    if RELOAD_INTERVAL > 0:
+        reloader.watch(RELOAD_INTERVAL)
+
+def close_process_resources():
+    """Flush queued cache writes and decision log entries (serve.py workers exit without atexit)"""
+    if decision_log is not None:
+        decision_log.close()
+    for store in (verdict_store, URLFeatureExtractor.dns_store):
+        if store is not None:
+            store.close()
+
+if not PREFORK:
+    open_process_resources()
+
+# -----------------------------
+# Endpoint logic shared by the Flask app and asgi_server.py
+# -----------------------------
+def health_payload():
+    return {
+        'status': 'healthy',
+        'model_loaded': snapshot.model is not None,
+        'whitelist_size': len(snapshot.whitelist)
+    }
+
+def check_url_payload(data):
+    """Validate and score a /check-url request body; returns (payload, status code)"""
     try:
-        data = request.get_json()
-        
         if not data or 'url' not in data:
-            return jsonify({
+            REQUEST_ERRORS.inc('400')
+            return {
                 'error': 'Missing URL in request',
                 'is_malicious': False,
                 'confidence': 0.0
-            }), 400
+            }, 400
         
         url = data['url']
         threshold = data.get('threshold', 0.4)
@@ -158,82 +599,197 @@ def check_url():
         if not 0.0 <= threshold <= 1.0:
             threshold = 0.4
         
-        logger.info(f"Checking URL: {url}")
+        logger.debug("Checking URL: %s", url)
         
-        result = predict_url(url, threshold)
+        result = batcher.submit((url, threshold))
+        VERDICTS.inc(result['status'])
         
-        # Log result
+        # Every verdict goes to the decision log; only malicious ones are logged at WARNING
         if result['is_malicious']:
-            logger.warning(f"🔴 MALICIOUS: {url} ({result['confidence']*100:.2f}%)")
+            logger.warning("🔴 MALICIOUS: %s (%.2f%%)", url, result['confidence'] * 100)
         else:
-            logger.info(f"🟢 BENIGN: {url} ({result['confidence']*100:.2f}%)")
+            logger.debug("🟢 BENIGN: %s (%.2f%%)", url, result['confidence'] * 100)
         
-        return jsonify(result)
+        return result, 200
         
     except Exception as e:
-        logger.error(f"Error in check_url endpoint: {str(e)}")
-        return jsonify({
-            'error': str(e),
-            'is_malicious': False,
-            'confidence': 0.0,
-            'status': 'error'
-        }), 500
+        return check_url_failure(e), 500
 
-@app.route('/check-urls', methods=['POST'])
-def check_multiple_urls():
-    """
-    Check multiple URLs at once
-    
-    Expected JSON payload:
-    {
-        "urls": ["http://example1.com", "http://example2.com"],
-        "threshold": 0.4  # optional
+def check_url_failure(e):
+    logger.error(f"Error in check_url endpoint: {str(e)}")
+    REQUEST_ERRORS.inc('500')
+    return {
+        'error': str(e),
+        'is_malicious': False,
+        'confidence': 0.0,
+        'status': 'error'
     }
-    """
+
+def check_urls_payload(data):
+    """Validate and score a /check-urls request body; returns (payload, status code)"""
     try:
-        data = request.get_json()
-        
         if not data or 'urls' not in data:
-            return jsonify({'error': 'Missing URLs in request'}), 400
+            REQUEST_ERRORS.inc('400')
+            return {'error': 'Missing URLs in request'}, 400
         
         urls = data['urls']
         threshold = data.get('threshold', 0.4)
         
         if not isinstance(urls, list):
-            return jsonify({'error': 'URLs must be a list'}), 400
+            REQUEST_ERRORS.inc('400')
+            return {'error': 'URLs must be a list'}, 400
         
         if len(urls) > 100:  # Limit batch size
-            return jsonify({'error': 'Maximum 100 URLs per request'}), 400
+            REQUEST_ERRORS.inc('400')
+            return {'error': 'Maximum 100 URLs per request'}, 400
         
-        results = []
-        for url in urls:
-            result = predict_url(url, threshold)
-            results.append(result)
+        plan = plan_batch(urls)
+        results = predict_urls(urls, threshold, plan)
+        for result in results:
+            VERDICTS.inc(result['status'])
         
-        return jsonify({
+        payload = {
             'results': results,
             'total_checked': len(results),
             'malicious_count': sum(1 for r in results if r['is_malicious'])
-        })
+        }
+        payload.update(plan.metadata())
+        return payload, 200
         
     except Exception as e:
-        logger.error(f"Error in check_multiple_urls endpoint: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return check_urls_failure(e), 500
+
+def check_urls_failure(e):
+    logger.error(f"Error in check_multiple_urls endpoint: {str(e)}")
+    REQUEST_ERRORS.inc('500')
+    return {'error': str(e)}
+
+def admin_authorized(authorization):
+    """True for the Authorization header 'Bearer ADMIN_TOKEN'; always False when no token is configured"""
+    if not ADMIN_TOKEN:
+        return False
+    return hmac.compare_digest(authorization or '', f"Bearer {ADMIN_TOKEN}")
+
+def admin_reload_payload(authorization):
+    """Authorize and run POST /admin/reload; returns (payload, status code)"""
+    if not ADMIN_TOKEN:
+        return {'error': 'Admin endpoints are disabled: set URL_SCANNER_ADMIN_TOKEN'}, 403
+    if not admin_authorized(authorization):
+        return {'error': 'Forbidden'}, 403
+    return reload_payload()
+
+def reload_payload():
+    """Reload the model files and whitelist now; returns (result, status code)"""
+    result = reloader.reload('admin')
+    if PREFORK and result['status'] != 'failed':
+        # serve.py forwards SIGHUP to every worker; this one finds its snapshot current
+        os.kill(os.getppid(), signal.SIGHUP)
+    return result, 422 if result['status'] == 'failed' else 200
+
+def stats_payload():
+    return {
+        'model_loaded': snapshot.model is not None,
+        'whitelist_domains': len(snapshot.whitelist),
+        'feature_count': len(FEATURE_ORDER),
+        'dns_cache_size': len(URLFeatureExtractor.dns_cache),
+        'dns_cache': URLFeatureExtractor.dns_cache.stats(),
+        'domain_memo': URLFeatureExtractor.domain_memo.stats(),
+        'dns_resolver': URLFeatureExtractor.resolver.stats(),
+        'verdict_cache': verdict_cache.stats(),
+        'persistent_cache': verdict_store.stats() if verdict_store is not None else None,
+        'micro_batcher': batcher.stats(),
+        'decision_log': decision_log.stats() if decision_log is not None else None,
+        'cascade': snapshot.cascade.describe() if snapshot.cascade is not None else None,
+        'snapshot': snapshot.describe(),
+        'whitelist_store': snapshot.whitelist.domains.stats()
+        if isinstance(snapshot.whitelist.domains, CompactWhitelist) else None,
+        'reload': reloader.stats(),
+        'metrics': metrics.stats_snapshot(),
+        'process': {'pid': os.getpid(), 'worker': WORKER_ID},
+        'startup_seconds': STARTUP_TIMINGS
+    }
+
+def json_response(payload, status=200):
+    """jsonify, recording the encoding time as the serialization stage"""
+    start = time.perf_counter()
+    response = jsonify(payload)
+    STAGE_SECONDS.observe(time.perf_counter() - start, 'serialization')
+    return response, status
+
+# -----------------------------
+# Flask routes
+# -----------------------------
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return jsonify(health_payload())
+
+@app.route('/check-url', methods=['POST'])
+def check_url():
+    """
+    Check if URL is malicious
+    
+    Expected JSON payload:
+    {
+        "url": "http://example.com",
+        "threshold": 0.4  # optional, defaults to 0.4
+    }
+    """
+    # A missing or malformed JSON body is a missing URL (400), not a server error
+    payload, status = check_url_payload(request.get_json(silent=True))
+    return json_response(payload, status)
+
+@app.route('/check-urls', methods=['POST'])
+def check_multiple_urls():
+    """
+    Check multiple URLs at once
+    
+    Expected JSON payload:
+    {
+        "urls": ["http://example1.com", "http://example2.com"],
+        "threshold": 0.4  # optional
+    }
+    """
+    payload, status = check_urls_payload(request.get_json(silent=True))
+    return json_response(payload, status)
 
 @app.route('/stats', methods=['GET'])
 def get_stats():
     """Get server statistics"""
-    return jsonify({
-        'model_loaded': model is not None,
-        'whitelist_domains': len(URLFeatureExtractor.WHITELIST),
-        'feature_count': len(FEATURE_ORDER),
-        'dns_cache_size': len(URLFeatureExtractor.dns_cache)
-    })
+    return jsonify(stats_payload())
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Swap in the model and whitelist currently on disk, if they validate"""
+    payload, status = admin_reload_payload(request.headers.get('Authorization'))
+    return jsonify(payload), status
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics"""
+    return Response(metrics.render_prometheus(), content_type=metrics.PROMETHEUS_CONTENT_TYPE)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gmail URL Scanner backend server')
+    parser.add_argument('--build-artifacts', action='store_true',
+                        help='build the compiled model and whitelist snapshot, then exit')
+    args = parser.parse_args()
+    
+    if args.build_artifacts:
+        model_artifact, lexical_artifact, whitelist_snapshot, whitelist_store = artifacts.build_artifacts(
+            MODEL_PATH, WHITELIST_PATH, LEXICAL_MODEL_PATH if USE_CASCADE else None)
+        print(f"✅ Compiled model: {model_artifact}")
+        print(f"{'✅' if lexical_artifact else '⚠️ '} Compiled lexical model: "
+              f"{lexical_artifact or 'skipped (no lexical model or cascade disabled)'}")
+        print(f"{'✅' if whitelist_snapshot else '⚠️ '} Whitelist snapshot: "
+              f"{whitelist_snapshot or 'skipped (no whitelist CSV)'}")
+        print(f"{'✅' if whitelist_store else '⚠️ '} Whitelist store: "
+              f"{whitelist_store or 'skipped (no whitelist CSV)'}")
+        raise SystemExit(0)
+    
     print("🚀 Starting Gmail URL Scanner Backend Server...")
     print("📊 Server Status:")
-    print(f"   Model Loaded: {'✅' if model else '❌'}")
+    print(f"   Model Loaded: {'✅' if snapshot.model else '❌'}")
     print(f"   Whitelist Size: {len(URLFeatureExtractor.WHITELIST)} domains")
     print(f"   Features: {len(FEATURE_ORDER)}")
     print("\n🔗 API Endpoints:")
@@ -241,6 +797,8 @@ if __name__ == '__main__':
     print("   POST /check-url       - Check single URL")
     print("   POST /check-urls      - Check multiple URLs")
     print("   GET  /stats           - Server statistics")
+    print("   GET  /metrics         - Prometheus metrics")
+    print("   POST /admin/reload    - Reload model and whitelist from disk")
     print("\n🌐 Server starting on http://localhost:5000")
     
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
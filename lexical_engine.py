@@ -0,0 +1,113 @@
+import math
+from collections import Counter, deque
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton counting keyword occurrences in one pass.
+
+    ``count(text)`` equals ``sum(text.count(k) for k in keywords)``: each
+    keyword is counted left to right without overlapping itself (a match
+    only counts if it starts after that keyword's previous counted match
+    ended), while different keywords may overlap each other freely.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        goto = [{}]
+        outputs = [[]]  # state -> [(keyword index, keyword length)]
+        for index, word in enumerate(self.keywords):
+            state = 0
+            for char in word:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][char] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append((index, len(word)))
+
+        # Breadth-first failure links, folded into a full transition table so
+        # matching never follows failure links at run time
+        fail = [0] * len(goto)
+        delta = [dict(edges) for edges in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, nxt in goto[state].items():
+                queue.append(nxt)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[nxt] = goto[fallback].get(char, 0) if state else 0
+            for char, target in delta[fail[state]].items():
+                delta[state].setdefault(char, target)
+
+        self._delta = delta
+        self._outputs = [tuple(out) for out in outputs]
+
+    def count(self, text):
+        """Total keyword occurrences in text (case-sensitive; lowercase it first)"""
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        total = 0
+        next_free = None  # keyword index -> first position a new match may start at
+        for position, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            matches = outputs[state]
+            if not matches:
+                continue
+            if next_free is None:
+                next_free = {}
+            for index, length in matches:
+                if position - length + 1 >= next_free.get(index, 0):
+                    next_free[index] = position + 1
+                    total += 1
+        return total
+
+
+class LexicalEngine:
+    """Computes every lexical feature of a URL from one character histogram.
+
+    The histogram gives length, dot and hyphen counts and entropy, and the
+    IP regex only runs when the URL has the three dots an address needs.
+    Keywords are counted by a KeywordAutomaton in one pass over the URL.
+    """
+
+    def __init__(self, keywords, ip_pattern, keyword_weight=2):
+        self.automaton = KeywordAutomaton(keywords)
+        self.ip_pattern = ip_pattern
+        self.keyword_weight = keyword_weight
+
+    def keyword_count(self, url):
+        return self.automaton.count(url.lower())
+
+    def suspicious_total(self, url):
+        return self.keyword_weight * self.keyword_count(url)
+
+    def features(self, url, domain, whitelisted=False):
+        """Lexical features keyed by FEATURE_ORDER names"""
+        length = len(url)
+        histogram = Counter(url)
+        entropy = 0.0
+        if length:
+            for count in histogram.values():
+                p = count / length
+                entropy -= p * math.log2(p)
+
+        dots = histogram['.']
+        has_ip = int(dots >= 3 and self.ip_pattern.search(url) is not None)
+
+        parts = domain.split('.')
+        return {
+            'url_len': length,
+            'dot_count': dots,
+            'hyphen_count': histogram['-'],
+            'has_ip': has_ip,
+            'suspicious_total': 0 if whitelisted else self.suspicious_total(url),
+            'subdomain_count': max(len(parts) - 2, 0),
+            'tld_length': len(parts[-1]) if len(parts) > 1 else 0,
+            'url_entropy': entropy
+        }
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Load generator for the /check-url and /check-urls endpoints
+
+Starts the server in the chosen serving mode (or targets one already
+running with --url) and drives it with a request mix over URLs sampled
+from raw_datasets/malicious-urls.csv. DNS is answered from a replay
+snapshot of bench_suite's stub resolver, so runs are offline and
+repeatable; a server started with --url only gets the same answers when
+it runs with URL_SCANNER_DNS_MODE=replay and the snapshot from
+--write-dns-snapshot.
+
+Two load models:
+
+- closed: --concurrency clients, each sending its next request as soon as
+  the previous one is answered. Throughput is whatever the server sustains.
+- open: requests arrive as a Poisson process at --rate per second no matter
+  how fast they are answered, with at most --concurrency in flight. Latency
+  is measured from the scheduled arrival time, so time spent waiting for a
+  free connection counts (no coordinated omission); arrivals that could not
+  be sent before the run ended are reported as unsent.
+
+Prints a summary table on stderr and JSON on stdout: per endpoint and
+overall, requests, error rate (by status), throughput and p50/p90/p95/p99
+latency in milliseconds.
+
+Usage:
+    python loadtest.py --serving prefork --workers 2 --mode closed --concurrency 16
+    python loadtest.py --serving threaded --mode open --rate 200 --duration 30
+    python loadtest.py --url http://127.0.0.1:5000 --mix check-url=1
+"""
+import argparse
+import csv
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from bench_prefork import write_dns_snapshot
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(ROOT, 'raw_datasets', 'malicious-urls.csv')
+ENDPOINTS = {'check-url': '/check-url', 'check-urls': '/check-urls'}
+PERCENTILES = (50, 90, 95, 99)
+
+
+def sample_corpus(count, seed):
+    """`count` distinct URLs drawn at random from the corpus"""
+    with open(CORPUS, newline='', encoding='utf-8', errors='replace') as f:
+        urls = list(dict.fromkeys(row['url'] for row in csv.DictReader(f) if row.get('url')))
+    return random.Random(seed).sample(urls, min(count, len(urls)))
+
+
+def parse_mix(text):
+    """'check-url=0.8,check-urls=0.2' -> normalized weights per endpoint path"""
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; expected one of {', '.join(ENDPOINTS)}")
+        weights[ENDPOINTS[name.strip()]] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Request mix weights must add up to more than 0")
+    return {path: weight / total for path, weight in weights.items()}
+
+
+# -----------------------------------------------------------------------------
+# Client side
+# -----------------------------------------------------------------------------
+
+class Arrivals:
+    """Poisson arrival times shared by the threads of one client process"""
+
+    def __init__(self, start, rate, seed):
+        self._next = start
+        self._rate = rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.unsent = 0
+
+    def next(self):
+        with self._lock:
+            self._next += self._rng.expovariate(self._rate)
+            return self._next
+
+    def skip(self):
+        with self._lock:
+            self.unsent += 1
+
+
+def client_thread(target, config, urls, seed, start, deadline, arrivals, records):
+    host, port = target
+    rng = random.Random(seed)
+    paths, weights = zip(*config['mix'].items())
+    headers = {'Content-Type': 'application/json'}
+    conn = http.client.HTTPConnection(host, port, timeout=config['timeout'])
+    cursor = rng.randrange(len(urls))
+
+    while True:
+        if arrivals is not None:
+            scheduled = arrivals.next()
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif time.perf_counter() >= deadline:
+                # Fell this far behind: the arrival is counted, not sent after the run
+                arrivals.skip()
+                continue
+        else:
+            scheduled = time.perf_counter()
+            if scheduled >= deadline:
+                break
+
+        path = rng.choices(paths, weights)[0]
+        if path == '/check-url':
+            body = {'url': urls[cursor % len(urls)], 'threshold': config['threshold']}
+            cursor += 1
+            count = 1
+        else:
+            count = config['batch_size']
+            body = {'urls': [urls[(cursor + i) % len(urls)] for i in range(count)],
+                    'threshold': config['threshold']}
+            cursor += count
+
+        sent = time.perf_counter()
+        try:
+            conn.request('POST', path, json.dumps(body), headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = 0  # connection error or timeout
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=config['timeout'])
+        if sent >= start:
+            records.append((path, time.perf_counter() - scheduled, status, count))
+    conn.close()
+
+
+def client_process(index, target, config, urls, results):
+    """One client process: `threads` connections; returns its records and unsent arrivals"""
+    threads = config['threads'][index]
+    begin = time.perf_counter()
+    start = begin + config['warmup']
+    deadline = start + config['duration']
+    arrivals = None
+    if config['mode'] == 'open':
+        # Each process offers its share of the rate; requests sent during warm-up are not recorded
+        arrivals = Arrivals(begin, config['rate'] / len(config['threads']), config['seed'] * 1000 + index)
+
+    records = []
+    workers = [threading.Thread(target=client_thread,
+                                args=(target, config, urls, config['seed'] * 1000 + index * 100 + i,
+                                      start, deadline, arrivals, records))
+               for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    results.put((records, arrivals.unsent if arrivals is not None else 0))
+
+
+def run_load(target, config, urls):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client_process, args=(index, target, config, urls, results))
+             for index in range(len(config['threads']))]
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    records = [record for chunk, _ in collected for record in chunk]
+    return records, sum(unsent for _, unsent in collected)
+
+
+# -----------------------------------------------------------------------------
+# Reporting
+# -----------------------------------------------------------------------------
+
+def summarize(records, duration):
+    ok = np.array([latency for _, latency, status, _ in records if status == 200]) * 1000.0
+    errors = {}
+    for _, _, status, _ in records:
+        if status != 200:
+            key = str(status) if status else 'connection'
+            errors[key] = errors.get(key, 0) + 1
+    error_count = sum(errors.values())
+    summary = {
+        'requests': len(records),
+        'errors': error_count,
+        'error_rate': error_count / len(records) if records else 0.0,
+        'errors_by_status': errors,
+        'requests_per_sec': (len(records) - error_count) / duration,
+        'urls_per_sec': sum(count for _, _, status, count in records if status == 200) / duration,
+        'latency_ms': None
+    }
+    if len(ok):
+        summary['latency_ms'] = {f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(ok, PERCENTILES))}
+        summary['latency_ms'].update(mean=float(ok.mean()), max=float(ok.max()))
+    return summary
+
+
+def print_table(results):
+    print(f"{'endpoint':<14}{'requests':>10}{'req/s':>9}{'urls/s':>9}{'errors':>8}"
+          + ''.join(f"{f'p{p} ms':>10}" for p in PERCENTILES), file=sys.stderr)
+    rows = [(path, summary) for path, summary in results['endpoints'].items()] + [('overall', results['overall'])]
+    for name, s in rows:
+        latency = s['latency_ms'] or {}
+        print(f"{name:<14}{s['requests']:>10}{s['requests_per_sec']:>9.1f}{s['urls_per_sec']:>9.1f}"
+              f"{s['error_rate']:>7.1%} " + ''.join(f"{latency.get(f'p{p}', float('nan')):>10.1f}"
+                                                    for p in PERCENTILES), file=sys.stderr)
+    if results['mode'] == 'open':
+        print(f"offered {results['rate']:g} req/s, {results['unsent']} arrivals unsent "
+              f"(in-flight limit {results['concurrency']})", file=sys.stderr)
+
+
+# -----------------------------------------------------------------------------
+# Server side
+# -----------------------------------------------------------------------------
+
+def server_command(serving, host, port, workers, cache_db):
+    if serving == 'prefork':
+        return [sys.executable, 'serve.py', '--workers', str(workers), '--host', host, '--port', str(port),
+                '--cache-db', cache_db]
+    if serving == 'threaded':
+        # flask_server's own __main__ runs the debug server with the reloader; serve it plainly instead
+        return [sys.executable, '-c',
+                f"import flask_server; flask_server.app.run(host={host!r}, port={port}, threaded=True)"]
+    if serving == 'asgi':
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise SystemExit("❌ --serving asgi needs uvicorn: pip install uvicorn")
+        return [sys.executable, '-m', 'uvicorn', 'asgi_server:app', '--host', host, '--port', str(port),
+                '--log-level', 'warning']
+    raise ValueError(f"Unknown serving mode {serving!r}")
+
+
+def wait_healthy(host, port, timeout=60, server=None):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode} before becoming healthy")
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"No healthy server on {host}:{port} after {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the URL scanner API')
+    parser.add_argument('--serving', choices=['prefork', 'threaded', 'asgi'], default='prefork',
+                        help='serving mode to start (ignored with --url)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='serve.py workers')
+    parser.add_argument('--url', help='target an already running server instead of starting one')
+    parser.add_argument('--port', type=int, default=5078)
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed')
+    parser.add_argument('--concurrency', type=int, default=8, help='clients (closed) or in-flight limit (open)')
+    parser.add_argument('--rate', type=float, default=100.0, help='open loop: arrivals per second')
+    parser.add_argument('--processes', type=int, default=min(4, os.cpu_count() or 1),
+                        help='client processes the connections are spread over')
+    parser.add_argument('--duration', type=float, default=10.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds of load before measuring')
+    parser.add_argument('--mix', default='check-url=0.9,check-urls=0.1', help='endpoint weights')
+    parser.add_argument('--batch-size', type=int, default=20, help='URLs per /check-urls request')
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--sample-size', type=int, default=20000, help='distinct corpus URLs to draw from')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--write-dns-snapshot', help='also keep the stub DNS snapshot for a --url server')
+    parser.add_argument('--output', help='also write the JSON results here')
+    args = parser.parse_args()
+
+    processes = max(1, min(args.processes, args.concurrency))
+    config = {
+        'mode': args.mode,
+        'rate': args.rate,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'mix': parse_mix(args.mix),
+        'batch_size': args.batch_size,
+        'threshold': args.threshold,
+        'timeout': args.timeout,
+        'seed': args.seed,
+        'threads': [len(range(i, args.concurrency, processes)) for i in range(processes)]
+    }
+    urls = sample_corpus(args.sample_size, args.seed)
+
+    tmpdir = tempfile.mkdtemp(prefix='loadtest_')
+    server = None
+    try:
+        snapshot = os.path.join(tmpdir, 'corpus.dns')
+        write_dns_snapshot(urls, snapshot)
+        if args.write_dns_snapshot:
+            shutil.copyfile(snapshot, args.write_dns_snapshot)
+
+        if args.url:
+            parts = urlsplit(args.url)
+            target = (parts.hostname, parts.port or 80)
+            serving = args.url
+        else:
+            target = ('127.0.0.1', args.port)
+            serving = args.serving
+            env = dict(os.environ,
+                       URL_SCANNER_DNS_MODE='replay',
+                       URL_SCANNER_DNS_SNAPSHOT=snapshot,
+                       URL_SCANNER_CACHE_DB=os.path.join(tmpdir, 'cache.db'),
+                       URL_SCANNER_DECISION_LOG=os.path.join(tmpdir, 'decisions.jsonl'))
+            command = server_command(args.serving, *target, args.workers, env['URL_SCANNER_CACHE_DB'])
+            server = subprocess.Popen(command, cwd=ROOT, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_healthy(*target, server=server)
+
+        print(f"⏱️  {serving}: {args.mode} loop, {args.concurrency} connections"
+              f"{f', {args.rate:g} req/s offered' if args.mode == 'open' else ''}, "
+              f"{args.warmup:g}s warm-up + {args.duration:g}s", file=sys.stderr)
+        records, unsent = run_load(target, config, urls)
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    by_path = {}
+    for record in records:
+        by_path.setdefault(record[0], []).append(record)
+    results = {
+        'serving': serving,
+        'workers': args.workers if args.serving == 'prefork' and not args.url else None,
+        'mode': args.mode,
+        'concurrency': args.concurrency,
+        'rate': args.rate if args.mode == 'open' else None,
+        'duration': args.duration,
+        'mix': config['mix'],
+        'batch_size': args.batch_size,
+        'sample_size': len(urls),
+        'unsent': unsent,
+        'overall': summarize(records, args.duration),
+        'endpoints': {path: summarize(chunk, args.duration) for path, chunk in sorted(by_path.items())}
+    }
+    print_table(results)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
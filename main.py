@@ -1,12 +1,13 @@
-import pandas as pd
-import xgboost as xgb
 from feature_extractor import URLFeatureExtractor
+from model_runtime import URLModel, feature_matrix, invalid_rows
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 # -----------------------------
 # Load Trained Model
 # -----------------------------
-model = xgb.XGBClassifier()
-model.load_model("url_xgb_model.json")
+model = URLModel("url_xgb_model.json")
 
 # -----------------------------
 # Load Whitelist
@@ -41,16 +42,6 @@ test_urls = [
     "https://www.youtube.com/"
 ]
 
-# -----------------------------
-# Feature order must match training
-# -----------------------------
-FEATURE_ORDER = [
-    'url_len', 'dot_count', 'hyphen_count', 'has_ip',
-    'suspicious_total',
-    'subdomain_count', 'tld_length',
-    'url_entropy', 'has_a', 'has_mx', 'has_ns', 'ip_count'
-]
-
 print("\n🔎 Predictions:")
 for url in test_urls:
     extractor = URLFeatureExtractor(url)
@@ -65,11 +56,11 @@ for url in test_urls:
         print(f"{url} → ❌ Feature extraction failed")
         continue
 
-    df = pd.DataFrame([[feat_dict[f] for f in FEATURE_ORDER]], columns=FEATURE_ORDER)
-    if df.isnull().any().any():
+    features = feature_matrix([feat_dict])
+    if invalid_rows(features)[0]:
         print(f"{url} → ❌ Found NaNs in features")
         continue
 
-    proba = model.predict_proba(df)[0][1]
+    proba = model.predict_proba(features)[0]
     label = "🔴 Malicious" if proba >= 0.4 else "🟢 Benign"
     print(f"{url} → {label} ({proba * 100:.2f}% confidence)")
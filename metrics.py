@@ -0,0 +1,167 @@
+import bisect
+import threading
+
+# Latency bucket upper bounds in seconds, 10us to 10s
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(label_name, label, extra=''):
+    parts = []
+    if label_name:
+        parts.append(f'{label_name}="{label}"')
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Monotonic counter, optionally split by the values of one label."""
+
+    def __init__(self, name, help, label_name=None):
+        self.name = name
+        self.help = help
+        self.label_name = label_name
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label='', amount=1):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+        if self.label_name is None:
+            return values.get('', 0)
+        return values
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        if not values and self.label_name is None:
+            values = [('', 0)]
+        for label, value in values:
+            lines.append(f"{self.name}{_format_labels(self.label_name, label)} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, optionally split by the values of one label.
+
+    Observing is a bisect plus two additions under a lock, cheap enough to
+    leave on for every request. Quantiles in snapshots are bucket upper
+    bounds, so they are estimates.
+    """
+
+    def __init__(self, name, help, label_name=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_name = label_name
+        self.buckets = tuple(buckets)
+        self._series = {}  # label -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, label='', count=1):
+        """Record `count` observations of `seconds` each (a batch records its per-URL share)"""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += count
+            series[1] += seconds * count
+
+    def _copy(self):
+        with self._lock:
+            return {label: (list(counts), total) for label, (counts, total) in self._series.items()}
+
+    def _quantile(self, counts, q):
+        # Observations past the last bucket report its bound, keeping /stats valid JSON
+        target = q * sum(counts)
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        """{label: count, mean and estimated p50/p99 in milliseconds} for /stats"""
+        result = {}
+        for label, (counts, total) in self._copy().items():
+            count = sum(counts)
+            result[label] = {
+                'count': count,
+                'mean_ms': total / count * 1000.0 if count else 0.0,
+                'p50_ms': self._quantile(counts, 0.5) * 1000.0,
+                'p99_ms': self._quantile(counts, 0.99) * 1000.0
+            }
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label, (counts, total) in sorted(self._copy().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_name, label, le)} {cumulative}")
+            cumulative += counts[-1]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_name, label, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_name, label)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_name, label)} {cumulative}")
+        return lines
+
+
+# -----------------------------
+# Hot-path instruments, shared by the extractor and both servers
+# -----------------------------
+STAGE_SECONDS = Histogram(
+    'url_scanner_stage_seconds',
+    'Latency of URL scoring stages (parse, whitelist, cascade, dns, lexical, model, serialization)',
+    'stage')
+DNS_QUERY_SECONDS = Histogram(
+    'url_scanner_dns_query_seconds', 'Latency of uncached DNS queries by record type', 'rdtype')
+WHITELIST_HITS = Counter('url_scanner_whitelist_hits_total', 'URLs answered by the whitelist')
+DNS_TIMEOUTS = Counter(
+    'url_scanner_dns_timeouts_total', 'DNS queries that timed out, by record type (deadline: batch deadline)',
+    'rdtype')
+CACHE_HITS = Counter('url_scanner_cache_hits_total', 'Lookups answered by a cache', 'cache')
+VERDICTS = Counter('url_scanner_verdicts_total', 'URL results by status', 'status')
+REQUEST_ERRORS = Counter('url_scanner_request_errors_total', 'Error responses by HTTP status code', 'code')
+CASCADE_DECISIONS = Counter(
+    'url_scanner_cascade_decisions_total', 'Cascade outcomes: decided lexically, or sent on to DNS', 'stage')
+
+ALL_METRICS = [STAGE_SECONDS, DNS_QUERY_SECONDS, WHITELIST_HITS, DNS_TIMEOUTS, CACHE_HITS, VERDICTS, REQUEST_ERRORS,
+               CASCADE_DECISIONS]
+
+
+def stats_snapshot():
+    """Metrics as plain JSON-friendly values for /stats"""
+    return {
+        'stage_latency': STAGE_SECONDS.snapshot(),
+        'dns_query_latency': DNS_QUERY_SECONDS.snapshot(),
+        'whitelist_hits': WHITELIST_HITS.snapshot(),
+        'dns_timeouts': DNS_TIMEOUTS.snapshot(),
+        'cache_hits': CACHE_HITS.snapshot(),
+        'verdicts': VERDICTS.snapshot(),
+        'request_errors': REQUEST_ERRORS.snapshot(),
+        'cascade_decisions': CASCADE_DECISIONS.snapshot()
+    }
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
@@ -0,0 +1,128 @@
+import time
+import threading
+from collections import deque
+
+
+class _Pending:
+    __slots__ = ('item', 'submitted', 'done', 'result', 'error')
+
+    def __init__(self, item):
+        self.item = item
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into one batched call.
+
+    A request waits at most ``window_ms`` for others to join its batch, and a
+    batch closes early once it holds ``max_items``. ``batch_fn`` receives the
+    list of items and must return results in the same order. Several worker
+    threads drain the queue so one slow batch (e.g. cold DNS) does not stall
+    every other request. A window of 0 disables batching. A batch_fn that
+    returns the wrong number of results fails every item of its batch.
+    """
+
+    def __init__(self, batch_fn, window_ms=2.0, max_items=64, workers=4, latency_samples=10000):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_items = max_items
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._latencies = deque(maxlen=latency_samples)
+        self._started = time.perf_counter()
+        self.batches = 0
+        self.items = 0
+        if self.enabled:
+            for i in range(workers):
+                threading.Thread(target=self._work, name=f'micro-batcher-{i}', daemon=True).start()
+
+    @property
+    def enabled(self):
+        return self.window > 0 and self.max_items > 1
+
+    def submit(self, item):
+        """Queue an item and block until its batch has been processed"""
+        if not self.enabled:
+            start = time.perf_counter()
+            results = self._call([item])
+            self._record([time.perf_counter() - start])
+            return results[0]
+
+        pending = _Pending(item)
+        with self._cond:
+            self._queue.append(pending)
+            self._cond.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _call(self, items):
+        results = list(self.batch_fn(items))
+        if len(results) != len(items):
+            # zip() would silently leave some waiters with no result
+            raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        return results
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].submitted + self.window
+            while len(self._queue) < self.max_items:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._queue), self.max_items)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                results = self._call([pending.item for pending in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finished = time.perf_counter()
+            self._record([finished - pending.submitted for pending in batch])
+            for pending in batch:
+                pending.done.set()
+
+    def _record(self, latencies):
+        with self._cond:
+            self.batches += 1
+            self.items += len(latencies)
+            self._latencies.extend(latencies)
+
+    def stats(self):
+        """Batch sizes, throughput and latency percentiles for /stats"""
+        with self._cond:
+            latencies = sorted(self._latencies)
+            elapsed = time.perf_counter() - self._started
+            batches, items = self.batches, self.items
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p / 100.0 * len(latencies)))] * 1000.0
+
+        return {
+            'enabled': self.enabled,
+            'window_ms': self.window * 1000.0,
+            'max_items': self.max_items,
+            'batches': batches,
+            'items': items,
+            'avg_batch_size': items / batches if batches else 0.0,
+            'throughput_per_sec': items / elapsed if elapsed > 0 else 0.0,
+            'latency_p50_ms': percentile(50),
+            'latency_p99_ms': percentile(99)
+        }
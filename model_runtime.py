@@ -0,0 +1,83 @@
+import os
+import hashlib
+import logging
+import numpy as np
+from feature_extractor import FEATURE_ORDER
+
+logger = logging.getLogger(__name__)
+
+
+def file_fingerprint(path):
+    """Short content hash used to version cached results"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def compiled_model_path(path):
+    """Default location of the compiled artifact for a JSON model"""
+    return os.path.splitext(path)[0] + '.npz'
+
+
+def load_model(path, backend='auto'):
+    """
+    Load the model for scoring
+    
+    backend='compiled' uses the NumPy tree evaluator (no xgboost import),
+    'xgboost' uses URLModel, and 'auto' prefers a compiled artifact that was
+    built from the current JSON model, falling back to xgboost otherwise.
+    """
+    if backend not in ('auto', 'compiled', 'xgboost'):
+        raise ValueError(f"Unknown model backend: {backend}")
+
+    compiled_path = compiled_model_path(path)
+    if backend == 'compiled' or (backend == 'auto' and os.path.exists(compiled_path)):
+        from tree_compiler import CompiledModel
+
+        compiled = CompiledModel.load(compiled_path)
+        if backend == 'compiled' or not os.path.exists(path) or file_fingerprint(path) == compiled.version:
+            return compiled
+        logger.warning(f"Compiled model {compiled_path} is stale, falling back to xgboost")
+
+    return URLModel(path)
+
+
+def feature_matrix(feature_dicts):
+    """Stack feature dicts into a float32 matrix in FEATURE_ORDER"""
+    return np.array([[feat[f] for f in FEATURE_ORDER] for feat in feature_dicts], dtype=np.float32)
+
+
+def invalid_rows(matrix):
+    """Boolean mask of rows containing NaN (or None) features"""
+    return np.isnan(matrix).any(axis=1)
+
+
+class URLModel:
+    """Trained XGBoost model scored directly on NumPy rows.
+
+    Skips the per-request pandas DataFrame and the sklearn wrapper: rows go
+    straight to Booster.inplace_predict with the same missing value and tree
+    range XGBClassifier.predict_proba would use, so probabilities are
+    bit-identical to the DataFrame path.
+    """
+
+    def __init__(self, path):
+        import xgboost as xgb
+
+        classifier = xgb.XGBClassifier()
+        classifier.load_model(path)
+        self.booster = classifier.get_booster()
+        self.missing = classifier.missing
+        best_iteration = self.booster.attr('best_iteration')
+        self.iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+        self.path = path
+        self.version = file_fingerprint(path)
+
+    def predict_proba(self, matrix):
+        """Probability of the malicious class for each row of a feature matrix"""
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        return self.booster.inplace_predict(
+            matrix,
+            iteration_range=self.iteration_range,
+            missing=self.missing,
+            validate_features=False
+        )
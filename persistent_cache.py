@@ -0,0 +1,150 @@
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentCache:
+    """SQLite-backed key/value store shared by restarts and worker processes.
+
+    The database runs in WAL mode so several processes can read while one
+    writes. Writes are queued and flushed in batches by a background thread,
+    keeping disk I/O off the request path. The same thread deletes expired
+    rows every ``prune_interval`` seconds. Values must be JSON serializable.
+    """
+
+    def __init__(self, path, namespace, flush_interval=1.0, batch_size=256, max_pending=10000,
+                 prune_interval=300.0):
+        self.path = path
+        self.namespace = namespace
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.prune_interval = prune_interval
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self.dropped = 0
+        self.pruned = 0
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,'
+            ' expires_at REAL, PRIMARY KEY (namespace, key))'
+        )
+        conn.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name=f'cache-writer-{namespace}', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def load(self, limit=None):
+        """Return unexpired (key, value, remaining_ttl) rows, newest expiry first"""
+        now = time.time()
+        sql = ('SELECT key, value, expires_at FROM cache WHERE namespace = ?'
+               ' AND (expires_at IS NULL OR expires_at > ?) ORDER BY expires_at DESC')
+        params = [self.namespace, now]
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        rows = self._connection().execute(sql, params).fetchall()
+        return [(key, json.loads(value), None if expires_at is None else expires_at - now)
+                for key, value, expires_at in rows]
+
+    def get(self, key):
+        """Return (value, remaining_ttl) for a live entry, or None"""
+        now = time.time()
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?',
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            return None
+        return json.loads(value), None if expires_at is None else expires_at - now
+
+    def put(self, key, value, ttl=None):
+        """Queue an entry for the next batched write; never blocks the caller"""
+        expires_at = None if ttl is None else time.time() + ttl
+        try:
+            self._pending.put_nowait((self.namespace, key, json.dumps(value), expires_at))
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        """Write every queued entry now"""
+        conn = self._connection()
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            try:
+                conn.executemany('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)', batch)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Persistent cache write failed ({self.path}): {e}")
+                return
+
+    def prune(self):
+        """Delete this namespace's expired rows; returns how many were deleted"""
+        conn = self._connection()
+        try:
+            deleted = conn.execute(
+                'DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?',
+                (self.namespace, time.time())
+            ).rowcount
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Persistent cache prune failed ({self.path}): {e}")
+            return 0
+        self.pruned += deleted
+        return deleted
+
+    def _write_loop(self):
+        last_prune = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            if self.prune_interval and time.monotonic() - last_prune >= self.prune_interval:
+                self.prune()
+                last_prune = time.monotonic()
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._writer.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'pending_writes': self._pending.qsize(),
+            'dropped_writes': self.dropped,
+            'pruned_rows': self.pruned
+        }
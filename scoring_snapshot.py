@@ -0,0 +1,196 @@
+import os
+import time
+import signal
+import logging
+import threading
+import numpy as np
+
+import artifacts
+from cascade import Cascade, DEFAULT_BAND
+from feature_extractor import URLFeatureExtractor, FEATURE_ORDER
+from model_runtime import load_model, compiled_model_path, file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Scored by every candidate snapshot before it may replace the current one
+CANARY_URLS = [
+    'https://www.google.com/',
+    'https://docs.github.com/en/get-started',
+    'http://paypal-account-verify.secure-login.ru/update/confirm.php?id=1',
+    'http://192.168.10.5/admin/login.php',
+    'https://bit.ly/3xYz',
+    'http://free-bonus-gift.win/claim-prize-now'
+]
+
+
+class ScoringSnapshot:
+    """Model, cascade and whitelist that decide a verdict, swapped as one object.
+
+    Requests read the current snapshot once and use it until they finish,
+    so a reload never mixes versions inside one request. ``version`` prefixes
+    verdict cache keys: entries scored under an older snapshot are never
+    read again and age out instead of the caches being flushed.
+    """
+    __slots__ = ('model', 'cascade', 'whitelist', 'model_version', 'scoring_version', 'version', 'loaded_at')
+
+    def __init__(self, model, cascade, whitelist):
+        self.model = model
+        self.cascade = cascade
+        self.whitelist = whitelist
+        self.model_version = model.version if model is not None else None
+        # Verdicts depend on every model that can decide them
+        self.scoring_version = self.model_version if cascade is None else \
+            f"{self.model_version}+{cascade.version}@{cascade.low:g}-{cascade.high:g}"
+        self.version = f"{self.scoring_version}:{whitelist.version}"
+        self.loaded_at = time.time()
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'model_version': self.model_version,
+            'cascade': self.cascade.describe() if self.cascade is not None else None,
+            'whitelist_version': self.whitelist.version,
+            'whitelist_domains': len(self.whitelist),
+            'loaded_at': self.loaded_at
+        }
+
+
+def load_scoring_model(path, use_artifacts=True):
+    """
+    Load a model for a running server
+
+    A stale or missing compiled artifact is compiled in memory from the JSON
+    rather than falling back to xgboost, whose thread pool does not survive
+    the fork of a pre-forked worker.
+    """
+    if not use_artifacts:
+        return load_model(path, backend='xgboost')
+    from tree_compiler import CompiledModel
+
+    compiled_path = compiled_model_path(path)
+    if os.path.exists(compiled_path):
+        compiled = CompiledModel.load(compiled_path)
+        if compiled.version == file_fingerprint(path):
+            return compiled
+    return CompiledModel.from_json(path)
+
+
+def load_snapshot(model_path, whitelist_path, use_artifacts=True, lexical_model_path=None, band=DEFAULT_BAND,
+                  use_store=True):
+    """Load a complete snapshot from disk; any failure raises instead of degrading"""
+    model = load_scoring_model(model_path, use_artifacts)
+    cascade = None
+    if lexical_model_path and os.path.exists(lexical_model_path):
+        cascade = Cascade(load_scoring_model(lexical_model_path, use_artifacts), *band)
+    whitelist = artifacts.read_whitelist(whitelist_path, use_snapshot=use_artifacts, use_store=use_store)
+    return ScoringSnapshot(model, cascade, whitelist)
+
+
+def validate_snapshot(candidate, current=None):
+    """Raise ValueError unless the candidate can score the canary URLs sensibly"""
+    if candidate.model is None:
+        raise ValueError("no model loaded")
+    names = list(getattr(candidate.model, 'feature_names', None) or [])
+    if names and names != FEATURE_ORDER:
+        raise ValueError(f"model expects features {names}, extractor produces {FEATURE_ORDER}")
+
+    matrix = URLFeatureExtractor.extract_batch(CANARY_URLS, resolve_dns=False, whitelist=candidate.whitelist)
+    scorers = [('model', candidate.model.predict_proba)]
+    if candidate.cascade is not None:
+        scorers.append(('lexical model', candidate.cascade.lexical_proba))
+    for name, predict in scorers:
+        proba = np.asarray(predict(matrix))
+        if proba.shape != (len(CANARY_URLS),) or not np.all((proba >= 0.0) & (proba <= 1.0)):
+            raise ValueError(f"{name} returned invalid probabilities for the canary URLs: {proba}")
+
+    # An empty whitelist usually means a truncated or half-written CSV
+    if current is not None and len(current.whitelist) and not len(candidate.whitelist):
+        raise ValueError(f"whitelist would shrink from {len(current.whitelist)} domains to none")
+
+
+class Reloader:
+    """
+    Rebuilds the scoring snapshot off the request path and swaps it in
+
+    ``build()`` returns a new snapshot, ``current()`` the one in use and
+    ``install(snapshot)`` swaps it. A candidate is swapped only after it
+    passes validate_snapshot; otherwise the current one stays in place.
+    Triggers: reload() (admin endpoint), SIGHUP and a polling file watcher.
+    """
+
+    def __init__(self, build, current, install, paths=()):
+        self.build = build
+        self.current = current
+        self.install = install
+        self.paths = [path for path in paths if path]
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.failures = 0
+        self.last_result = None
+
+    def reload(self, reason='manual'):
+        """Build, validate and swap; returns a result dict with status reloaded/unchanged/failed"""
+        with self._lock:
+            start = time.perf_counter()
+            previous = self.current()
+            result = {'reason': reason, 'previous_version': previous.version}
+            try:
+                candidate = self.build()
+                validate_snapshot(candidate, previous)
+            except Exception as e:
+                self.failures += 1
+                result.update(status='failed', version=previous.version, error=str(e))
+                logger.error(f"❌ Reload ({reason}) rejected, keeping {previous.version}: {e}")
+            else:
+                if candidate.version == previous.version:
+                    result.update(status='unchanged', version=previous.version)
+                else:
+                    self.install(candidate)
+                    self.reloads += 1
+                    result.update(status='reloaded', version=candidate.version)
+                    logger.info(f"🔄 Reloaded ({reason}): {previous.version} -> {candidate.version}")
+            result['seconds'] = time.perf_counter() - start
+            self.last_result = result
+            return result
+
+    def reload_in_background(self, reason):
+        threading.Thread(target=self.reload, args=(reason,), name='snapshot-reload', daemon=True).start()
+
+    def handle_signal(self, signum=signal.SIGHUP):
+        """Reload on a signal; only possible from the main thread"""
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signum, lambda received, frame: self.reload_in_background(signal.Signals(received).name))
+        return True
+
+    def _signature(self):
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return signature
+
+    def watch(self, interval=5.0):
+        """Poll the watched files; reload once a change has been stable for one interval"""
+        def run():
+            loaded = seen = self._signature()
+            while True:
+                time.sleep(interval)
+                signature = self._signature()
+                if signature != loaded and signature == seen:
+                    self.reload('file change')
+                    loaded = signature
+                seen = signature
+
+        threading.Thread(target=run, name='snapshot-watcher', daemon=True).start()
+
+    def stats(self):
+        return {
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'watched': self.paths,
+            'last': self.last_result
+        }
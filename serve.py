@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Pre-fork production launcher for flask_server.py
+
+The parent imports flask_server once, so the model, cascade and whitelist
+are loaded before any worker exists, then forks N workers that accept on
+one shared listening socket. Workers only read those structures, so their
+memory pages stay shared copy-on-write instead of being copied per worker:
+
+- gc.freeze() moves everything loaded so far into the permanent GC
+  generation; collections in a worker never write to those object headers
+- the compiled model is a few flat NumPy arrays that are never written, so
+  its buffers stay shared pages (the xgboost backend is avoided: its OpenMP
+  thread pool does not survive a fork, so a missing or stale compiled full
+  or lexical model is rebuilt in a separate process first)
+- DNS answers and verdicts are shared between workers through the SQLite
+  cache in URL_SCANNER_CACHE_DB (default cache/url_scanner.db)
+
+SQLite connections, the decision log and the micro-batcher threads are
+opened in each worker after fork; worker N writes logs/decisions.N.jsonl.
+A worker that dies is replaced. SIGTERM or Ctrl+C stops all of them, and
+SIGHUP makes every worker hot-reload the model and whitelist (a reloaded
+snapshot is private to each worker until the next restart).
+
+Usage:
+    python serve.py --workers 4 --port 5000
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+logger = logging.getLogger('serve')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DB = os.path.join('cache', 'url_scanner.db')
+
+
+def served_model_paths():
+    """Every JSON model flask_server loads: the full model, and the lexical model when the cascade is on"""
+    from cascade import DEFAULT_LEXICAL_MODEL
+
+    paths = ['url_xgb_model.json']
+    if os.environ.get('URL_SCANNER_CASCADE', '1') != '0':
+        paths.append(os.environ.get('URL_SCANNER_LEXICAL_MODEL', DEFAULT_LEXICAL_MODEL))
+    return [path for path in paths if os.path.exists(path)]
+
+
+def compiled_is_current(model_path):
+    from model_runtime import compiled_model_path, file_fingerprint
+    from tree_compiler import CompiledModel
+
+    compiled_path = compiled_model_path(model_path)
+    try:
+        return os.path.exists(compiled_path) and \
+            CompiledModel.load(compiled_path).version == file_fingerprint(model_path)
+    except Exception:
+        return False  # unreadable artifact: rebuild it
+
+
+def ensure_compiled_models(model_paths):
+    """Rebuild the compiled artifacts in a child process when any of them is missing or stale"""
+    stale = [path for path in model_paths if not compiled_is_current(path)]
+    if not stale:
+        return
+    logger.info(f"🔧 Compiling {', '.join(stale)} before forking")
+    subprocess.run([sys.executable, os.path.join(ROOT, 'flask_server.py'), '--build-artifacts'],
+                   check=True, env=dict(os.environ, URL_SCANNER_DECISION_LOG='', URL_SCANNER_CACHE_DB=''))
+
+
+def stop_worker(signum, frame):
+    # The parent forwards Ctrl+C as SIGTERM too; only the first signal counts
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sys.exit(0)
+
+
+def serve_worker(server, worker):
+    """Body of a forked worker; never returns into the parent's code"""
+    status = 1
+    try:
+        signal.signal(signal.SIGTERM, stop_worker)
+        signal.signal(signal.SIGINT, stop_worker)
+        import flask_server
+
+        gc.enable()
+        try:
+            flask_server.open_process_resources(worker)
+            server.serve_forever()
+        except SystemExit:
+            pass
+        finally:
+            flask_server.close_process_resources()
+        status = 0
+    except BaseException as e:
+        logger.error(f"❌ Worker {worker} failed: {e!r}")
+    finally:
+        os._exit(status)
+
+
+def spawn(server, worker):
+    pid = os.fork()
+    if pid == 0:
+        serve_worker(server, worker)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-fork launcher for the URL scanner backend')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--cache-db', default=os.environ.get('URL_SCANNER_CACHE_DB', DEFAULT_CACHE_DB),
+                        help="SQLite file sharing DNS answers and verdicts between workers ('' disables)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    os.chdir(ROOT)
+    os.environ['URL_SCANNER_PREFORK'] = '1'
+    os.environ['URL_SCANNER_CACHE_DB'] = args.cache_db
+    if args.cache_db and os.path.dirname(args.cache_db):
+        os.makedirs(os.path.dirname(args.cache_db), exist_ok=True)
+    if os.environ.get('URL_SCANNER_ARTIFACTS', '1') != '0':
+        ensure_compiled_models(served_model_paths())
+
+    # Nothing allocated while loading is garbage; skip collections until it is frozen
+    gc.disable()
+    import flask_server
+    from werkzeug.serving import make_server
+    from tree_compiler import CompiledModel
+
+    snap = flask_server.snapshot
+    models = {'model': snap.model, 'lexical model': snap.cascade.model if snap.cascade is not None else None}
+    for name, model in models.items():
+        if model is not None and not isinstance(model, CompiledModel):
+            logger.warning(f"⚠️  Workers share the xgboost backend for the {name}; "
+                           "run flask_server.py --build-artifacts")
+    server = make_server(args.host, args.port, flask_server.app, threaded=True)
+    gc.freeze()
+
+    workers = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reload(signum, frame):
+        # Each worker rebuilds and validates its own snapshot
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, reload)
+
+    for worker in range(args.workers):
+        workers[spawn(server, worker)] = worker
+    print(f"🚀 {args.workers} workers serving on http://{args.host}:{args.port} (parent pid {os.getpid()})")
+    print(f"💾 Shared cache: {args.cache_db or 'disabled'}")
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        worker = workers.pop(pid, None)
+        if worker is None or stopping:
+            continue
+        logger.warning(f"⚠️  Worker {worker} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        time.sleep(1)
+        workers[spawn(server, worker)] = worker
+
+    server.server_close()
+    print("👋 All workers stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""ASGI server: malformed bodies and HEAD requests get the same answers as the Flask app"""
+import json
+
+import flask_server
+from testutils import asgi_request
+
+
+def test_unreadable_body_is_bad_request():
+    client = flask_server.app.test_client()
+    for body in (b'', b'{"url": ', b'\xff\xfe'):
+        status, payload = asgi_request('POST', '/check-url', body)
+        assert status == 400 and json.loads(payload)['error'] == 'Missing URL in request'
+        response = client.post('/check-url', data=body, content_type='application/json')
+        assert response.status_code == 400 and response.json['error'] == 'Missing URL in request'
+
+        status, payload = asgi_request('POST', '/check-urls', body)
+        assert status == 400 and json.loads(payload)['error'] == 'Missing URLs in request'
+        assert client.post('/check-urls', data=body, content_type='application/json').status_code == 400
+
+
+def test_head_has_no_body():
+    status, body = asgi_request('HEAD', '/health')
+    assert status == 200 and body == b''
+    status, body = asgi_request('HEAD', '/missing')
+    assert status == 404 and body == b''
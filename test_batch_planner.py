@@ -0,0 +1,29 @@
+"""Batch planner: /check-urls, deduplicated by URL and domain, answers like /check-url"""
+import flask_server
+from feature_extractor import URLFeatureExtractor
+from scoring_snapshot import ScoringSnapshot
+from whitelist_index import WhitelistIndex
+
+
+def test_check_url_matches_check_urls():
+    urls = ['https://www.example.com/login', 'http://secure-update.ru/verify?id=1', 'http://mail.example.com/',
+            'http://192.168.1.5/admin.php', 'https://docs.github.com/en', 'http://secure-update.ru/verify?id=1',
+            'http://free-bonus.win/claim', 'https://www.example.com/login', 'not a url']
+    for url in urls:
+        URLFeatureExtractor.dns_cache.set(URLFeatureExtractor.normalize_domain(url), (1, 1, 1, 2), 3600)
+
+    previous = flask_server.snapshot
+    flask_server.install_snapshot(ScoringSnapshot(previous.model, previous.cascade, WhitelistIndex({'example.com'})))
+    client = flask_server.app.test_client()
+    try:
+        flask_server.verdict_cache.clear()
+        single = [client.post('/check-url', json={'url': url, 'threshold': 0.4}).json for url in urls]
+        flask_server.verdict_cache.clear()  # the batch must compute its verdicts, not read these
+        batch = client.post('/check-urls', json={'urls': urls, 'threshold': 0.4}).json
+    finally:
+        flask_server.install_snapshot(previous)
+
+    assert batch['results'] == single
+    assert [r['status'] for r in single[:3]] == ['whitelisted', 'success', 'whitelisted']
+    assert batch['total_checked'] == len(urls)
+    assert batch['malicious_count'] == sum(r['is_malicious'] for r in single)
@@ -0,0 +1,46 @@
+"""Benchmark gate: baselines are scaled by the reference workload timed next to each stage"""
+from bench_suite import compare, confirm, REFERENCE_STAGE
+
+BASELINE = {
+    'per_call_us': {REFERENCE_STAGE: 2.0, 'model.batch': 36.4, 'lexical.url_length': 0.2},
+    'reference_us': {'model.batch': 2.0, 'lexical.url_length': 2.0}
+}
+
+
+def run(batch_us, url_length_us, batch_reference_us=2.0):
+    return {
+        'per_call_us': {REFERENCE_STAGE: 2.0, 'model.batch': batch_us, 'lexical.url_length': url_length_us},
+        'reference_us': {'model.batch': batch_reference_us, 'lexical.url_length': 2.0}
+    }
+
+
+def test_slow_machine_moment_is_not_a_regression():
+    # model.batch ran 34% slower, but so did the reference timed next to it
+    assert compare(run(48.7, 0.2, batch_reference_us=2.7), BASELINE, 0.3, 2.0) == []
+
+
+def test_real_regression_fails():
+    assert [stage for stage, _, _ in compare(run(48.7, 0.2), BASELINE, 0.3, 2.0)] == ['model.batch']
+
+
+def test_microsecond_noise_is_ignored():
+    # 0.2 -> 0.5 us is 150% slower but below the minimum delta
+    assert compare(run(36.4, 0.5), BASELINE, 0.3, 2.0) == []
+    assert compare(run(36.4, 2.5), BASELINE, 0.3, 2.0)[0][0] == 'lexical.url_length'
+
+
+def test_rerun_judges_each_stage_on_its_own():
+    regressions = compare(run(48.7, 2.5), BASELINE, 0.3, 2.0)
+    assert [stage for stage, _, _ in regressions] == ['model.batch', 'lexical.url_length']
+    # model.batch is still slow when rerun, lexical.url_length was a slow moment
+    confirmed = confirm(regressions, [run(49.0, 0.2)], BASELINE, 0.3, 2.0)
+    assert confirmed == [('model.batch', 36.4, 49.0)]
+    # A stage that was fine the first time is not failed by the rerun alone
+    assert confirm(regressions[:1], [run(36.4, 2.5)], BASELINE, 0.3, 2.0) == []
+
+
+def test_most_reruns_decide():
+    regressions = compare(run(48.7, 0.2), BASELINE, 0.3, 2.0)
+    reruns = [run(36.4, 0.2), run(48.9, 0.2), run(49.1, 0.2)]
+    assert confirm(regressions, reruns, BASELINE, 0.3, 2.0) == [('model.batch', 36.4, 49.1)]
+    assert confirm(regressions, reruns[:2], BASELINE, 0.3, 2.0) == []
@@ -0,0 +1,23 @@
+"""Bulk scan: malformed input rows and failing batches become error records, the rest are scored"""
+import bulk_scan
+from model_runtime import load_model
+from testutils import FailOnLength, FixedResolver, install_resolver
+
+
+def test_read_rows_skips_nothing(tmp_path):
+    path = tmp_path / 'corpus.jsonl'
+    path.write_text('{"url": "http://a.com", "label": 1}\n"http://b.com"\n[1, 2]\n{not json\n{"url": "http://c.com"}\n')
+    rows = list(bulk_scan.read_rows(str(path)))
+    assert rows == [(0, 'http://a.com', 1), (1, None, None), (2, None, None), (3, None, None), (4, 'http://c.com', None)]
+
+
+def test_failed_chunk_is_retried_row_by_row(monkeypatch):
+    install_resolver(monkeypatch, FixedResolver())
+    bad = 'http://bad-row.example.com/' + 'x' * 40
+    chunk = [(0, 'http://good-one.example.com/a', None), (1, bad, None), (2, None, None),
+             (3, 'http://good-two.example.org/b', 'benign')]
+    monkeypatch.setattr(bulk_scan, '_model', FailOnLength(load_model('url_xgb_model.json'), len(bad)))
+    records = bulk_scan.score_chunk(chunk, 0.4)
+    assert [r['row'] for r in records] == [0, 1, 2, 3]
+    assert [r['status'] for r in records] == ['success', 'error', 'error', 'success']
+    assert records[3]['label'] == 'benign'
@@ -0,0 +1,46 @@
+"""Cascade: URLs the lexical stage decides are neither resolved nor rescored, and its report
+keeps per-class recall apart from accuracy"""
+import numpy as np
+
+import flask_server
+from cascade import Cascade, LEXICAL_FEATURES
+from cascade_report import band_report
+from scoring_snapshot import ScoringSnapshot
+
+
+class LongIsMalicious:
+    """Lexical model stand-in: confident on long URLs, undecided on short ones"""
+    version = 'test-lexical'
+
+    def predict_proba(self, matrix):
+        return np.where(matrix[:, LEXICAL_FEATURES.index('url_len')] > 40, 0.99, 0.5)
+
+
+def test_dns_candidates_skips_lexical_verdicts(monkeypatch):
+    snap = flask_server.snapshot
+    monkeypatch.setattr(flask_server, 'snapshot',
+                        ScoringSnapshot(snap.model, Cascade(LongIsMalicious()), snap.whitelist))
+    long_url = 'http://lexical-only.example.com/' + 'a' * 40
+    short_url = 'http://needs-dns.example.com/'
+    assert flask_server.dns_candidates([long_url, short_url, short_url, None]) == [short_url]
+    # The lexical verdict is reused by the scoring that follows
+    assert flask_server.cached_result(flask_server.verdict_key(long_url, flask_server.snapshot),
+                                      long_url, 0.5)['confidence'] == 0.99
+
+
+def test_report_separates_class_recall_from_accuracy():
+    lexical = np.array([0.95, 0.5, 0.02, 0.5])
+    full = np.array([0.9, 0.2, 0.6, 0.1])
+    domains = ['a.com', 'b.com', 'c.com', 'd.com']
+    scored = np.array([True, True, True, True])
+
+    # A malicious-only corpus measures malicious-class recall, not accuracy
+    only_malicious = band_report((0.1, 0.9), lexical, full, np.ones(4, dtype=int), domains, scored, 0.4)
+    assert only_malicious['full_model'] == {'malicious_recall_pct': 50.0, 'benign_recall_pct': None,
+                                            'accuracy_pct': None}
+    assert only_malicious['cascade']['malicious_recall_pct'] == 25.0
+
+    labels = np.array([1, 1, 0, 0])
+    both = band_report((0.1, 0.9), lexical, full, labels, domains, scored, 0.4)
+    assert both['full_model'] == {'malicious_recall_pct': 50.0, 'benign_recall_pct': 50.0, 'accuracy_pct': 50.0}
+    assert both['cascade'] == {'malicious_recall_pct': 50.0, 'benign_recall_pct': 100.0, 'accuracy_pct': 75.0}
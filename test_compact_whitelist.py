@@ -0,0 +1,49 @@
+"""Compact whitelist store: same answers and version as the in-memory set"""
+import os
+from compact_whitelist import CompactWhitelist, build_store, open_store, FENCE_STRIDE
+from whitelist_index import WhitelistIndex
+
+
+def make_domains(count):
+    return {f"site{i}.example{i % 7}.com" for i in range(count)}
+
+
+def test_store_matches_set(tmp_path):
+    for count in (0, 1, FENCE_STRIDE - 1, FENCE_STRIDE, FENCE_STRIDE + 1, 1000):
+        domains = make_domains(count) | ({'xn--bcher-kva.de', 'bücher.de'} if count else set())
+        path = str(tmp_path / f'{count}.wlstore')
+        version = build_store(domains, path)
+        store = CompactWhitelist(path)
+
+        assert version == store.version == WhitelistIndex(domains).version
+        assert len(store) == len(domains)
+        assert set(store) == domains
+        assert all(domain in store for domain in domains)
+        probes = ['example0.com', 'site1.example1.co', 'zzz.com', '', 'site', 'a.site0.example0.com']
+        assert all(domain not in store for domain in probes)
+
+
+def test_index_over_store_matches_set(tmp_path):
+    domains = make_domains(500) | {'google.com'}
+    path = str(tmp_path / 'whitelist.wlstore')
+    build_store(domains, path)
+    over_set = WhitelistIndex(domains)
+    over_store = WhitelistIndex(CompactWhitelist(path))
+
+    queries = ['google.com', 'docs.google.com', 'www.site3.example3.com', 'evil.site3.example3.com',
+               'login.google.com.evil.ru', 'site3.example3.com.evil.ru', 'localhost', 'com']
+    assert [over_store.match(q) for q in queries] == [over_set.match(q) for q in queries]
+    assert over_store.domains.stats()['lookups'] > 0
+
+
+def test_open_store_rejects_stale_or_missing(tmp_path):
+    path = str(tmp_path / 'whitelist.wlstore')
+    assert open_store(path) is None
+    build_store({'example.com'}, path, source_stamp='100:5')
+    assert open_store(path, source_stamp='100:5') is not None
+    assert open_store(path, source_stamp='101:5') is None
+
+    with open(path, 'r+b') as f:
+        f.write(b'garbage!')
+    assert open_store(path) is None
+    os.remove(path)
@@ -0,0 +1,68 @@
+"""Record/replay resolvers must reproduce live features exactly, offline; sync lookups reuse one event loop"""
+import asyncio
+
+from dns_resolvers import RecordedAnswer, RecordingResolver, ReplayResolver
+from feature_extractor import URLFeatureExtractor
+from model_runtime import feature_matrix
+from testutils import FixedResolver, install_resolver
+
+URLS = [
+    'http://paypal-login.example.com/verify',
+    'https://mail.example.org/inbox',
+    'http://192.168.10.20/bank/confirm',
+    'no-records.example.net',
+]
+
+
+def extract_all():
+    URLFeatureExtractor.dns_cache.clear()
+    return [URLFeatureExtractor(url).extract_features() for url in URLS]
+
+
+def test_replay_matches_recorded_features(tmp_path):
+    live = FixedResolver({
+        ('paypal-login.example.com', 'A'): RecordedAnswer(3, 120),
+        ('paypal-login.example.com', 'NS'): RecordedAnswer(2, 86400),
+        ('mail.example.org', 'A'): RecordedAnswer(1, 60),
+        ('mail.example.org', 'MX'): RecordedAnswer(2, 300),
+    })
+    snapshot = str(tmp_path / 'corpus.dns')
+    previous = URLFeatureExtractor.resolver
+    try:
+        recorder = RecordingResolver(snapshot, live)
+        URLFeatureExtractor.set_resolver(recorder)
+        recorded = extract_all()
+        recorder.close()
+
+        replay = ReplayResolver(snapshot)
+        URLFeatureExtractor.set_resolver(replay)
+        assert extract_all() == recorded
+        URLFeatureExtractor.dns_cache.clear()
+        assert URLFeatureExtractor.extract_batch(URLS).tolist() == feature_matrix(recorded).tolist()
+        assert replay.misses == 0
+        assert recorded[0]['ip_count'] == 3 and recorded[3]['has_a'] == 0
+        assert asyncio.run(replay.query('unseen.example', 'A')) is None
+    finally:
+        URLFeatureExtractor.set_resolver(previous)
+
+
+def test_sync_lookups_share_one_event_loop(monkeypatch):
+    loops = set()
+
+    class LoopRecorder(FixedResolver):
+        async def query(self, domain, rdtype):
+            loops.add(asyncio.get_running_loop())
+            return await super().query(domain, rdtype)
+
+    install_resolver(monkeypatch, LoopRecorder())
+    for domain in ('one.example', 'two.example', 'three.example'):
+        URLFeatureExtractor(f'http://{domain}/').get_dns_info()
+    URLFeatureExtractor.extract_batch(['http://four.example/', 'http://five.example/'])
+    assert len(loops) == 1 and not loops.pop().is_closed()
+
+    async def inside_a_loop():
+        return URLFeatureExtractor('http://six.example/').get_dns_info()
+
+    # A caller inside a running loop is served from a helper thread's loop
+    assert asyncio.run(inside_a_loop()) == (0, 0, 0, 0)
+    assert len(loops) == 1
@@ -0,0 +1,60 @@
+"""Domain memo: records match the per-URL methods, DNS copies follow the DNS cache, eviction is bounded"""
+from domain_memo import DomainMemo
+from feature_extractor import URLFeatureExtractor
+from ttl_cache import TTLCache
+from whitelist_index import WhitelistIndex
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_records_match_extractor_methods():
+    whitelist = WhitelistIndex({'example.com', 'bank.co.uk'})
+    memo = DomainMemo(TTLCache())
+    urls = ['https://www.example.com/', 'http://mail.example.com', 'http://a.b.bank.co.uk/x', 'http://localhost:8080',
+            'http://192.168.0.1/login', 'http://evil.example.com.ru/', 'http://trailing.dot./']
+    for url in urls:
+        extractor = URLFeatureExtractor(url, whitelist)
+        record = memo.get(extractor.domain, whitelist)
+        assert record.whitelist_match == whitelist.match(extractor.domain)
+        assert (record.subdomain_count, record.tld_length) == (extractor.subdomain_count(), extractor.tld_length())
+        assert memo.get(extractor.domain, whitelist) is record
+
+    # Another whitelist version is another key
+    assert memo.get('example.com', WhitelistIndex(set())).whitelist_match is None
+    assert memo.stats()['hits'] == len(urls)
+
+
+def test_dns_copy_follows_dns_cache():
+    clock = FakeClock()
+    dns_cache = TTLCache(clock=clock)
+    memo = DomainMemo(dns_cache, clock=clock)
+    record = memo.get('example.org', WhitelistIndex(set()))
+    assert memo.dns(record) is None
+
+    memo.remember_dns(record, (1, 1, 1, 2), ttl=60)
+    assert memo.dns(record) == (1, 1, 1, 2)
+    clock.now = 61
+    assert memo.dns(record) is None
+
+    memo.remember_dns(record, (1, 0, 1, 1), ttl=60)
+    dns_cache.clear()  # e.g. set_resolver
+    assert memo.dns(record) is None
+    assert (memo.dns_hits, memo.dns_misses) == (1, 3)
+
+
+def test_eviction_keeps_recently_used():
+    memo = DomainMemo(TTLCache(), maxsize=2)
+    whitelist = WhitelistIndex(set())
+    a = memo.get('a.com', whitelist)
+    memo.get('b.com', whitelist)
+    assert memo.get('a.com', whitelist) is a
+    memo.get('c.com', whitelist)
+    assert len(memo) == 2 and memo.evictions == 1
+    assert memo.get('a.com', whitelist) is a
+    assert memo.stats()['misses'] == 3
@@ -0,0 +1,65 @@
+"""Feature store: stored rows equal fresh extraction, and reruns only extract what is missing"""
+import argparse
+import os
+import numpy as np
+from feature_extractor import URLFeatureExtractor
+from feature_store import FeatureStore, add_arguments, check_arguments, materialize, read_whitelist
+
+URLS = ['https://www.example.com/login', 'http://192.168.1.5/admin.php', 'http://secure-update.ru/verify?id=1',
+        'https://docs.github.com/en', 'http://free-bonus.win/claim']
+
+
+def test_materialize_is_incremental(tmp_path):
+    whitelist = str(tmp_path / 'missing-whitelist.csv')
+    store = FeatureStore(str(tmp_path / 'store'))
+    version, extracted = materialize(store, URLS[:3], whitelist, resolve_dns=False)
+    assert extracted == 3
+    assert materialize(store, URLS[:3] + URLS[:3], whitelist, resolve_dns=False) == (version, 0)
+    assert materialize(store, URLS, whitelist, resolve_dns=False, part_rows=1) == (version, 2)
+
+    # Reopened from disk, in any order, the rows match a fresh extraction
+    reopened = FeatureStore(str(tmp_path / 'store'))
+    assert len(reopened.parts) == 3
+    order = URLS[::-1]
+    expected = URLFeatureExtractor.extract_batch(order, resolve_dns=False)
+    assert np.array_equal(reopened.matrix(order, version), expected)
+
+    # Another feature version is a different key: everything is extracted again
+    snapshot = tmp_path / 'empty.dns'
+    snapshot.write_text('')
+    resolver = URLFeatureExtractor.resolver
+    try:
+        other, extracted = materialize(reopened, URLS, whitelist, resolve_dns=True,
+                                       dns_mode='replay', dns_snapshot=str(snapshot))
+    finally:
+        URLFeatureExtractor.set_resolver(resolver)
+    assert other != version and extracted == len(URLS)
+
+
+def test_unindexed_part_is_ignored(tmp_path):
+    path = str(tmp_path / 'store')
+    store = FeatureStore(path)
+    store.add(URLS[:2], URLFeatureExtractor.extract_batch(URLS[:2], resolve_dns=False), 'v1')
+    # An interrupted write leaves the matrix without its index
+    np.save(os.path.join(path, 'part-00001.npy'), np.zeros((1, 12), dtype=np.float32))
+
+    reopened = FeatureStore(path)
+    assert reopened.missing(URLS, 'v1') == URLS[2:]
+    assert reopened.add(URLS[2:3], np.ones((1, 12), dtype=np.float32), 'v1') == 'part-00002'
+
+
+def test_benign_corpus_is_refused_as_whitelist():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--benign', default='raw_datasets/benign-urls.csv')
+    add_arguments(parser)
+    args = parser.parse_args([])
+    check_arguments(parser, args)
+    assert len(read_whitelist(args.whitelist)) == 0
+
+    args = parser.parse_args(['--whitelist', './raw_datasets/../raw_datasets/benign-urls.csv'])
+    try:
+        check_arguments(parser, args)
+    except SystemExit as e:
+        assert e.code == 2
+    else:
+        raise AssertionError('the benign corpus was accepted as the whitelist')
@@ -0,0 +1,23 @@
+"""Batch scoring: one URL that cannot be scored must not fail the others"""
+import flask_server
+from testutils import FailOnLength, FixedResolver, install_resolver
+
+
+def test_failed_batch_only_fails_bad_url(monkeypatch):
+    install_resolver(monkeypatch, FixedResolver())
+    bad = 'http://bad-row.example.com/' + 'x' * 40
+    urls = ['http://good-one.example.com/a', bad, 'http://good-two.example.org/b']
+    pending = [(i, url, None, flask_server.URLFeatureExtractor.normalize_domain(url)) for i, url in enumerate(urls)]
+    results, rows = [None] * len(urls), {}
+    model = FailOnLength(flask_server.snapshot.model, len(bad))
+    flask_server.model_batch(model, pending, results, rows, 0.5, flask_server.snapshot.whitelist)
+    assert [r['status'] for r in results] == ['success', 'error', 'success']
+
+
+def test_surrogate_url_does_not_fail_batch(monkeypatch):
+    install_resolver(monkeypatch, FixedResolver())
+    client = flask_server.app.test_client()
+    response = client.post('/check-urls', data='{"urls": ["http://\\ud800.com/x", "http://ok.com"]}',
+                           content_type='application/json')
+    assert response.status_code == 200
+    assert [r['status'] for r in response.json['results']] == ['success', 'success']
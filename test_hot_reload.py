@@ -0,0 +1,84 @@
+"""Hot reload: validation gates the swap, extractors keep the whitelist they bound, and the admin endpoint needs its token"""
+import json
+import os
+import numpy as np
+import flask_server
+from feature_extractor import URLFeatureExtractor, FEATURE_ORDER
+from scoring_snapshot import ScoringSnapshot, Reloader, load_scoring_model
+from testutils import asgi_request
+from whitelist_index import WhitelistIndex
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'url_xgb_model.json')
+
+
+class BrokenModel:
+    version = 'broken'
+    feature_names = []
+
+    def predict_proba(self, matrix):
+        return np.full(len(matrix), np.nan, dtype=np.float32)
+
+
+def make_reloader(initial, candidates):
+    state = {'snapshot': initial}
+    reloader = Reloader(lambda: candidates.pop(0), lambda: state['snapshot'],
+                        lambda new: state.update(snapshot=new))
+    return reloader, state
+
+
+def test_reload_swaps_only_validated_snapshots():
+    model = load_scoring_model(MODEL_PATH)
+    current = ScoringSnapshot(model, None, WhitelistIndex({'example.com'}))
+    refreshed = ScoringSnapshot(model, None, WhitelistIndex({'example.com', 'example.org'}))
+    broken = ScoringSnapshot(BrokenModel(), None, WhitelistIndex({'example.com'}))
+    emptied = ScoringSnapshot(model, None, WhitelistIndex(set()))
+    reloader, state = make_reloader(current, [broken, emptied, refreshed, refreshed])
+
+    assert reloader.reload()['status'] == 'failed'
+    assert reloader.reload()['status'] == 'failed'
+    assert state['snapshot'] is current
+
+    result = reloader.reload()
+    assert result['status'] == 'reloaded'
+    assert state['snapshot'] is refreshed
+    # Verdict cache keys are prefixed with the version, so old entries are never read again
+    assert result['version'] != result['previous_version']
+
+    assert reloader.reload()['status'] == 'unchanged'
+    assert (reloader.reloads, reloader.failures) == (1, 2)
+
+
+def test_extractor_keeps_bound_whitelist():
+    previous = URLFeatureExtractor.WHITELIST_INDEX
+    try:
+        URLFeatureExtractor.set_whitelist({'example.com'})
+        extractor = URLFeatureExtractor('https://www.example.com/login')
+        URLFeatureExtractor.set_whitelist(set())
+        assert extractor.is_whitelisted()
+        assert not URLFeatureExtractor('https://www.example.com/login').is_whitelisted()
+
+        # Keywords only count outside the whitelist
+        column = FEATURE_ORDER.index('suspicious_total')
+        urls = ['https://www.example.com/login/verify']
+        bound = URLFeatureExtractor.extract_batch(urls, resolve_dns=False, whitelist=WhitelistIndex({'example.com'}))
+        installed = URLFeatureExtractor.extract_batch(urls, resolve_dns=False)
+        assert bound[0, column] == 0 and installed[0, column] > 0
+    finally:
+        URLFeatureExtractor.set_whitelist_index(previous)
+
+
+def test_admin_reload_needs_token(monkeypatch):
+    client = flask_server.app.test_client()
+    monkeypatch.setattr(flask_server, 'ADMIN_TOKEN', None)
+    # No token configured: refused even from localhost
+    assert client.post('/admin/reload').status_code == 403
+    assert asgi_request('POST', '/admin/reload')[0] == 403
+
+    monkeypatch.setattr(flask_server, 'ADMIN_TOKEN', 's3cret')
+    monkeypatch.setattr(flask_server, 'reload_payload', lambda: ({'status': 'unchanged'}, 200))
+    assert client.post('/admin/reload', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert asgi_request('POST', '/admin/reload', headers=[(b'authorization', b'Bearer wrong')])[0] == 403
+    status, body = asgi_request('POST', '/admin/reload', headers=[(b'authorization', b'Bearer s3cret')])
+    assert status == 200 and json.loads(body)['status'] == 'unchanged'
+    response = client.post('/admin/reload', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200 and response.json['status'] == 'unchanged'
@@ -0,0 +1,106 @@
+"""
+Parity tests for the NumPy inference paths (URLModel and the compiled tree
+evaluator) against the original DataFrame + XGBClassifier.predict_proba path
+"""
+import os
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from feature_extractor import FEATURE_ORDER
+from model_runtime import URLModel, feature_matrix, invalid_rows
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'url_xgb_model.json')
+
+
+def sample_feature_dicts(n=2000, seed=0):
+    """Feature dicts with realistic ranges and the same value types extract_features returns"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        has_a = int(rng.integers(0, 2))
+        rows.append({
+            'url_len': int(rng.integers(5, 400)),
+            'dot_count': int(rng.integers(0, 12)),
+            'hyphen_count': int(rng.integers(0, 10)),
+            'has_ip': int(rng.integers(0, 2)),
+            'suspicious_total': int(rng.integers(0, 8)) * 2,
+            'subdomain_count': int(rng.integers(0, 5)),
+            'tld_length': int(rng.integers(0, 12)),
+            'url_entropy': float(rng.uniform(1.5, 6.0)),
+            'has_a': has_a,
+            'has_mx': int(rng.integers(0, 2)),
+            'has_ns': int(rng.integers(0, 2)),
+            'ip_count': int(rng.integers(1, 9)) * has_a
+        })
+    return rows
+
+
+def dataframe_probability(classifier, feat_dict):
+    df = pd.DataFrame([[feat_dict[f] for f in FEATURE_ORDER]], columns=FEATURE_ORDER)
+    return classifier.predict_proba(df)[0][1]
+
+
+def test_single_rows_bit_identical():
+    classifier = xgb.XGBClassifier()
+    classifier.load_model(MODEL_PATH)
+    model = URLModel(MODEL_PATH)
+
+    for feat_dict in sample_feature_dicts(300):
+        expected = dataframe_probability(classifier, feat_dict)
+        actual = model.predict_proba(feature_matrix([feat_dict]))[0]
+        assert actual.tobytes() == np.float32(expected).tobytes()
+
+
+def test_batch_bit_identical():
+    classifier = xgb.XGBClassifier()
+    classifier.load_model(MODEL_PATH)
+    model = URLModel(MODEL_PATH)
+
+    feat_dicts = sample_feature_dicts()
+    expected = np.array([dataframe_probability(classifier, f) for f in feat_dicts], dtype=np.float32)
+    actual = model.predict_proba(feature_matrix(feat_dicts))
+    assert actual.dtype == np.float32
+    assert actual.tobytes() == expected.tobytes()
+
+
+def test_invalid_rows_flags_missing_features():
+    feat_dicts = sample_feature_dicts(3)
+    feat_dicts[1]['url_entropy'] = float('nan')
+    feat_dicts[2]['has_mx'] = None
+    assert invalid_rows(feature_matrix(feat_dicts)).tolist() == [False, True, True]
+
+
+def test_compiled_model_matches_xgboost(tmp_path):
+    from tree_compiler import CompiledModel
+
+    artifact = tmp_path / 'model.npz'
+    CompiledModel.from_json(MODEL_PATH).save(artifact)
+    compiled = CompiledModel.load(artifact)
+    model = URLModel(MODEL_PATH)
+
+    matrix = feature_matrix(sample_feature_dicts())
+    matrix[::7, 7] = np.nan  # exercise default directions
+    matrix[::11, 8:] = np.nan
+
+    expected_margin = model.booster.inplace_predict(matrix, predict_type='margin', validate_features=False)
+    np.testing.assert_allclose(compiled.predict_margin(matrix), expected_margin, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(compiled.predict_proba(matrix), model.predict_proba(matrix), rtol=0, atol=1e-6)
+    assert compiled.version == model.version
+
+
+def test_compiled_model_honours_best_iteration(tmp_path):
+    from tree_compiler import CompiledModel
+
+    matrix = feature_matrix(sample_feature_dicts(n=600, seed=1))
+    labels = (matrix[:, 0] + np.random.default_rng(1).normal(0, 60, len(matrix)) > 200).astype(int)
+    classifier = xgb.XGBClassifier(n_estimators=200, max_depth=3, learning_rate=0.3, early_stopping_rounds=5)
+    classifier.fit(matrix[:400], labels[:400], eval_set=[(matrix[400:], labels[400:])], verbose=False)
+    path = str(tmp_path / 'early_stopped.json')
+    classifier.save_model(path)
+
+    model = URLModel(path)
+    compiled = CompiledModel.from_json(path)
+    best_iteration = int(model.booster.attr('best_iteration'))
+    assert best_iteration + 1 < model.booster.num_boosted_rounds()
+    assert len(compiled.roots) == best_iteration + 1
+    np.testing.assert_allclose(compiled.predict_proba(matrix), model.predict_proba(matrix), rtol=0, atol=1e-6)
@@ -0,0 +1,98 @@
+"""The single-pass lexical engine must reproduce the per-feature methods exactly"""
+import csv
+import itertools
+import math
+import random
+
+import numpy as np
+
+from dns_resolvers import RecordedAnswer
+from feature_extractor import URLFeatureExtractor, FEATURE_ORDER
+from lexical_engine import KeywordAutomaton, LexicalEngine
+from testutils import FixedResolver
+
+EDGE_CASES = [
+    '',
+    'a',
+    'http://192.168.0.1/login',
+    'http://1.2.3/verify-account',
+    'HTTPS://SECURE-LOGIN.Example.COM/Update?Free=Gift',
+    'http://loginlogin.example.com/passwordpassword/signinsignin',
+    'http://winwinwin.example.com/' + 'cash' * 40,
+    'http://xn--80ak6aa92e.com/İnvoice/ßecure',
+    'http://example.com:8080/a.b.c.d-e-f',
+    'www.bank-confirm.co.uk',
+    'http://١٢٣.٤٥٦.٧٨٩.٠/prize',
+    'http://\ud800.com/verify',  # a lone surrogate is valid JSON
+]
+
+
+def corpus_sample(count=2000):
+    with open('raw_datasets/malicious-urls.csv', newline='', encoding='utf-8', errors='replace') as f:
+        return [row['url'] for row in itertools.islice(csv.DictReader(f), count)]
+
+
+def reference_features(extractor, dns_info):
+    """FEATURE_ORDER features from the per-feature methods"""
+    has_a, has_mx, has_ns, ip_count = dns_info
+    return {
+        'url_len': extractor.url_length(),
+        'dot_count': extractor.count_dots(),
+        'hyphen_count': extractor.count_hyphens(),
+        'has_ip': extractor.has_ip(),
+        'suspicious_total': extractor.count_suspicious_words(),
+        'subdomain_count': extractor.subdomain_count(),
+        'tld_length': extractor.tld_length(),
+        'url_entropy': extractor.url_entropy(),
+        'has_a': has_a,
+        'has_mx': has_mx,
+        'has_ns': has_ns,
+        'ip_count': ip_count,
+    }
+
+
+def assert_same_features(actual, expected, url):
+    for name in FEATURE_ORDER:
+        if name == 'url_entropy':
+            # Summation order differs (set vs histogram order), so allow rounding noise
+            assert math.isclose(actual[name], expected[name], rel_tol=1e-12, abs_tol=1e-12), (url, name)
+        else:
+            assert actual[name] == expected[name], (url, name, actual[name], expected[name])
+
+
+def test_extract_features_matches_reference():
+    previous = URLFeatureExtractor.resolver
+    URLFeatureExtractor.set_resolver(FixedResolver(default={'A': RecordedAnswer(2, 300)}))
+    whitelist = URLFeatureExtractor.WHITELIST
+    URLFeatureExtractor.set_whitelist({'bank-confirm.co.uk', 'example.com'})
+    try:
+        urls = EDGE_CASES + corpus_sample()
+        rows = []
+        for url in urls:
+            extractor = URLFeatureExtractor(url)
+            features = extractor.extract_features()
+            assert_same_features(features, reference_features(URLFeatureExtractor(url), extractor.get_dns_info()), url)
+            rows.append([features[name] for name in FEATURE_ORDER])
+
+        URLFeatureExtractor.dns_cache.clear()
+        batch = URLFeatureExtractor.extract_batch(urls)
+        assert np.array_equal(batch, np.asarray(rows, dtype=np.float32))
+    finally:
+        URLFeatureExtractor.set_whitelist(whitelist)
+        URLFeatureExtractor.set_resolver(previous)
+
+
+def test_keyword_automaton_matches_str_count():
+    rng = random.Random(7)
+    for _ in range(2000):
+        keywords = [''.join(rng.choice('ab') for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 5))]
+        text = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 40)))
+        expected = sum(text.count(word) for word in dict.fromkeys(keywords))
+        assert KeywordAutomaton(keywords).count(text) == expected, (keywords, text)
+
+
+def test_engine_uses_same_counts_above_automaton_length():
+    engine = LexicalEngine(URLFeatureExtractor.SUSPICIOUS_KEYWORDS, None)
+    for url in EDGE_CASES + corpus_sample(500):
+        lowered = url.lower()
+        assert engine.automaton.count(lowered) == engine.keyword_count(url)
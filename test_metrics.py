@@ -0,0 +1,46 @@
+"""Metrics: /check-urls records every scoring stage, like /check-url"""
+import re
+
+import numpy as np
+
+STAGES = ('parse', 'whitelist', 'cascade', 'dns', 'lexical', 'model')
+
+
+class Undecided:
+    """Lexical model stand-in that sends every URL on to DNS and the full model"""
+    version = 'test-undecided'
+
+    def predict_proba(self, matrix):
+        return np.full(len(matrix), 0.5)
+
+
+def stage_counts(client):
+    text = client.get('/metrics').get_data(as_text=True)
+    counts = dict.fromkeys(STAGES, 0)
+    for stage, count in re.findall(r'^url_scanner_stage_seconds_count\{stage="(\w+)"\} (\d+)$', text, re.M):
+        counts[stage] = int(count)
+    return counts
+
+
+def test_check_urls_records_stage_latency(monkeypatch):
+    import flask_server
+    from cascade import Cascade
+    from feature_extractor import URLFeatureExtractor
+    from scoring_snapshot import ScoringSnapshot
+
+    snap = flask_server.snapshot
+    monkeypatch.setattr(flask_server, 'snapshot', ScoringSnapshot(snap.model, Cascade(Undecided()), snap.whitelist))
+    urls = ['http://metrics-one.example.com/login', 'http://metrics-two.example.org/a', 'http://metrics-two.example.org/b']
+    for domain in ('metrics-one.example.com', 'metrics-two.example.org'):
+        URLFeatureExtractor.dns_cache.set(domain, (1, 1, 1, 1), 300)
+
+    client = flask_server.app.test_client()
+    before = stage_counts(client)
+    response = client.post('/check-urls', json={'urls': urls})
+    assert [r['status'] for r in response.json['results']] == ['success'] * 3
+    after = stage_counts(client)
+
+    # Whitelist work is per domain; cascade, DNS features, lexical and model are per URL
+    assert after['parse'] - before['parse'] == after['whitelist'] - before['whitelist'] == 2
+    for stage in ('cascade', 'dns', 'lexical', 'model'):
+        assert after[stage] - before[stage] == 3, stage
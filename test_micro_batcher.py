@@ -0,0 +1,81 @@
+"""Micro-batcher: concurrent submits share one batch call and each gets its own result or error"""
+import threading
+
+from micro_batcher import MicroBatcher
+
+
+def submit_concurrently(batcher, items):
+    """Submit each item from its own thread; returns {item: result or raised exception}"""
+    outcomes = {}
+
+    def run(item):
+        try:
+            outcomes[item] = batcher.submit(item)
+        except Exception as e:
+            outcomes[item] = e
+
+    threads = [threading.Thread(target=run, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return outcomes
+
+
+def test_micro_batcher_fans_results_out_to_waiters():
+    batches = []
+
+    def batch_fn(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    # A long window: the batch closes because it is full, not because time ran out
+    batcher = MicroBatcher(batch_fn, window_ms=5000, max_items=4, workers=1)
+    assert submit_concurrently(batcher, [1, 2, 3, 4]) == {1: 10, 2: 20, 3: 30, 4: 40}
+    assert [sorted(batch) for batch in batches] == [[1, 2, 3, 4]]
+    assert batcher.stats()['avg_batch_size'] == 4
+
+
+def test_micro_batcher_fails_every_waiter_of_a_failed_batch():
+    def batch_fn(items):
+        raise ValueError(f'batch of {len(items)} failed')
+
+    batcher = MicroBatcher(batch_fn, window_ms=5000, max_items=3, workers=1)
+    outcomes = submit_concurrently(batcher, ['a', 'b', 'c'])
+    assert set(outcomes) == {'a', 'b', 'c'}
+    assert all(isinstance(e, ValueError) and str(e) == 'batch of 3 failed' for e in outcomes.values())
+
+
+def test_micro_batcher_fails_every_waiter_on_result_count_mismatch():
+    batcher = MicroBatcher(lambda items: items[:-1], window_ms=5000, max_items=3, workers=1)
+    outcomes = submit_concurrently(batcher, ['a', 'b', 'c'])
+    assert set(outcomes) == {'a', 'b', 'c'}
+    assert all(isinstance(e, ValueError) and '2 results for 3 items' in str(e) for e in outcomes.values())
+    # Without batching the single call is checked too
+    try:
+        MicroBatcher(lambda items: [], window_ms=0).submit('a')
+    except ValueError as e:
+        assert '0 results for 1 items' in str(e)
+    else:
+        raise AssertionError('an empty result list was accepted')
+
+
+def test_micro_batcher_window_zero_calls_through():
+    calls = []
+
+    def batch_fn(items):
+        calls.append((list(items), threading.current_thread()))
+        if items == ['bad']:
+            raise ValueError('bad item')
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(batch_fn, window_ms=0)
+    assert not batcher.enabled
+    assert batcher.submit('x') == 'X'
+    try:
+        batcher.submit('bad')
+        assert False, 'the error must reach the caller'
+    except ValueError as e:
+        assert str(e) == 'bad item'
+    # One item per call, run in the caller's thread
+    assert calls == [(['x'], threading.current_thread()), (['bad'], threading.current_thread())]
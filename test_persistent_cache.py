@@ -0,0 +1,39 @@
+"""Persistent cache: entries expire with their TTL and expired rows are pruned from disk"""
+import sqlite3
+import time
+
+from persistent_cache import PersistentCache
+
+
+def test_expired_rows_are_pruned(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = PersistentCache(path, 'verdict', prune_interval=0)
+    other = PersistentCache(path, 'dns', prune_interval=0)
+    cache.put('live', ['success', 0.2], ttl=3600)
+    cache.put('expired', ['success', 0.9], ttl=-1)
+    cache.put('forever', ['whitelisted', 0.0])
+    other.put('expired', [1, 1, 1, 2], ttl=-1)
+    cache.flush()
+    other.flush()
+
+    assert cache.get('expired') is None
+    value, ttl = cache.get('live')
+    assert value == ['success', 0.2] and 3590 < ttl <= 3600
+
+    assert cache.prune() == 1
+    keys = sqlite3.connect(path).execute('SELECT namespace, key FROM cache ORDER BY namespace, key').fetchall()
+    # Only this namespace is pruned
+    assert keys == [('dns', 'expired'), ('verdict', 'forever'), ('verdict', 'live')]
+    assert cache.stats()['pruned_rows'] == 1
+    cache.close()
+    other.close()
+
+
+def test_writer_prunes_periodically(tmp_path):
+    cache = PersistentCache(str(tmp_path / 'cache.db'), 'verdict', flush_interval=0.01, prune_interval=0.01)
+    cache.put('expired', ['success', 0.9], ttl=0.01)
+    deadline = time.monotonic() + 5
+    while cache.pruned == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    cache.close()
+    assert cache.pruned == 1
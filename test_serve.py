@@ -0,0 +1,35 @@
+"""Pre-fork launcher: every model the server loads gets a current compiled artifact"""
+import shutil
+
+import artifacts
+import serve
+from model_runtime import compiled_model_path
+
+MODEL_PATH = 'url_xgb_model.json'
+
+
+def test_lexical_model_is_compiled_too(tmp_path):
+    model = str(tmp_path / 'model.json')
+    lexical = str(tmp_path / 'lexical.json')
+    shutil.copy(MODEL_PATH, model)
+    shutil.copy(MODEL_PATH, lexical)
+    assert not serve.compiled_is_current(lexical)
+
+    built = artifacts.build_artifacts(model, str(tmp_path / 'missing.csv'), lexical)
+    assert built == (compiled_model_path(model), compiled_model_path(lexical), None, None)
+    assert serve.compiled_is_current(model) and serve.compiled_is_current(lexical)
+
+    # A retrained lexical model makes its artifact stale
+    with open(lexical, 'a') as f:
+        f.write('\n')
+    assert not serve.compiled_is_current(lexical)
+
+
+def test_served_model_paths_follow_cascade_setting(tmp_path, monkeypatch):
+    lexical = tmp_path / 'lexical.json'
+    lexical.write_text('{}')
+    monkeypatch.setenv('URL_SCANNER_LEXICAL_MODEL', str(lexical))
+    monkeypatch.setenv('URL_SCANNER_CASCADE', '1')
+    assert serve.served_model_paths() == [MODEL_PATH, str(lexical)]
+    monkeypatch.setenv('URL_SCANNER_CASCADE', '0')
+    assert serve.served_model_paths() == [MODEL_PATH]
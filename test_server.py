@@ -6,6 +6,9 @@ import json
 
 BACKEND_URL = 'http://localhost:5000'
 
+# These check a running server (python test_server.py); pytest does not collect them
+__test__ = False
+
 def test_health():
     """Test health endpoint"""
     print("🔍 Testing health endpoint...")
@@ -86,6 +89,7 @@ def test_stats():
             print(f"   Whitelist domains: {stats['whitelist_domains']}")
             print(f"   Feature count: {stats['feature_count']}")
             print(f"   DNS cache size: {stats['dns_cache_size']}")
+            print(f"   DNS cache hit rate: {stats['dns_cache']['hit_rate']*100:.1f}%")
         else:
             print(f"❌ Stats failed: {response.status_code}")
     except Exception as e:
@@ -0,0 +1,92 @@
+"""TTL cache: LRU eviction order, per-entry expiry, and the shorter TTLs of failed and timed-out DNS lookups"""
+import asyncio
+
+from dns_resolvers import RecordedAnswer
+from domain_memo import DomainMemo
+from feature_extractor import URLFeatureExtractor
+from testutils import FixedResolver, install_resolver
+from ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=3, ttl=300, clock=FakeClock())
+    for key in 'abc':
+        cache.set(key, key.upper())
+    assert cache.get('a') == 'A'  # a is now the most recently used
+    cache.set('d', 'D')
+    assert 'b' not in cache and cache.evictions == 1
+    cache.set('c', 'C2')  # overwriting also counts as a use
+    cache.set('e', 'E')
+    assert 'a' not in cache
+    assert [key for key in 'abcde' if key in cache] == ['c', 'd', 'e']
+    assert cache.get('c') == 'C2'
+
+
+def test_entries_expire_with_their_own_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=300, clock=clock)
+    cache.set('default', 1)
+    cache.set('short', 2, ttl=10)
+    cache.set('long', 3, ttl=1000)
+
+    clock.now = 9.9
+    assert cache.get_entry('short') == (10 - 9.9, 2)
+    assert cache.remaining_ttl('default') == 300 - 9.9
+    clock.now = 10
+    assert cache.get('short') is None and cache.get('short', 'gone') == 'gone'
+    clock.now = 300
+    assert cache.get('default') is None
+    assert cache.get('long') == 3
+    assert cache.stats()['expirations'] == 2
+
+    cache.clear()
+    assert len(cache) == 0 and cache.generation == 1
+
+
+def test_failed_lookup_gets_shorter_ttl(monkeypatch):
+    clock = FakeClock()
+    dns_cache = TTLCache(maxsize=10, ttl=300, clock=clock)
+    monkeypatch.setattr(URLFeatureExtractor, 'dns_cache', dns_cache)
+    monkeypatch.setattr(URLFeatureExtractor, 'domain_memo', DomainMemo(dns_cache, clock=clock))
+    monkeypatch.setattr(URLFeatureExtractor, 'dns_store', None)
+    resolved = URLFeatureExtractor('http://resolved.example.com/')
+    failed = URLFeatureExtractor('http://failed.example.com/')
+    resolved._store_dns_info([RecordedAnswer(2, 600), None, RecordedAnswer(1, 900)])
+    failed._store_dns_info([None, None, None])
+
+    negative = URLFeatureExtractor.DNS_NEGATIVE_TTL
+    assert negative < 600
+    clock.now = negative - 1
+    assert URLFeatureExtractor.dns_cache.get('failed.example.com') == (0, 0, 0, 0)
+    clock.now = negative
+    assert URLFeatureExtractor.dns_cache.get('failed.example.com') is None
+    # The resolved domain lives for its shortest record TTL
+    assert URLFeatureExtractor.dns_cache.get('resolved.example.com') == (1, 0, 1, 2)
+    clock.now = 600
+    assert URLFeatureExtractor.dns_cache.get('resolved.example.com') is None
+
+
+def test_deadline_placeholder_gets_timeout_ttl(monkeypatch):
+    class SlowFor(FixedResolver):
+        async def query(self, domain, rdtype):
+            if domain.startswith('slow.'):
+                await asyncio.sleep(10)
+            return await super().query(domain, rdtype)
+
+    install_resolver(monkeypatch, SlowFor(default={'A': RecordedAnswer(1, 600)}))
+    urls = ['http://slow.example.com/', 'http://fast.example.com/']
+    assert asyncio.run(URLFeatureExtractor.prefetch_dns(urls, deadline=0.2)) == 1
+
+    dns_cache = URLFeatureExtractor.dns_cache
+    assert dns_cache.get('slow.example.com') == (0, 0, 0, 0)
+    assert dns_cache.remaining_ttl('slow.example.com') <= URLFeatureExtractor.DNS_TIMEOUT_TTL
+    assert URLFeatureExtractor.DNS_TIMEOUT_TTL < URLFeatureExtractor.DNS_NEGATIVE_TTL
+    assert dns_cache.remaining_ttl('fast.example.com') > 500
@@ -0,0 +1,24 @@
+"""Verdict cache: a verdict never outlives the DNS answers its features came from"""
+import flask_server
+from feature_extractor import URLFeatureExtractor
+
+
+def test_verdict_from_failed_dns_expires_with_it():
+    urls = ['http://deadline-expired.example.com/login', 'http://resolved.example.net/']
+    # A deadline placeholder, and a real answer with a long TTL
+    URLFeatureExtractor.dns_cache.set('deadline-expired.example.com', (0, 0, 0, 0), URLFeatureExtractor.DNS_NEGATIVE_TTL)
+    URLFeatureExtractor.dns_cache.set('resolved.example.net', (1, 1, 1, 2), 86400)
+    results = flask_server.predict_urls(urls)
+    assert [result['status'] for result in results] == ['success', 'success']
+
+    short, long = (flask_server.verdict_key(url, flask_server.snapshot) for url in urls)
+    assert flask_server.verdict_cache.remaining_ttl(short) <= URLFeatureExtractor.DNS_NEGATIVE_TTL
+    assert flask_server.verdict_cache.remaining_ttl(long) > flask_server.VERDICT_CACHE_TTL - 5
+
+
+def test_single_url_verdict_uses_dns_ttl():
+    url = 'http://single-deadline.example.com/verify'
+    URLFeatureExtractor.dns_cache.set('single-deadline.example.com', (0, 0, 0, 0), URLFeatureExtractor.DNS_NEGATIVE_TTL)
+    assert flask_server.predict_url(url)['status'] == 'success'
+    key = flask_server.verdict_key(url, flask_server.snapshot)
+    assert flask_server.verdict_cache.remaining_ttl(key) <= URLFeatureExtractor.DNS_NEGATIVE_TTL
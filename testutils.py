@@ -0,0 +1,58 @@
+"""Stand-ins shared by the tests: a model that fails on purpose, a fixed DNS resolver,
+and a way to send one request through the ASGI app without a server"""
+from domain_memo import DomainMemo
+from feature_extractor import URLFeatureExtractor, FEATURE_ORDER
+from ttl_cache import TTLCache
+
+
+class FailOnLength:
+    """Model wrapper that fails any batch containing a row with the given url_len"""
+
+    def __init__(self, model, url_len):
+        self.model = model
+        self.url_len = url_len
+
+    def predict_proba(self, matrix):
+        if (matrix[:, FEATURE_ORDER.index('url_len')] == self.url_len).any():
+            raise ValueError('bad row')
+        return self.model.predict_proba(matrix)
+
+
+class FixedResolver:
+    """Answers from a dict of (domain, rdtype), else from `default` by rdtype;
+    anything else fails like NXDOMAIN"""
+    offline = False
+
+    def __init__(self, answers=None, default=None):
+        self.answers = answers or {}
+        self.default = default or {}
+
+    async def query(self, domain, rdtype):
+        answer = self.answers.get((domain, rdtype))
+        return answer if answer is not None else self.default.get(rdtype)
+
+
+def install_resolver(monkeypatch, resolver):
+    """Resolve DNS with `resolver` for one test, into caches of its own"""
+    dns_cache = TTLCache(maxsize=1000)
+    monkeypatch.setattr(URLFeatureExtractor, 'resolver', resolver)
+    monkeypatch.setattr(URLFeatureExtractor, 'dns_cache', dns_cache)
+    monkeypatch.setattr(URLFeatureExtractor, 'domain_memo', DomainMemo(dns_cache, maxsize=1000))
+
+
+def asgi_request(method, path, body=b'', headers=()):
+    """Run one request through asgi_server.app; returns (status, body bytes)"""
+    import asyncio
+    import asgi_server
+
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': list(headers)}
+    asyncio.run(asgi_server.app(scope, receive, send))
+    return sent[0]['status'], b''.join(m.get('body', b'') for m in sent[1:])
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Train the lexical-only first stage of the cascade
+
+Uses the same features as url_xgb_model.json minus the DNS lookups
+(has_a, has_mx, has_ns, ip_count), so it can score a URL without any
+network access. Writes an XGBoost JSON model plus its compiled artifact.
+
+Usage:
+    python train_lexical_model.py --benign raw_datasets/benign-urls.csv \\
+        --malicious raw_datasets/malicious-urls.csv -o url_xgb_lexical_model.json
+"""
+import argparse
+import csv
+import random
+import sys
+
+import numpy as np
+
+from cascade import LEXICAL_FEATURES, LEXICAL_COLUMNS, DEFAULT_LEXICAL_MODEL
+from feature_extractor import URLFeatureExtractor
+from model_runtime import compiled_model_path
+
+
+def read_urls(path, limit=None, seed=0):
+    """URLs from a CSV with a 'url' column, or from the second column of rank,url rows"""
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return []
+        if 'url' in first:
+            column = first.index('url')
+            rows = reader
+        else:
+            column = 1
+            rows = [first] + list(reader) if first[0].isdigit() else reader
+        urls = [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+    if limit and len(urls) > limit:
+        urls = random.Random(seed).sample(urls, limit)
+    return urls
+
+
+def lexical_matrix(urls):
+    return URLFeatureExtractor.extract_batch(urls, resolve_dns=False)[:, LEXICAL_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the lexical-only cascade model')
+    parser.add_argument('--benign', default='raw_datasets/benign-urls.csv')
+    parser.add_argument('--malicious', default='raw_datasets/malicious-urls.csv')
+    parser.add_argument('-o', '--output', default=DEFAULT_LEXICAL_MODEL)
+    parser.add_argument('--max-per-class', type=int, default=200000)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=5)
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    import xgboost as xgb
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from tree_compiler import CompiledModel
+
+    benign = read_urls(args.benign, args.max_per_class, args.seed)
+    malicious = read_urls(args.malicious, args.max_per_class, args.seed)
+    if not benign or not malicious:
+        raise SystemExit("❌ Both benign and malicious URLs are needed to train")
+    print(f"📊 {len(benign):,} benign and {len(malicious):,} malicious URLs")
+
+    X = lexical_matrix(benign + malicious)
+    y = np.concatenate([np.zeros(len(benign)), np.ones(len(malicious))])
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.holdout, random_state=args.seed, stratify=y)
+
+    classifier = xgb.XGBClassifier(
+        n_estimators=args.trees, max_depth=args.max_depth, learning_rate=0.2,
+        eval_metric='logloss', random_state=args.seed)
+    classifier.fit(X_train, y_train)
+    classifier.get_booster().feature_names = LEXICAL_FEATURES
+
+    proba = classifier.predict_proba(X_test)[:, 1]
+    print(f"✅ Holdout accuracy {accuracy_score(y_test, proba >= 0.5):.4f}, "
+          f"ROC AUC {roc_auc_score(y_test, proba):.4f}")
+
+    classifier.save_model(args.output)
+    compiled_path = compiled_model_path(args.output)
+    CompiledModel.from_json(args.output).save(compiled_path)
+    print(f"✅ Lexical model written to {args.output} (compiled: {compiled_path})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Retrain the full URL model from the feature store
+
+Brings the feature store (feature_store.py) up to date for the labeled
+corpora, extracting only URLs it has no row for, then trains on the stored
+rows. Writes an XGBoost JSON model with the FEATURE_ORDER feature names,
+the format load_model and the server read, plus its compiled artifact.
+
+Usage:
+    python train_model.py --benign raw_datasets/benign-urls.csv \\
+        --malicious raw_datasets/malicious-urls.csv --store features -o url_xgb_model.json
+"""
+import argparse
+import random
+
+import numpy as np
+
+import feature_store
+from feature_extractor import FEATURE_ORDER
+from model_runtime import compiled_model_path, invalid_rows
+from train_lexical_model import read_urls
+
+
+def sample(urls, limit, seed):
+    urls = list(dict.fromkeys(urls))
+    if limit and len(urls) > limit:
+        urls = random.Random(seed).sample(urls, limit)
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the URL model from the feature store')
+    parser.add_argument('--benign', default='raw_datasets/benign-urls.csv')
+    parser.add_argument('--malicious', default='raw_datasets/malicious-urls.csv')
+    parser.add_argument('-o', '--output', default='url_xgb_model.json')
+    parser.add_argument('--max-per-class', type=int, default=0, help='sample each class down to this (0: all)')
+    parser.add_argument('--trees', type=int, default=500)
+    parser.add_argument('--max-depth', type=int, default=6)
+    parser.add_argument('--learning-rate', type=float, default=0.1)
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    feature_store.add_arguments(parser)
+    args = parser.parse_args()
+    feature_store.check_arguments(parser, args)
+
+    import xgboost as xgb
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from tree_compiler import CompiledModel
+
+    benign = sample(read_urls(args.benign), args.max_per_class, args.seed)
+    malicious = sample(read_urls(args.malicious), args.max_per_class, args.seed)
+    if not benign or not malicious:
+        raise SystemExit("❌ Both benign and malicious URLs are needed to train")
+    print(f"📊 {len(benign):,} benign and {len(malicious):,} malicious URLs")
+
+    store = feature_store.FeatureStore(args.store)
+    version = feature_store.materialize_from_args(store, benign + malicious, args)
+    X = store.matrix(benign + malicious, version)
+    y = np.concatenate([np.zeros(len(benign)), np.ones(len(malicious))])
+    valid = ~invalid_rows(X)
+    if not valid.all():
+        print(f"⚠️  Dropping {int((~valid).sum()):,} rows whose features could not be extracted")
+        X, y = X[valid], y[valid]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.holdout, random_state=args.seed, stratify=y)
+    classifier = xgb.XGBClassifier(
+        n_estimators=args.trees, max_depth=args.max_depth, learning_rate=args.learning_rate,
+        eval_metric='logloss', random_state=args.seed)
+    classifier.fit(X_train, y_train)
+    classifier.get_booster().feature_names = FEATURE_ORDER
+
+    proba = classifier.predict_proba(X_test)[:, 1]
+    print(f"✅ Holdout accuracy {accuracy_score(y_test, proba >= 0.5):.4f}, "
+          f"ROC AUC {roc_auc_score(y_test, proba):.4f}")
+
+    classifier.save_model(args.output)
+    compiled_path = compiled_model_path(args.output)
+    CompiledModel.from_json(args.output).save(compiled_path)
+    print(f"✅ Model written to {args.output} (compiled: {compiled_path}, features {version})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Compile url_xgb_model.json into flat NumPy arrays and score them without xgboost
+
+Usage:
+    python tree_compiler.py url_xgb_model.json [-o url_xgb_model.npz]
+"""
+import argparse
+import json
+import math
+import numpy as np
+from model_runtime import file_fingerprint
+
+# Rows scored per block; bounds the (rows x trees) node-index matrices
+EVAL_BLOCK_ROWS = 4096
+
+
+def compile_model(json_path):
+    """Flatten the trees of an XGBoost JSON model into concatenated node arrays.
+
+    Nodes are renumbered breadth-first so the right child always follows the
+    left one, which lets the evaluator step with ``left[node] + go_right``.
+    Leaves are their own left child with an infinite threshold on a constant
+    zero feature column, so a fixed number of vectorized steps (the maximum
+    tree depth) walks every tree to its leaf.
+    """
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    learner = json.loads(raw)['learner']
+
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"Unsupported objective: {objective}")
+    booster = learner['gradient_booster']
+    if booster['name'] != 'gbtree':
+        raise ValueError(f"Unsupported booster: {booster['name']}")
+
+    num_feature = int(learner['learner_model_param']['num_feature'])
+    base_score = float(learner['learner_model_param']['base_score'])
+    trees = booster['model']['trees']
+    # Early-stopped models keep every boosted round; score only up to the best
+    # one, the same tree range URLModel passes to inplace_predict
+    best_iteration = learner.get('attributes', {}).get('best_iteration')
+    if best_iteration is not None:
+        per_round = int(booster['model']['gbtree_model_param']['num_parallel_tree'])
+        trees = trees[:(int(best_iteration) + 1) * per_round]
+
+    roots, features, thresholds, lefts, default_left, values = [], [], [], [], [], []
+    max_depth = 0
+    for tree in trees:
+        if any(tree['split_type']):
+            raise ValueError(f"Tree {tree['id']} uses categorical splits, which are not supported")
+        tree_left = tree['left_children']
+        tree_right = tree['right_children']
+
+        # Breadth-first order, children of each split placed side by side
+        order = [0]
+        depth = {0: 0}
+        for node in order:
+            if tree_left[node] != -1:
+                order.extend((tree_left[node], tree_right[node]))
+                depth[tree_left[node]] = depth[tree_right[node]] = depth[node] + 1
+        offset = len(features)
+        position = {node: offset + i for i, node in enumerate(order)}
+        roots.append(offset)
+        max_depth = max(max_depth, max(depth.values()))
+
+        for node in order:
+            if tree_left[node] == -1:
+                features.append(num_feature)
+                thresholds.append(np.inf)
+                lefts.append(position[node])
+                default_left.append(True)
+                values.append(tree['split_conditions'][node])
+            else:
+                features.append(tree['split_indices'][node])
+                thresholds.append(tree['split_conditions'][node])
+                lefts.append(position[tree_left[node]])
+                default_left.append(bool(tree['default_left'][node]))
+                values.append(0.0)
+
+    return {
+        'roots': np.array(roots, dtype=np.int32),
+        'feature': np.array(features, dtype=np.int32),
+        'threshold': np.array(thresholds, dtype=np.float32),
+        'left': np.array(lefts, dtype=np.int32),
+        'default_left': np.array(default_left, dtype=bool),
+        'value': np.array(values, dtype=np.float32),
+        'base_margin': np.float32(math.log(base_score / (1.0 - base_score))),
+        'max_depth': np.int32(max_depth),
+        'num_feature': np.int32(num_feature),
+        'feature_names': np.array(learner.get('feature_names', [])),
+        'source_version': np.array(file_fingerprint(json_path))
+    }
+
+
+class CompiledModel:
+    """Pure-NumPy evaluator for a compiled tree ensemble"""
+
+    def __init__(self, arrays):
+        # Stored compactly as int32; gathers are fastest with native intp indices
+        self.roots = arrays['roots'].astype(np.intp)
+        self.feature = arrays['feature'].astype(np.intp)
+        self.threshold = arrays['threshold']
+        self.left = arrays['left'].astype(np.intp)
+        self.default_left = arrays['default_left']
+        self.value = arrays['value']
+        self.base_margin = np.float32(arrays['base_margin'])
+        self.max_depth = int(arrays['max_depth'])
+        self.num_feature = int(arrays['num_feature'])
+        self.feature_names = [str(name) for name in arrays['feature_names']]
+        self.version = str(arrays['source_version'])
+
+    @classmethod
+    def from_json(cls, json_path):
+        return cls(compile_model(json_path))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def save(self, path):
+        np.savez(
+            path,
+            roots=self.roots.astype(np.int32), feature=self.feature.astype(np.int32),
+            threshold=self.threshold, left=self.left.astype(np.int32), default_left=self.default_left,
+            value=self.value, base_margin=self.base_margin,
+            max_depth=np.int32(self.max_depth), num_feature=np.int32(self.num_feature),
+            feature_names=np.array(self.feature_names), source_version=np.array(self.version)
+        )
+
+    def predict_margin(self, matrix):
+        """Raw margin per row, summing trees in order in float32 like xgboost"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.num_feature:
+            raise ValueError(f"Expected a (rows, {self.num_feature}) feature matrix, got {matrix.shape}")
+        margins = np.empty(matrix.shape[0], dtype=np.float32)
+        width = self.num_feature + 1
+        for start in range(0, matrix.shape[0], EVAL_BLOCK_ROWS):
+            block = matrix[start:start + EVAL_BLOCK_ROWS]
+            n = block.shape[0]
+            # Extra zero column is the feature every leaf "splits" on
+            padded = np.zeros((n, width), dtype=np.float32)
+            padded[:, :self.num_feature] = block
+            flat = padded.ravel()
+            row_offsets = (np.arange(n, dtype=np.intp) * width)[:, None]
+            has_nan = np.isnan(block).any()
+
+            node = np.tile(self.roots, (n, 1))
+            for _ in range(self.max_depth):
+                x = flat[row_offsets + self.feature[node]]
+                go_right = ~(x < self.threshold[node])
+                if has_nan:
+                    go_right &= ~(np.isnan(x) & self.default_left[node])
+                node = self.left[node] + go_right
+
+            leaves = self.value[node]
+            leaves[:, 0] += self.base_margin
+            # cumsum accumulates sequentially, matching xgboost's per-tree order
+            margins[start:start + n] = np.cumsum(leaves, axis=1, dtype=np.float32)[:, -1]
+        return margins
+
+    def predict_proba(self, matrix):
+        """Probability of the malicious class for each row of a feature matrix"""
+        margins = self.predict_margin(matrix)
+        return np.float32(1.0) / (np.float32(1.0) + np.exp(-margins))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('model', help='XGBoost JSON model')
+    parser.add_argument('-o', '--output', help='compiled artifact path (default: model path with .npz)')
+    args = parser.parse_args()
+
+    output = args.output or args.model.rsplit('.', 1)[0] + '.npz'
+    compiled = CompiledModel.from_json(args.model)
+    compiled.save(output)
+    print(f"✅ Compiled {compiled.roots.size} trees ({compiled.feature.size} nodes, "
+          f"depth {compiled.max_depth}) -> {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import hashlib
+
+
+class WhitelistIndex:
+    """Precompiled whitelist lookup.
+
+    Reproduces URLFeatureExtractor's whitelist rules with at most three hashed
+    probes per domain, located with str.find/rfind instead of splitting the
+    domain into labels and re-joining every suffix:
+
+    - exact: the domain itself is whitelisted
+    - main: its last two labels (e.g. docs.google.com -> google.com) are
+    - trusted_subdomain: a single trusted label (www, mail, docs, ...) sits
+      directly on top of a whitelisted domain
+    """
+
+    EXACT = 'exact'
+    MAIN = 'main'
+    TRUSTED_SUBDOMAIN = 'trusted_subdomain'
+
+    TRUSTED_SUBDOMAINS = frozenset([
+        'www', 'mail', 'docs', 'drive', 'accounts', 'support',
+        'help', 'admin', 'api', 'cdn', 'm', 'mobile', 'app'
+    ])
+    # An empty leading label (".example.com") is accepted like the parent itself
+    _TRUSTED_PREFIXES = TRUSTED_SUBDOMAINS | {''}
+
+    def __init__(self, domains=None, version=None):
+        self.domains = domains if domains is not None else set()
+        self._version = version
+
+    @property
+    def version(self):
+        """Short content hash of the domain set, computed on first use"""
+        if self._version is None:
+            digest = hashlib.sha256('\n'.join(sorted(self.domains)).encode('utf-8'))
+            self._version = digest.hexdigest()[:12]
+        return self._version
+
+    def __len__(self):
+        return len(self.domains)
+
+    def __contains__(self, domain):
+        return domain in self.domains
+
+    def match(self, domain):
+        """Return the match kind for a normalized domain, or None"""
+        domains = self.domains
+        if domain in domains:
+            return self.EXACT
+
+        last_dot = domain.rfind('.')
+        if last_dot < 0:
+            return None
+
+        # Main domain only differs from the domain when there are 3+ labels
+        second_dot = domain.rfind('.', 0, last_dot)
+        if second_dot >= 0 and domain[second_dot + 1:] in domains:
+            return self.MAIN
+
+        first_dot = domain.find('.')
+        if domain[:first_dot] in self._TRUSTED_PREFIXES and domain[first_dot + 1:] in domains:
+            return self.TRUSTED_SUBDOMAIN
+
+        return None